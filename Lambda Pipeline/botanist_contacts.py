@@ -0,0 +1,134 @@
+"""Pipeline Script: Normalises botanist emails and phone numbers, caching the result for each raw string"""
+
+import re
+from functools import lru_cache
+
+from cache_stats import get_cache_stats
+
+EMAIL_PATTERN = r"([\w.-]+@[\w.-]+)"
+PHONE_NUMBER_PATTERN = r"([(]?\d{3}[.-]?[)]?[(]?\d{3}[.-]?[)]?[(]?\d{4}[.-]?[)]?)"
+CONTACT_CACHE_SIZE = 4096
+
+EMAIL_REGEX = re.compile(EMAIL_PATTERN)
+PHONE_NUMBER_REGEX = re.compile(PHONE_NUMBER_PATTERN)
+NON_DIGIT_REGEX = re.compile(r"\D")
+
+
+def get_email(email: str) -> str:
+    """
+    Extracts an email address, as `transform_email_column_using_regex` does
+
+    Args:
+        email (str): The botanist's email from the API
+
+    Returns:
+        str: The email address, or None if there isn't one
+    """
+    if not isinstance(email, str):
+        return None
+    match = EMAIL_REGEX.search(email)
+    return match.group(1) if match else None
+
+
+def get_phone_number(phone_number: str) -> str:
+    """
+    Extracts and normalises a phone number, as `transform_phone_column_using_regex` does
+
+    Args:
+        phone_number (str): The botanist's phone number from the API
+
+    Returns:
+        str: The phone number as 000-000-0000, or None if there isn't one
+    """
+    if not isinstance(phone_number, str):
+        return None
+    match = PHONE_NUMBER_REGEX.search(phone_number)
+    if not match:
+        return None
+    digits = NON_DIGIT_REGEX.sub("", match.group(1))
+    return f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+
+
+@lru_cache(maxsize=CONTACT_CACHE_SIZE)
+def normalize_email_text(email: str) -> str:
+    """
+    Cached `get_email`, as the same few botanists appear on every plant
+
+    Args:
+        email (str): The botanist's email from the API
+
+    Returns:
+        str: The email address, or None if there isn't one
+    """
+    return get_email(email)
+
+
+@lru_cache(maxsize=CONTACT_CACHE_SIZE)
+def normalize_phone_number_text(phone_number: str) -> str:
+    """
+    Cached `get_phone_number`, as the same few botanists appear on every plant
+
+    Args:
+        phone_number (str): The botanist's phone number from the API
+
+    Returns:
+        str: The phone number as 000-000-0000, or None if there isn't one
+    """
+    return get_phone_number(phone_number)
+
+
+def normalize_botanist_email(email: str) -> str:
+    """
+    Extracts an email address, reusing the result for strings seen before
+
+    Args:
+        email (str): The botanist's email from the API
+
+    Returns:
+        str: The email address, or None if there isn't one
+    """
+    if not isinstance(email, str):
+        return None
+
+    return normalize_email_text(email)
+
+
+def normalize_botanist_phone_number(phone_number: str) -> str:
+    """
+    Extracts and normalises a phone number, reusing the result for strings seen before
+
+    Args:
+        phone_number (str): The botanist's phone number from the API
+
+    Returns:
+        str: The phone number as 000-000-0000, or None if there isn't one
+    """
+    if not isinstance(phone_number, str):
+        return None
+
+    return normalize_phone_number_text(phone_number)
+
+
+def get_contact_cache_info() -> dict:
+    """
+    Returns how well the email and phone number caches are working. The caches are
+    kept for the life of the process, so in Lambda they last across warm invocations.
+
+    Returns:
+        dict: The stats of the "email" and "phone_number" caches
+    """
+    return {
+        "email": get_cache_stats(normalize_email_text),
+        "phone_number": get_cache_stats(normalize_phone_number_text)
+    }
+
+
+def clear_contact_caches() -> None:
+    """
+    Empties the email and phone number caches and resets their stats
+
+    Returns:
+        None
+    """
+    normalize_email_text.cache_clear()
+    normalize_phone_number_text.cache_clear()
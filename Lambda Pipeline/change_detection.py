@@ -0,0 +1,120 @@
+"""Pipeline Script: Detects which plants have new readings since the last run"""
+
+import hashlib
+import json
+
+DEFAULT_CHANGE_CACHE_PATH = "plant_change_cache.json"
+
+
+def get_plant_content_hash(plant_data: dict) -> str:
+    """
+    Returns a hash of the content of a processed plant response
+
+    Args:
+        plant_data (dict): A python dictionary of processed plant data
+
+    Returns:
+        str: A hex digest which only changes when the plant data changes
+    """
+    content = json.dumps(plant_data, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class PlantChangeCache:
+    """
+    Remembers the last `recording_time` and content hash seen for each plant,
+    so plants which haven't changed since the last run can be dropped before
+    they are transformed and loaded.
+    """
+
+    def __init__(self, last_seen: dict[int, tuple[str, str]] = None):
+        """
+        Args:
+            last_seen (dict[int, tuple[str, str]]): Plant ids mapped to the
+            recording time and content hash last seen for them
+        """
+        self.last_seen = last_seen if last_seen is not None else {}
+
+    def has_changed(self, plant_data: dict) -> bool:
+        """
+        Checks whether a plant differs from the last time it was seen
+
+        Args:
+            plant_data (dict): A python dictionary of processed plant data
+
+        Returns:
+            bool: False if both the recording time and the content are unchanged
+        """
+        previous = self.last_seen.get(plant_data.get("plant_id"))
+
+        if previous is None:
+            return True
+
+        return previous != (plant_data.get("recording_time"),
+                            get_plant_content_hash(plant_data))
+
+    def filter_changed_plants(self, plants_data: list[dict]) -> list[dict]:
+        """
+        Returns only the plants which have changed since they were last marked as seen
+
+        Args:
+            plants_data (list[dict]): A list containing dictionaries of processed plant data
+
+        Returns:
+            list[dict]: The plants with new readings, in their original order
+        """
+        return [plant for plant in plants_data if self.has_changed(plant)]
+
+    def mark_plants_seen(self, plants_data: list[dict]) -> None:
+        """
+        Records plants as seen. Call this once they have been loaded, so a failed
+        load doesn't cause readings to be skipped on the next run.
+
+        Args:
+            plants_data (list[dict]): A list containing dictionaries of processed plant data
+
+        Returns:
+            None
+        """
+        for plant in plants_data:
+            self.last_seen[plant.get("plant_id")] = (
+                plant.get("recording_time"), get_plant_content_hash(plant))
+
+
+def load_change_cache(file_path: str) -> PlantChangeCache:
+    """
+    Loads a change cache from a .json file, or starts a new one if there isn't one
+
+    Args:
+        file_path (str): A string containing the path to the cache file
+
+    Returns:
+        PlantChangeCache: The stored cache, or an empty cache
+    """
+    try:
+        with open(file_path, "r") as cache_file:
+            data = json.load(cache_file)
+    except FileNotFoundError:
+        return PlantChangeCache()
+    except json.JSONDecodeError as e:
+        print(f"Error loading change cache, starting a new one: {e}")
+        return PlantChangeCache()
+
+    return PlantChangeCache({int(plant_id): tuple(seen) for plant_id, seen in data.items()})
+
+
+def save_change_cache(cache: PlantChangeCache, file_path: str) -> None:
+    """
+    Saves a change cache to a .json file
+
+    Args:
+        cache (PlantChangeCache): The cache to save
+
+        file_path (str): A string containing the path to the cache file
+
+    Returns:
+        None
+    """
+    with open(file_path, "w") as cache_file:
+        json.dump({str(plant_id): list(seen)
+                   for plant_id, seen in cache.last_seen.items()}, cache_file)
@@ -1,65 +1,187 @@
 import json
 from os import environ
+from os.path import splitext
 from dotenv import load_dotenv
 
 from extract import (
-    get_all_plants_data,
+    get_all_plants_data_from_index,
     clean_unicode_from_plant_data,
+    DEFAULT_MAX_WORKERS
 )
 
-from transform import (
+from deadline import (
+    get_run_deadline,
+    DEFAULT_MARGIN_SECONDS
+)
+
+from sharding import parse_shard_spec
+
+from rate_limit import (
+    get_api_scheduler,
+    DEFAULT_RATE_LIMIT
+)
+
+from plant_index import (
+    load_plant_index,
+    save_plant_index,
+    DEFAULT_INDEX_PATH
+)
+
+from change_detection import (
+    load_change_cache,
+    save_change_cache,
+    DEFAULT_CHANGE_CACHE_PATH
+)
+
+from botanist_contacts import get_contact_cache_info
+
+from quality import (
+    check_plant_data,
+    get_quarantine_records,
+    write_quarantine,
+    DEFAULT_QUARANTINE_PATH
+)
+
+from light_transform import (
     flatten_data,
-    build_plant_dataframe
+    build_plant_data,
+    DEFAULT_MAX_LIGHT_ROWS
 )
 
 from load import (
     get_db_connection,
-    insert_into_plant_origin_table,
-    insert_into_plant_table,
-    insert_into_botanist_table,
-    insert_into_water_history_table,
-    insert_into_reading_information_table,
+    load_plant_data,
+    load_dimension_cache,
+    save_dimension_cache,
+    insert_into_quarantine_table,
     delete_old_rows,
-    switch_to_long_term_schema
+    switch_to_long_term_schema,
+    DEFAULT_DIMENSION_CACHE_PATH,
+    DEFAULT_RESYNC_SECONDS
 )
 
 
+# /tmp is the only writable path in Lambda and survives between warm invocations
+LAMBDA_INDEX_PATH = f"/tmp/{DEFAULT_INDEX_PATH}"
+LAMBDA_CHANGE_CACHE_PATH = f"/tmp/{DEFAULT_CHANGE_CACHE_PATH}"
+LAMBDA_DIMENSION_CACHE_PATH = f"/tmp/{DEFAULT_DIMENSION_CACHE_PATH}"
+# Only used for local runs, as rows quarantined in Lambda go to the database
+LAMBDA_QUARANTINE_PATH = f"/tmp/{DEFAULT_QUARANTINE_PATH}"
+
+
 def lambda_handler(event, context) -> dict:
     """
     This section of code is the 'Lambda function',
     to be used by AWS Lambda to execute the 
     data processing pipeline
+
+    An event such as {"shard": "3/8"} only processes that shard of plant ids,
+    so plants can be split across several concurrent invocations
     """
 
     load_dotenv()
 
     api_path = environ.get("API_PATH")
-
-    all_plants_data = get_all_plants_data(api_path)
+    max_workers = int(environ.get("MAX_WORKERS", DEFAULT_MAX_WORKERS))
+    api_rate_limit = float(environ.get("API_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+    plant_index_path = environ.get("PLANT_INDEX_PATH", LAMBDA_INDEX_PATH)
+    run_budget_seconds = environ.get("RUN_BUDGET_SECONDS")
+    deadline_margin = float(environ.get(
+        "DEADLINE_MARGIN_SECONDS", DEFAULT_MARGIN_SECONDS))
+    change_cache_path = environ.get(
+        "CHANGE_CACHE_PATH", LAMBDA_CHANGE_CACHE_PATH)
+    max_light_rows = int(environ.get(
+        "LIGHT_TRANSFORM_MAX_ROWS", DEFAULT_MAX_LIGHT_ROWS))
+    dimension_cache_path = environ.get(
+        "DIMENSION_CACHE_PATH", LAMBDA_DIMENSION_CACHE_PATH)
+    resync_seconds = float(environ.get(
+        "DIMENSION_RESYNC_SECONDS", DEFAULT_RESYNC_SECONDS))
+    quarantine_path = environ.get("QUARANTINE_PATH", LAMBDA_QUARANTINE_PATH)
+
+    shard = parse_shard_spec((event or {}).get("shard"))
+    owns = None
+    if shard is not None:
+        # Shards share the API's rate limit and keep their own state files
+        api_rate_limit /= shard.count
+        plant_index_path = shard.get_path(plant_index_path)
+        change_cache_path = shard.get_path(change_cache_path)
+        dimension_cache_path = shard.get_path(dimension_cache_path)
+        quarantine_path = shard.get_path(quarantine_path)
+        owns = shard.owns
+
+    # Each schema has its own dimension rows, so each has its own cache
+    root, extension = splitext(dimension_cache_path)
+    long_term_cache_path = f"{root}.long_term{extension}"
+
+    # Kept between warm invocations so the learned concurrency limit carries over,
+    # with a separate scheduler for each shard's share of the rate limit
+    api_scheduler = get_api_scheduler(max_workers, api_rate_limit)
+
+    deadline = get_run_deadline(
+        context, float(run_budget_seconds) if run_budget_seconds else None, deadline_margin)
+
+    plant_index = load_plant_index(plant_index_path, owns)
+    all_plants_data = get_all_plants_data_from_index(
+        api_path, plant_index, max_workers, api_scheduler, deadline)
+    save_plant_index(plant_index, plant_index_path)
     unicode_free_plants_data = clean_unicode_from_plant_data(all_plants_data)
-    flatted_plant_data = flatten_data(unicode_free_plants_data)
-    plant_df = build_plant_dataframe(flatted_plant_data)
-    plant_df = plant_df.dropna(subset=['last_watered', 'recording_time'])
+
+    change_cache = load_change_cache(change_cache_path)
+    changed_plants_data = change_cache.filter_changed_plants(
+        unicode_free_plants_data)
+
+    if not changed_plants_data:
+        return {
+            'statusCode': 200,
+            'body': 'No new readings since the last run'
+        }
+
+    flatted_plant_data = flatten_data(changed_plants_data)
+    # A normal run of ~50 plants is transformed without importing pandas
+    plant_df = build_plant_data(flatted_plant_data, max_light_rows)
+    # Rows failing a quality rule, such as a missing timestamp, are kept aside with
+    # the reasons rather than silently dropped
+    quality_report = check_plant_data(plant_df)
+    plant_df = quality_report.accepted
+    # The contact caches last across warm invocations, so the hit rate should stay high
+    print(f"Botanist contact cache: {get_contact_cache_info()}")
 
     config = environ
     conn = get_db_connection(config)
 
-    insert_into_plant_origin_table(conn, plant_df)
-    insert_into_plant_table(conn, plant_df)
-    insert_into_botanist_table(conn, plant_df)
-    insert_into_water_history_table(conn, plant_df)
-    insert_into_reading_information_table(conn, plant_df)
+    if environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        # /tmp is lost when the container is recycled, so rejected rows are kept
+        # in the database where they can be reviewed
+        quarantined = insert_into_quarantine_table(
+            conn, get_quarantine_records(quality_report))
+    else:
+        quarantined = write_quarantine(quality_report, quarantine_path)
+    print(f"Quarantined {quarantined} rows, rule counts: {quality_report.counts}")
+
+    # Only new or changed plants, origins and botanists are sent, with every one
+    # of them resent every DIMENSION_RESYNC_SECONDS
+    dimension_cache = load_dimension_cache(dimension_cache_path, resync_seconds)
+    dimension_rows = load_plant_data(conn, plant_df, dimension_cache)
+    save_dimension_cache(dimension_cache, dimension_cache_path)
     delete_old_rows(conn)
 
     switch_to_long_term_schema(conn)
 
-    insert_into_plant_origin_table(conn, plant_df)
-    insert_into_plant_table(conn, plant_df)
-    insert_into_botanist_table(conn, plant_df)
-    insert_into_water_history_table(conn, plant_df)
-    insert_into_reading_information_table(conn, plant_df)
+    long_term_cache = load_dimension_cache(long_term_cache_path, resync_seconds)
+    dimension_rows += load_plant_data(conn, plant_df, long_term_cache)
+    save_dimension_cache(long_term_cache, long_term_cache_path)
 
     conn.close()
+    print(f"Sent {dimension_rows} dimension rows")
+
+    change_cache.mark_plants_seen(changed_plants_data)
+    save_change_cache(change_cache, change_cache_path)
+
+    if deadline is not None and deadline.reached():
+        return {
+            'statusCode': 200,
+            'body': f'Run deadline reached, {len(plant_df)} readings uploaded to database'
+        }
 
     return {
         'statusCode': 200,
@@ -67,4 +189,6 @@ def lambda_handler(event, context) -> dict:
     }
 
 
-lambda_handler(None, None)
+if __name__ == "__main__":
+
+    lambda_handler(None, None)
@@ -0,0 +1,330 @@
+"""Pipeline Script: Transforms small batches of plant data using only the standard library"""
+
+from itertools import islice
+from typing import Iterable, Iterator
+
+from botanist_contacts import (
+    normalize_botanist_email,
+    normalize_botanist_phone_number
+)
+from sunlight import classify_sunlight
+from timestamps import parse_timestamp, LAST_WATERED_FORMAT, RECORDING_TAKEN_FORMAT
+
+DEFAULT_MAX_LIGHT_ROWS = 500
+MIN_VALID_TEMPERATURE = -40
+MAX_VALID_TEMPERATURE = 75
+LOWERCASE_COLUMNS = ["botanist_name", "plant_name", "plant_cycle", "plant_location",
+                     "scientific_name", "sun_condition", "shade_condition"]
+PLANT_COLUMNS = ["botanist_name", "botanist_email", "botanist_phone_number", "plant_id",
+                 "scientific_name", "plant_name", "plant_cycle", "last_watered",
+                 "plant_origin", "recording_time", "soil_moisture", "sun_condition",
+                 "shade_condition", "temperature", "plant_latitude", "plant_longitude",
+                 "plant_location"]
+
+
+def flatten_plant(data: dict) -> dict:
+    """
+    Build a flattened dictionary from the parsed JSON data of a single plant.
+
+    Args:
+        data (dict): A Python dictionary containing the parsed JSON data for a plant.
+    Returns:
+        dict: A Python dictionary containing the parsed JSON data without nested dictionaries.
+    """
+    plant = {}
+    plant["botanist_name"] = data.get("botanist_details").get("name")
+    plant["botanist_email"] = data.get("botanist_details").get("email")
+    plant["botanist_phone_number"] = data.get(
+        "botanist_details").get("phone")
+    plant["plant_id"] = data.get("plant_id")
+    plant["scientific_name"] = data.get("scientific_name")
+    plant["plant_name"] = data.get("name")
+    plant["plant_cycle"] = data.get("cycle")
+    plant["last_watered"] = data.get("last_watered")
+    plant["plant_origin"] = data.get("origin_location")
+    plant["recording_time"] = data.get("recording_time")
+    plant["soil_moisture"] = data.get("soil_moisture")
+    plant["sun_condition"], plant["shade_condition"] = classify_sunlight(
+        data.get("sunlight_details"))
+    plant["temperature"] = data.get("temperature")
+
+    return plant
+
+
+def iter_flattened_data(loaded_plant_data: Iterable[dict]) -> Iterator[dict]:
+    """
+    Lazily flatten parsed JSON data, so records can be streamed from a file.
+
+    Args:
+        loaded_plant_data: (Iterable[dict]): An iterable of dictionaries containing the parsed JSON data.
+    Returns:
+        Iterator[dict]: Dictionaries containing the parsed JSON data without nested dictionaries.
+    """
+    for data in loaded_plant_data:
+        yield flatten_plant(data)
+
+
+def flatten_data(loaded_plant_data: Iterable[dict]) -> list[dict]:
+    """
+    Build a flattened dictionary from extracted a Python list of dictionaries containing the parsed JSON data.
+
+    Args:
+        loaded_json_data: (Iterable[dict]): A Python list of dictionaries containing the parsed JSON data.
+    Returns:
+        list[dict]: A Python list of dictionaries containing the parsed JSON data without nested dictionaries.
+    """
+    return list(iter_flattened_data(loaded_plant_data))
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """
+    Splits a stream of items into lists of at most `batch_size` items
+
+    Args:
+        items (Iterable): The items to split
+
+        batch_size (int): The most items in each list
+
+    Returns:
+        Iterator[list]: Lists of items, in the original order
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        yield batch
+
+
+class PlantTable:
+    """
+    Transformed plant data as plain rows, which the load functions accept in place
+    of a DataFrame. Missing values are None.
+    """
+
+    def __init__(self, columns: list[str], rows: list[tuple]):
+        """
+        Args:
+            columns (list[str]): The name of each column
+
+            rows (list[tuple]): One tuple of values per plant, in column order
+        """
+        self.columns = list(columns)
+        self.rows = rows
+        self._positions = {column: position for position,
+                           column in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def empty(self) -> bool:
+        """True if the table has no rows"""
+        return not self.rows
+
+    def get_column(self, column: str) -> list:
+        """
+        Returns the values of one column
+
+        Args:
+            column (str): The name of the column
+
+        Returns:
+            list: The value for each row
+        """
+        position = self._positions[column]
+        return [row[position] for row in self.rows]
+
+    def get_rows(self, columns: list[str]) -> list[list]:
+        """
+        Returns the given columns as rows
+
+        Args:
+            columns (list[str]): The columns to include, in order
+
+        Returns:
+            list[list]: One list of values per row
+        """
+        positions = [self._positions[column] for column in columns]
+        return [[row[position] for position in positions] for row in self.rows]
+
+    def take(self, row_numbers: list[int]) -> "PlantTable":
+        """
+        Returns a table with only the given rows
+
+        Args:
+            row_numbers (list[int]): The positions of the rows to keep
+
+        Returns:
+            PlantTable: A new table
+        """
+        return PlantTable(self.columns, [self.rows[number] for number in row_numbers])
+
+    def dropna(self, subset: list[str]) -> "PlantTable":
+        """
+        Returns a table without the rows missing a value in any of the given columns
+
+        Args:
+            subset (list[str]): The columns which must have a value
+
+        Returns:
+            PlantTable: A new table
+        """
+        positions = [self._positions[column] for column in subset]
+        return PlantTable(self.columns, [row for row in self.rows
+                                         if all(row[position] is not None for position in positions)])
+
+
+def is_missing(value: object) -> bool:
+    """
+    Checks for a missing value, which is None or a float NaN
+
+    Args:
+        value (object): Any value
+
+    Returns:
+        bool: True if the value is missing
+    """
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def lowercase(value: object) -> object:
+    """
+    Lowercases strings and leaves any other value as it is
+
+    Args:
+        value (object): Any value
+
+    Returns:
+        object: The lowercased string, or the value
+    """
+    return value.lower() if isinstance(value, str) else value
+
+
+def get_joined_scientific_name(scientific_name: list[str]) -> str:
+    """
+    Joins the scientific names of a plant, as `transform_scientific_name_column` does
+
+    Args:
+        scientific_name (list[str]): The scientific names from the API
+
+    Returns:
+        str: The names separated by commas, or None if they can't be joined
+    """
+    if not isinstance(scientific_name, (list, str)):
+        return None
+    try:
+        return ", ".join(scientific_name)
+    except TypeError:
+        return None
+
+
+def get_coordinate(value: object) -> float:
+    """
+    Converts a latitude or longitude to a float
+
+    Args:
+        value (object): The coordinate from the API
+
+    Returns:
+        float: The coordinate, or None if it is missing
+    """
+    return None if is_missing(value) else float(value)
+
+
+def get_valid_temperature(temperature: float) -> float:
+    """
+    Removes outlying temperatures, as `transform_temperature_column` does
+
+    Args:
+        temperature (float): The temperature reading
+
+    Returns:
+        float: The temperature, or None if it is missing or an outlier
+    """
+    if is_missing(temperature):
+        return None
+    if temperature < MIN_VALID_TEMPERATURE or temperature > MAX_VALID_TEMPERATURE:
+        return None
+    return temperature
+
+
+def transform_plant(plant: dict) -> tuple:
+    """
+    Transforms one flattened plant into a row of `PLANT_COLUMNS`
+
+    Args:
+        plant (dict): A plant from `flatten_plant`
+
+    Returns:
+        tuple: The transformed values, in `PLANT_COLUMNS` order
+    """
+    origin = plant.get("plant_origin")
+    if not isinstance(origin, dict):
+        origin = {}
+
+    values = {
+        "botanist_name": plant.get("botanist_name"),
+        "botanist_email": normalize_botanist_email(plant.get("botanist_email")),
+        "botanist_phone_number": normalize_botanist_phone_number(
+            plant.get("botanist_phone_number")),
+        "plant_id": plant.get("plant_id"),
+        "scientific_name": get_joined_scientific_name(plant.get("scientific_name")),
+        "plant_name": plant.get("plant_name"),
+        "plant_cycle": plant.get("plant_cycle"),
+        "last_watered": parse_timestamp(plant.get("last_watered"), LAST_WATERED_FORMAT),
+        "plant_origin": plant.get("plant_origin"),
+        "recording_time": parse_timestamp(plant.get("recording_time"), RECORDING_TAKEN_FORMAT),
+        "soil_moisture": plant.get("soil_moisture"),
+        "sun_condition": plant.get("sun_condition"),
+        "shade_condition": plant.get("shade_condition"),
+        "temperature": get_valid_temperature(plant.get("temperature")),
+        "plant_latitude": get_coordinate(origin.get("origin_latitude")),
+        "plant_longitude": get_coordinate(origin.get("origin_longitude")),
+        "plant_location": origin.get("origin_country")
+    }
+
+    for column in LOWERCASE_COLUMNS:
+        values[column] = lowercase(values[column])
+
+    return tuple(None if is_missing(values[column]) else values[column]
+                 for column in PLANT_COLUMNS)
+
+
+def build_plant_table(plant_data: Iterable[dict]) -> PlantTable:
+    """
+    Builds a table from flattened plant data with the same values as
+    `build_plant_dataframe`, without importing pandas
+
+    Args:
+        plant_data (Iterable[dict]): Plants from `flatten_data`
+
+    Returns:
+        PlantTable: The transformed plant data, without plants which have no name
+    """
+    rows = [transform_plant(plant) for plant in plant_data
+            if not is_missing(plant.get("plant_name"))]
+
+    return PlantTable(PLANT_COLUMNS, rows)
+
+
+def build_plant_data(plant_data: list[dict], max_light_rows: int = DEFAULT_MAX_LIGHT_ROWS):
+    """
+    Transforms flattened plant data with the engine which suits the batch: small
+    batches are built as a `PlantTable` without pandas, and larger ones as a DataFrame
+    with compact dtypes
+
+    Args:
+        plant_data (list[dict]): Plants from `flatten_data`
+
+        max_light_rows (int): The most plants transformed without pandas
+
+    Returns:
+        PlantTable | DataFrame: The transformed plant data
+    """
+    if len(plant_data) <= max_light_rows:
+        return build_plant_table(plant_data)
+
+    # pandas is only imported when a batch is big enough to need it
+    from transform import build_plant_dataframe
+    return build_plant_dataframe(plant_data, compact=True)
@@ -6,10 +6,22 @@ from dotenv import load_dotenv
 from psycopg2 import connect
 from psycopg2.extensions import connection
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+from time import time
 
-import pandas as pd
-from pandas import DataFrame
+from typing import TYPE_CHECKING, Callable
+
+from light_transform import PlantTable
+
+# pandas is only needed to type hint DataFrames, so small batches can be loaded
+# from a PlantTable without importing it
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+DEFAULT_DIMENSION_CACHE_PATH = "dimension_cache.json"
+DEFAULT_RESYNC_SECONDS = 24 * 60 * 60
 
 
 def get_db_connection(config_file: _Environ) -> connection:
@@ -35,6 +47,236 @@ def get_db_connection(config_file: _Environ) -> connection:
         raise err
 
 
+def get_rows(data: "DataFrame | PlantTable", columns: list[str]) -> list[list]:
+    """
+    Returns the given columns as rows of plain values ready to insert: timezone-aware
+    date times become naive UTC, to match the timestamp columns in the database,
+    categoricals and float32 columns become plain strings and floats, and missing
+    values become None
+
+    Args:
+        data (DataFrame | PlantTable): The transformed data for all plants
+
+        columns (list[str]): The columns to include, in order
+
+    Returns:
+        list[list]: One list of values per row
+    """
+    if isinstance(data, PlantTable):
+        rows = data.get_rows(columns)
+        for row in rows:
+            for position, value in enumerate(row):
+                if isinstance(value, datetime) and value.tzinfo is not None:
+                    row[position] = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return rows
+
+    selected = data[columns].copy()
+
+    for column in columns:
+        dtype = selected[column].dtype
+        if getattr(dtype, "tz", None) is not None:
+            selected[column] = selected[column].dt.tz_convert(
+                "UTC").dt.tz_localize(None)
+        elif dtype.kind == "f" and dtype.itemsize == 4:
+            # Written as their shortest float32 form, so 20.1 isn't stored as 20.100000381...
+            values = selected[column].to_numpy(dtype="float32", na_value=float("nan"))
+            selected[column] = values.astype(str).astype(float)
+
+    selected = selected.astype(object)
+    return selected.where(selected.notna(), None).values.tolist()
+
+
+def get_row_fingerprint(row: list) -> str:
+    """
+    Returns a fingerprint of a dimension row's values
+
+    Args:
+        row (list): The values of the row
+
+    Returns:
+        str: A hex digest which only changes when the values change
+    """
+    content = json.dumps(row, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class DimensionCache:
+    """
+    Remembers a fingerprint of each dimension row (plant origins, plants and
+    botanists) already inserted, so only new or changed dimension rows are sent to
+    the database. Every `resync_seconds` all of them are sent again, in case rows
+    were removed from the database since they were cached.
+    """
+
+    KEY_COLUMNS = {
+        "plant_origin": ["plant_latitude", "plant_longitude", "plant_location"],
+        "plant": ["plant_id"],
+        "botanist": ["botanist_name", "botanist_email", "botanist_phone_number"]
+    }
+
+    ROW_COLUMNS = {
+        "plant_origin": ["plant_latitude", "plant_longitude", "plant_location"],
+        "plant": ["plant_id", "plant_name", "scientific_name",
+                  "plant_latitude", "plant_longitude"],
+        "botanist": ["botanist_name", "botanist_email", "botanist_phone_number"]
+    }
+
+    def __init__(self, seen: dict[str, dict[tuple, str]] = None, last_resync: float = None,
+                 resync_seconds: float = DEFAULT_RESYNC_SECONDS,
+                 clock: Callable[[], float] = time):
+        """
+        Args:
+            seen (dict[str, dict[tuple, str]]): Each dimension table mapped to the
+            keys of its inserted rows and their fingerprints
+
+            last_resync (float): When every dimension row was last sent, as a unix
+            timestamp, or None if they never have been
+
+            resync_seconds (float): How often every dimension row is sent again,
+            or None to never resync
+
+            clock (Callable): Returns the current time as a unix timestamp
+        """
+        self.seen = {table: {} for table in self.KEY_COLUMNS}
+        self.seen.update(seen or {})
+        self.last_resync = last_resync
+        self.resync_seconds = resync_seconds
+        self._clock = clock
+
+    def get_fingerprints(self, table: str, data: "DataFrame | PlantTable") -> list[tuple]:
+        """
+        Returns the key and fingerprint of each row for a dimension table
+
+        Args:
+            table (str): The name of a dimension table in `KEY_COLUMNS`
+
+            data (DataFrame | PlantTable): The transformed data for all plants
+
+        Returns:
+            list[tuple]: One (key, fingerprint) pair per row
+        """
+        row_columns = self.ROW_COLUMNS[table]
+        key_positions = [row_columns.index(column)
+                         for column in self.KEY_COLUMNS[table]]
+
+        return [(tuple(row[position] for position in key_positions), get_row_fingerprint(row))
+                for row in get_rows(data, row_columns)]
+
+    def is_resync_due(self) -> bool:
+        """
+        Checks whether every dimension row should be sent on this run
+
+        Returns:
+            bool: True if there hasn't been a resync within `resync_seconds`
+        """
+        if self.last_resync is None:
+            return True
+        if self.resync_seconds is None:
+            return False
+        return self._clock() - self.last_resync >= self.resync_seconds
+
+    def mark_resynced(self) -> None:
+        """
+        Records that every dimension row has just been sent
+
+        Returns:
+            None
+        """
+        self.last_resync = self._clock()
+
+    def get_new_rows(self, table: str, data: "DataFrame | PlantTable",
+                     full_resync: bool = False) -> "DataFrame | PlantTable":
+        """
+        Returns the rows which are new or have changed since they were inserted
+
+        Args:
+            table (str): The name of a dimension table in `KEY_COLUMNS`
+
+            data (DataFrame | PlantTable): The transformed data for all plants
+
+            full_resync (bool): Return every row, whether or not it has been inserted
+
+        Returns:
+            DataFrame | PlantTable: The new or changed rows, without duplicate keys
+        """
+        seen = self.seen[table]
+        new_keys = set()
+        row_numbers = []
+
+        for row_number, (key, fingerprint) in enumerate(self.get_fingerprints(table, data)):
+            if key in new_keys:
+                continue
+            if full_resync or seen.get(key) != fingerprint:
+                new_keys.add(key)
+                row_numbers.append(row_number)
+
+        if isinstance(data, PlantTable):
+            return data.take(row_numbers)
+        return data.iloc[row_numbers]
+
+    def mark_seen(self, table: str, data: "DataFrame | PlantTable") -> None:
+        """
+        Records the rows of a dimension table as inserted
+
+        Args:
+            table (str): The name of a dimension table in `KEY_COLUMNS`
+
+            data (DataFrame | PlantTable): The rows which were inserted
+
+        Returns:
+            None
+        """
+        self.seen[table].update(self.get_fingerprints(table, data))
+
+
+def load_dimension_cache(file_path: str,
+                         resync_seconds: float = DEFAULT_RESYNC_SECONDS) -> DimensionCache:
+    """
+    Loads a dimension cache from a .json file, or starts a new one if there isn't one
+
+    Args:
+        file_path (str): A string containing the path to the cache file
+
+        resync_seconds (float): How often every dimension row is sent again
+
+    Returns:
+        DimensionCache: The stored cache, or an empty cache
+    """
+    try:
+        with open(file_path, "r") as cache_file:
+            data = json.load(cache_file)
+    except FileNotFoundError:
+        return DimensionCache(resync_seconds=resync_seconds)
+    except json.JSONDecodeError as e:
+        print(f"Error loading dimension cache, starting a new one: {e}")
+        return DimensionCache(resync_seconds=resync_seconds)
+
+    seen = {table: {tuple(key): fingerprint for key, fingerprint in rows}
+            for table, rows in data["seen"].items()}
+
+    return DimensionCache(seen, data["last_resync"], resync_seconds)
+
+
+def save_dimension_cache(cache: DimensionCache, file_path: str) -> None:
+    """
+    Saves a dimension cache to a .json file
+
+    Args:
+        cache (DimensionCache): The cache to save
+
+        file_path (str): A string containing the path to the cache file
+
+    Returns:
+        None
+    """
+    with open(file_path, "w") as cache_file:
+        json.dump({
+            "last_resync": cache.last_resync,
+            "seen": {table: [[list(key), fingerprint] for key, fingerprint in rows.items()]
+                     for table, rows in cache.seen.items()}
+        }, cache_file)
+
+
 def switch_to_long_term_schema(conn: connection) -> None:
     """
     Switches active schema to 
@@ -47,21 +289,21 @@ def switch_to_long_term_schema(conn: connection) -> None:
     conn.commit()
 
 
-def insert_into_plant_origin_table(conn: connection, data: DataFrame) -> None:
+def insert_into_plant_origin_table(conn: connection, data: "DataFrame | PlantTable") -> None:
     """
     Inserts information into plant_origin table
 
     Args:
         conn (connection): A connection to a Postgres database
 
-        data (DataFrame): A DataFrame containing transformed data for all plants
+        data (DataFrame | PlantTable): The transformed data for all plants
 
     Returns:
         None
     """
 
-    origin_info = data[['plant_latitude', 'plant_longitude',
-                        'plant_location']].values.tolist()
+    origin_info = get_rows(data, ['plant_latitude', 'plant_longitude',
+                                  'plant_location'])
 
     with conn.cursor() as cur:
 
@@ -75,21 +317,21 @@ def insert_into_plant_origin_table(conn: connection, data: DataFrame) -> None:
     conn.commit()
 
 
-def insert_into_plant_table(conn: connection, data: DataFrame) -> None:
+def insert_into_plant_table(conn: connection, data: "DataFrame | PlantTable") -> None:
     """
     Inserts information into plant table
 
     Args:
         conn (connection): A connection to a Postgres database
 
-        data (DataFrame): A DataFrame containing transformed data for all plants
+        data (DataFrame | PlantTable): The transformed data for all plants
 
     Returns:
         None
     """
 
-    plant_info = data[['plant_id', 'plant_name', 'scientific_name',
-                       'plant_latitude', 'plant_longitude']].values.tolist()
+    plant_info = get_rows(data, ['plant_id', 'plant_name', 'scientific_name',
+                                 'plant_latitude', 'plant_longitude'])
 
     with conn.cursor() as cur:
 
@@ -108,21 +350,21 @@ def insert_into_plant_table(conn: connection, data: DataFrame) -> None:
     conn.commit()
 
 
-def insert_into_botanist_table(conn: connection, data: DataFrame) -> None:
+def insert_into_botanist_table(conn: connection, data: "DataFrame | PlantTable") -> None:
     """
     Inserts information into botanist table
 
     Args:
         conn (connection): A connection to a Postgres database
 
-        data (DataFrame): A DataFrame containing transformed data for all plants
+        data (DataFrame | PlantTable): The transformed data for all plants
 
     Returns:
         None
     """
 
-    botanist_info = data[['botanist_name', 'botanist_email',
-                          'botanist_phone_number']].values.tolist()
+    botanist_info = get_rows(data, ['botanist_name', 'botanist_email',
+                                    'botanist_phone_number'])
 
     with conn.cursor() as cur:
 
@@ -136,20 +378,20 @@ def insert_into_botanist_table(conn: connection, data: DataFrame) -> None:
     conn.commit()
 
 
-def insert_into_water_history_table(conn: connection, data: DataFrame) -> None:
+def insert_into_water_history_table(conn: connection, data: "DataFrame | PlantTable") -> None:
     """
     Inserts information into water_history table
 
     Args:
         conn (connection): A connection to a Postgres database
 
-        data (DataFrame): A DataFrame containing transformed data for all plants
+        data (DataFrame | PlantTable): The transformed data for all plants
 
     Returns:
         None
     """
 
-    watering_info = data[['last_watered', 'plant_id']].values.tolist()
+    watering_info = get_rows(data, ['last_watered', 'plant_id'])
 
     with conn.cursor() as cur:
 
@@ -163,22 +405,22 @@ def insert_into_water_history_table(conn: connection, data: DataFrame) -> None:
     conn.commit()
 
 
-def insert_into_reading_information_table(conn: connection, data: DataFrame) -> None:
+def insert_into_reading_information_table(conn: connection, data: "DataFrame | PlantTable") -> None:
     """
     Inserts information into reading_information table
 
     Args:
         conn (connection): A connection to a Postgres database
 
-        data (DataFrame): A DataFrame containing transformed data for all plants
+        data (DataFrame | PlantTable): The transformed data for all plants
 
     Returns:
         None
     """
 
-    reading_info = data[['plant_id', 'recording_time', 'botanist_name',
-                         'temperature', 'soil_moisture', 'sun_condition',
-                         'shade_condition']].values.tolist()
+    reading_info = get_rows(data, ['plant_id', 'recording_time', 'botanist_name',
+                                   'temperature', 'soil_moisture', 'sun_condition',
+                                   'shade_condition'])
 
     with conn.cursor() as cur:
 
@@ -198,6 +440,91 @@ def insert_into_reading_information_table(conn: connection, data: DataFrame) ->
     conn.commit()
 
 
+def insert_into_quarantine_table(conn: connection, records: list[dict]) -> int:
+    """
+    Inserts rows which failed a data-quality rule into the quarantine table, each
+    with the codes of the rules it failed and the whole row as JSON
+
+    Args:
+        conn (connection): A connection to a Postgres database
+
+        records (list[dict]): The rejected rows, from `quality.get_quarantine_records`
+
+    Returns:
+        int: The number of rows inserted
+    """
+    quarantine_info = []
+
+    for record in records:
+        recording_time = record.get("recording_time")
+        if isinstance(recording_time, datetime) and recording_time.tzinfo is not None:
+            recording_time = recording_time.astimezone(timezone.utc).replace(tzinfo=None)
+        reading = {column: value for column, value in record.items() if column != "reasons"}
+        quarantine_info.append([record.get("plant_id"), recording_time, record["reasons"],
+                                json.dumps(reading, default=str)])
+
+    if not quarantine_info:
+        return 0
+
+    with conn.cursor() as cur:
+
+        cur.executemany("""INSERT INTO quarantined_reading
+                    (plant_id, plant_reading_time, reasons, reading)
+                    VALUES
+                    (%s, %s, %s, %s);
+                    """, quarantine_info)
+
+    conn.commit()
+
+    return len(quarantine_info)
+
+
+def load_plant_data(conn: connection, data: "DataFrame | PlantTable",
+                    dimension_cache: DimensionCache = None) -> int:
+    """
+    Inserts transformed plant data into every table, skipping dimension rows
+    which `dimension_cache` has already inserted unless they have changed or a
+    full resync is due
+
+    Args:
+        conn (connection): A connection to a Postgres database
+
+        data (DataFrame | PlantTable): The transformed data for all plants
+
+        dimension_cache (DimensionCache): The dimension rows already inserted, or None
+        to insert every row
+
+    Returns:
+        int: The number of dimension rows sent to the database
+    """
+    if dimension_cache is None:
+        dimension_cache = DimensionCache()
+
+    dimension_inserts = [
+        ("plant_origin", insert_into_plant_origin_table),
+        ("plant", insert_into_plant_table),
+        ("botanist", insert_into_botanist_table)
+    ]
+
+    full_resync = dimension_cache.is_resync_due()
+    dimension_rows = 0
+
+    for table, insert_into_table in dimension_inserts:
+        new_rows = dimension_cache.get_new_rows(table, data, full_resync)
+        if not new_rows.empty:
+            insert_into_table(conn, new_rows)
+            dimension_cache.mark_seen(table, new_rows)
+            dimension_rows += len(new_rows)
+
+    if full_resync:
+        dimension_cache.mark_resynced()
+
+    insert_into_water_history_table(conn, data)
+    insert_into_reading_information_table(conn, data)
+
+    return dimension_rows
+
+
 def delete_old_rows(conn: connection):
     """Deletes rows if the timestamp is more than 24hrs prior"""
 
@@ -220,6 +547,8 @@ if __name__ == "__main__":
 
     conn = get_db_connection(config)
 
+    import pandas as pd
+
     data = pd.read_csv('transformed_plant_data.csv')
 
     insert_into_plant_origin_table(conn, data)
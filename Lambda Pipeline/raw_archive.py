@@ -0,0 +1,276 @@
+"""Pipeline Script: Keeps every raw API response in compressed, append-only segment files"""
+
+import gzip
+import json
+from os import makedirs, listdir
+from os.path import exists, getsize, join
+from threading import Lock
+from time import time
+from typing import Callable, Iterator
+
+DEFAULT_ARCHIVE_DIR = "raw_archive"
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_SECONDS = 60 * 60
+DEFAULT_BATCH_SIZE = 100
+SEGMENT_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".idx"
+
+
+def get_index_path(segment_path: str) -> str:
+    """
+    Returns the path of the index file kept beside a segment
+
+    Args:
+        segment_path (str): A string containing the path to a segment file
+
+    Returns:
+        str: The path to the segment's index file
+    """
+    return segment_path + INDEX_SUFFIX
+
+
+class RawArchive:
+    """
+    Appends raw API responses to gzip segment files as NDJSON. Responses are buffered
+    and written as one gzip member per batch, so writing never rewrites earlier data,
+    and a crash loses at most the unflushed batch. A segment is closed and a new one
+    started once it reaches `max_segment_bytes` or `max_segment_seconds`.
+
+    Each segment has an NDJSON index beside it with one entry per response:
+    its plant_id and recording_taken, and the offset, length and line of the gzip
+    member holding it, so one response can be read back without decompressing the
+    whole segment.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ARCHIVE_DIR,
+                 max_segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 max_segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 clock: Callable[[], float] = time):
+        """
+        Args:
+            directory (str): The directory the segments are written to
+
+            max_segment_bytes (int): A segment is rotated once it is at least this large
+
+            max_segment_seconds (float): A segment is rotated once it is this old
+
+            batch_size (int): The number of responses buffered before a member is written
+
+            clock (Callable): Returns the current time as a unix timestamp
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.batch_size = batch_size
+        self._clock = clock
+        self._buffer = []
+        self._segment_path = None
+        self._segment_started = None
+        self._segment_number = 0
+        self._lock = Lock()
+
+        makedirs(directory, exist_ok=True)
+
+    @property
+    def segment_path(self) -> str:
+        """The path of the segment currently being written to, or None"""
+        return self._segment_path
+
+    def _needs_rotation(self) -> bool:
+        if self._segment_path is None:
+            return True
+        if self._clock() - self._segment_started >= self.max_segment_seconds:
+            return True
+        return exists(self._segment_path) and getsize(self._segment_path) >= self.max_segment_bytes
+
+    def _start_segment(self) -> None:
+        self._segment_started = self._clock()
+        while True:
+            self._segment_number += 1
+            name = f"raw-{int(self._segment_started)}-{self._segment_number:04d}{SEGMENT_SUFFIX}"
+            path = join(self.directory, name)
+            if not exists(path):
+                break
+        self._segment_path = path
+
+    def append(self, raw_plant_data: dict) -> None:
+        """
+        Adds one raw API response to the archive, writing the batch once it is full
+
+        Args:
+            raw_plant_data (dict): Raw JSON response data from the API
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._buffer.append(raw_plant_data)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def flush(self) -> None:
+        """
+        Writes any buffered responses to the current segment
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+
+        if self._needs_rotation():
+            self._start_segment()
+
+        lines = [json.dumps(raw_plant_data, separators=(",", ":"))
+                 for raw_plant_data in self._buffer]
+        member = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+
+        with open(self._segment_path, "ab") as segment_file:
+            offset = segment_file.tell()
+            segment_file.write(member)
+
+        with open(get_index_path(self._segment_path), "a") as index_file:
+            for line, raw_plant_data in enumerate(self._buffer):
+                index_file.write(json.dumps({
+                    "plant_id": raw_plant_data.get("plant_id"),
+                    "recording_taken": raw_plant_data.get("recording_taken"),
+                    "offset": offset,
+                    "length": len(member),
+                    "line": line
+                }) + "\n")
+
+        self._buffer = []
+
+    def close(self) -> None:
+        """
+        Writes any buffered responses, and starts a new segment on the next write
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._flush()
+            self._segment_path = None
+
+
+def get_segment_paths(directory: str) -> list[str]:
+    """
+    Returns the segment files in an archive directory, oldest first
+
+    Args:
+        directory (str): The directory the segments were written to
+
+    Returns:
+        list[str]: The paths of the segment files
+    """
+    if not exists(directory):
+        return []
+
+    return [join(directory, name) for name in sorted(listdir(directory))
+            if name.endswith(SEGMENT_SUFFIX)]
+
+
+def iter_segment(segment_path: str) -> Iterator[dict]:
+    """
+    Streams every raw response in a segment, in the order they were archived
+
+    Args:
+        segment_path (str): A string containing the path to a segment file
+
+    Returns:
+        Iterator[dict]: Raw JSON response data from the API
+    """
+    with gzip.open(segment_path, "rt", encoding="utf-8") as segment_file:
+        for line in segment_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_archive(directory: str = DEFAULT_ARCHIVE_DIR) -> Iterator[dict]:
+    """
+    Streams every raw response in an archive, oldest segment first
+
+    Args:
+        directory (str): The directory the segments were written to
+
+    Returns:
+        Iterator[dict]: Raw JSON response data from the API
+    """
+    for segment_path in get_segment_paths(directory):
+        yield from iter_segment(segment_path)
+
+
+def iter_segment_index(segment_path: str) -> Iterator[dict]:
+    """
+    Streams the index entries of a segment
+
+    Args:
+        segment_path (str): A string containing the path to a segment file
+
+    Returns:
+        Iterator[dict]: One entry per archived response
+    """
+    index_path = get_index_path(segment_path)
+    if not exists(index_path):
+        return
+
+    with open(index_path, "r") as index_file:
+        for line in index_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_record(segment_path: str, entry: dict) -> dict:
+    """
+    Reads one archived response using its index entry, only decompressing the
+    gzip member which holds it
+
+    Args:
+        segment_path (str): A string containing the path to a segment file
+
+        entry (dict): The response's entry from the segment index
+
+    Returns:
+        dict: The raw JSON response data from the API
+    """
+    with open(segment_path, "rb") as segment_file:
+        segment_file.seek(entry["offset"])
+        member = segment_file.read(entry["length"])
+
+    lines = gzip.decompress(member).decode("utf-8").splitlines()
+    return json.loads(lines[entry["line"]])
+
+
+def find_records(directory: str, plant_id: int, recording_taken: str = None) -> list[dict]:
+    """
+    Finds the archived responses for a plant using the segment indexes
+
+    Args:
+        directory (str): The directory the segments were written to
+
+        plant_id (int): The id of the plant
+
+        recording_taken (str): Only return the reading taken at this time, or None for all
+
+    Returns:
+        list[dict]: The matching raw responses, oldest first
+    """
+    records = []
+
+    for segment_path in get_segment_paths(directory):
+        for entry in iter_segment_index(segment_path):
+            if entry["plant_id"] != plant_id:
+                continue
+            if recording_taken is not None and entry["recording_taken"] != recording_taken:
+                continue
+            records.append(read_record(segment_path, entry))
+
+    return records
@@ -0,0 +1,85 @@
+"""Pipeline Script: Splits the plant id space into shards which can be run in parallel"""
+
+from os.path import splitext
+from typing import NamedTuple
+
+
+class Shard(NamedTuple):
+    """
+    One slice of the plant id space. A plant belongs to shard `index` of `count`
+    when `plant_id % count == index`, so every plant id, including ones discovered
+    later, belongs to exactly one shard.
+    """
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, plant_id: int) -> bool:
+        """
+        Checks whether a plant id belongs to this shard
+
+        Args:
+            plant_id (int): The id of a plant
+
+        Returns:
+            bool: True if this shard should process the plant
+        """
+        return plant_id % self.count == self.index
+
+    def get_path(self, file_path: str) -> str:
+        """
+        Returns a per-shard version of a state file path, so shards running at the
+        same time never write to the same file
+
+        Args:
+            file_path (str): A string containing the path shared by all shards
+
+        Returns:
+            str: The path with the shard added before the extension
+        """
+        root, extension = splitext(file_path)
+        return f"{root}.shard-{self.index}-of-{self.count}{extension}"
+
+
+def parse_shard_spec(spec: str) -> Shard:
+    """
+    Parses a shard spec such as "3/8", meaning shard 3 of 8 counting from 0
+
+    Args:
+        spec (str): The shard spec, or None/empty for no sharding
+
+    Returns:
+        Shard: The parsed shard, or None when `spec` is empty
+    """
+    if not spec:
+        return None
+
+    try:
+        index, count = (int(part) for part in str(spec).split("/"))
+    except ValueError as err:
+        raise ValueError(
+            f"Invalid shard spec {spec!r}, expected <index>/<count>") from err
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(
+            f"Invalid shard spec {spec!r}, index must be between 0 and count - 1")
+
+    return Shard(index, count)
+
+
+def get_all_shards(count: int) -> list[Shard]:
+    """
+    Returns every shard for a given number of shards
+
+    Args:
+        count (int): The number of shards
+
+    Returns:
+        list[Shard]: The shards 0/count to count-1/count
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    return [Shard(index, count) for index in range(count)]
@@ -0,0 +1,83 @@
+"""Pipeline Script: Classifies a plant's sunlight details into sun and shade conditions"""
+
+from functools import lru_cache
+
+from cache_stats import get_cache_stats
+
+NO_INFORMATION = "No Information"
+SUNLIGHT_CACHE_SIZE = 256
+
+
+def pick_condition(conditions: list[str]) -> str:
+    """
+    Picks the condition to report from every matching condition: the only one, or
+    the first one if they are all the same ignoring case
+
+    Args:
+        conditions (list[str]): The matching conditions, in the order they were found
+
+    Returns:
+        str: The condition, or "No Information" if there are none or they disagree
+    """
+    if not conditions:
+        return NO_INFORMATION
+
+    first_condition = conditions[0].lower()
+    if all(condition.lower() == first_condition for condition in conditions):
+        return conditions[0]
+
+    return NO_INFORMATION
+
+
+@lru_cache(maxsize=SUNLIGHT_CACHE_SIZE)
+def classify_sunlight_details(sunlight: tuple[str, ...]) -> tuple[str, str]:
+    """
+    Works out the sun and shade conditions in one pass over the sunlight details.
+    Results are cached, as only a handful of distinct sunlight lists exist.
+
+    Args:
+        sunlight (tuple[str, ...]): The sunlight details of a plant, such as
+        ("full sun", "part sun/part shade")
+
+    Returns:
+        tuple[str, str]: The sun condition and the shade condition
+    """
+    sun_conditions = []
+    shade_conditions = []
+
+    for condition in sunlight:
+        for part in condition.split("/"):
+            lowered = part.lower()
+            if "sun" in lowered:
+                sun_conditions.append(part)
+            if "shade" in lowered:
+                shade_conditions.append(part)
+
+    return pick_condition(sun_conditions), pick_condition(shade_conditions)
+
+
+def classify_sunlight(sunlight: list[str]) -> tuple[str, str]:
+    """
+    Works out the sun and shade conditions for a plant's sunlight details
+
+    Args:
+        sunlight (list[str]): The sunlight details from the API
+
+    Returns:
+        tuple[str, str]: The sun condition and the shade condition, which are
+        "No Information" when the details are missing or conflicting
+    """
+    if not isinstance(sunlight, list):
+        return NO_INFORMATION, NO_INFORMATION
+
+    return classify_sunlight_details(tuple(sunlight))
+
+
+def get_sunlight_cache_info() -> dict:
+    """
+    Returns how well the sunlight classification cache is working
+
+    Returns:
+        dict: The number of hits, misses and cached sunlight lists, and the hit rate
+    """
+    return get_cache_stats(classify_sunlight_details)
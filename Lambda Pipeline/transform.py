@@ -1,11 +1,41 @@
 """Pipeline Script: Transforming pipeline data"""
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import json
+from os import cpu_count
+from typing import Callable, Iterable, Iterator
 import pandas as pd
-from pandas import DataFrame
+from pandas import DataFrame, Series
 import numpy as np
-import re
+
+from botanist_contacts import normalize_botanist_email, normalize_botanist_phone_number
+from sunlight import classify_sunlight
+from light_transform import (
+    flatten_plant,
+    iter_flattened_data,
+    flatten_data,
+    iter_batches,
+    get_valid_temperature,
+    MIN_VALID_TEMPERATURE,
+    MAX_VALID_TEMPERATURE,
+    LOWERCASE_COLUMNS
+)
+from timestamps import (
+    TimestampCache,
+    parse_timestamp,
+    TIMESTAMP_CACHE,
+    MISSING,
+    LAST_WATERED_FORMAT,
+    RECORDING_TAKEN_FORMAT
+)
+
+# Text columns with only a few distinct values, stored as categoricals in compact mode
+CATEGORY_COLUMNS = ["sun_condition", "shade_condition", "botanist_name",
+                    "botanist_email", "botanist_phone_number", "plant_cycle", "plant_location"]
+SENSOR_COLUMNS = ["soil_moisture", "temperature"]
+DEFAULT_CHUNK_SIZE = 5000
 
 
 def load_data(json_path: str) -> list[dict]:
@@ -26,6 +56,27 @@ def load_data(json_path: str) -> list[dict]:
         return None
 
 
+def load_ndjson_data(ndjson_path: str) -> Iterator[dict]:
+    """
+    Lazily load records from a newline-delimited JSON file, one line at a time.
+    Blank lines are ignored and malformed lines, such as a line cut short by an
+    interrupted write, are reported and skipped.
+
+    Args:
+        ndjson_path (str): A path to a newline-delimited JSON file.
+    Returns:
+        Iterator[dict]: The parsed record from each line of the file.
+    """
+    with open(ndjson_path, 'r') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Error loading line {line_number} of {ndjson_path}: {e}")
+
+
 def check_duplicates(data: list[str]) -> bool:
     """
     Check through elements within a list and returns a bool to indicate
@@ -52,22 +103,7 @@ def get_conditions_sun(condition_list: list[str]) -> str:
     Returns:
         str: A string relating to the state of the sun
     """
-    if not isinstance(condition_list, list):
-        return "No Information"
-
-    sun_conditions = []
-
-    for condition in condition_list:
-        nested_conditions = [
-            c for c in condition.split("/") if 'sun' in c.lower()]
-        sun_conditions.extend(nested_conditions)
-
-    if sun_conditions:
-        if len(sun_conditions) == 1:
-            return sun_conditions[0]
-        if check_duplicates(sun_conditions):
-            return sun_conditions[0]
-    return "No Information"
+    return classify_sunlight(condition_list)[0]
 
 
 def get_conditions_shade(condition_list: list[str]) -> str:
@@ -81,63 +117,89 @@ def get_conditions_shade(condition_list: list[str]) -> str:
     Returns:
         str: A string relating to the state of the shade
     """
-    if not isinstance(condition_list, list):
-        return "No Information"
+    return classify_sunlight(condition_list)[1]
+
+
+def get_text_accessor(column: Series, operation: Callable[[Series], Series]) -> Series:
+    """
+    Applies a pandas `.str` operation to a column, leaving columns which hold no
+    strings or lists (such as a column which is entirely missing) unchanged. The
+    result's dtype is inferred from its values, as `DataFrame.apply` would.
+
+    Args:
+        column (Series): A column of a pandas DataFrame
+
+        operation (Callable): Takes the column and returns it transformed using `.str`
+
+    Returns:
+        Series: The transformed column
+    """
+    try:
+        return operation(column).infer_objects()
+    except AttributeError:
+        return column
+
+
+def parse_datetime_column(column: Series, date_format: str,
+                          cache: TimestampCache = TIMESTAMP_CACHE) -> Series:
+    """
+    Converts a column of date strings to timezone-aware UTC datetimes. Each distinct
+    string is only parsed once: strings in `cache` are reused and the rest are parsed
+    together with `pd.to_datetime`, then added to the cache.
+
+    Args:
+        column (Series): A column of date strings
 
-    shade_conditions = []
+        date_format (str): The strptime format of the strings
+
+        cache (TimestampCache): Parsed strings kept between batches
+
+    Returns:
+        Series: A column of UTC datetimes, with NaT for values which don't match the format
+    """
+    codes, uniques = pd.factorize(column.astype(object))
+    texts = [text if isinstance(text, str) else None for text in uniques]
+    parsed = cache.get_many(date_format, texts)
 
-    for condition in condition_list:
-        nested_conditions = [s for s in condition.split(
-            "/") if 'shade' in s.lower()]
-        shade_conditions.extend(nested_conditions)
+    missing = [position for position, value in enumerate(parsed) if value is MISSING]
+    if missing:
+        missing_texts = [texts[position] for position in missing]
+        new_values = pd.to_datetime(pd.Series(missing_texts, dtype=object), format=date_format,
+                                    utc=True, errors="coerce").astype(object)
+        new_values = new_values.where(new_values.notna(), None).tolist()
+        cache.put_many(date_format, missing_texts, new_values)
+        for position, value in zip(missing, new_values):
+            parsed[position] = value
 
-    if shade_conditions:
-        if len(shade_conditions) == 1:
-            return shade_conditions[0]
-        if check_duplicates(shade_conditions):
-            return shade_conditions[0]
-    return "No Information"
+    values = pd.DatetimeIndex(parsed, dtype="datetime64[us, UTC]")
+    return pd.Series(values.take(codes, allow_fill=True, fill_value=pd.NaT),
+                     index=column.index, name=column.name)
 
 
-def flatten_data(loaded_plant_data: list[dict]) -> list[dict]:
+def map_distinct_values(column: Series, function: Callable[[object], object]) -> Series:
     """
-    Build a flattened dictionary from extracted a Python list of dictionaries containing the parsed JSON data.
+    Applies a function once to each distinct value of a column, rather than to every row
 
     Args:
-        loaded_json_data: (list[dict]): A Python list of dictionaries containing the parsed JSON data.
+        column (Series): A column of a pandas DataFrame
+
+        function (Callable): Takes one value and returns the transformed value
+
     Returns:
-        list[dict]: A Python list of dictionaries containing the parsed JSON data without nested dictionaries.
-    """
-    flattened_data = []
-
-    for data in loaded_plant_data:
-        plant = {}
-        plant["botanist_name"] = data.get("botanist_details").get("name")
-        plant["botanist_email"] = data.get("botanist_details").get("email")
-        plant["botanist_phone_number"] = data.get(
-            "botanist_details").get("phone")
-        plant["plant_id"] = data.get("plant_id")
-        plant["scientific_name"] = data.get("scientific_name")
-        plant["plant_name"] = data.get("name")
-        plant["plant_cycle"] = data.get("cycle")
-        plant["last_watered"] = data.get("last_watered")
-        plant["plant_origin"] = data.get("origin_location")
-        plant["recording_time"] = data.get("recording_time")
-        plant["soil_moisture"] = data.get("soil_moisture")
-        plant["sun_condition"] = get_conditions_sun(
-            data.get("sunlight_details"))
-        plant["shade_condition"] = get_conditions_shade(
-            data.get("sunlight_details"))
-        plant["temperature"] = data.get("temperature")
-
-        flattened_data.append(plant)
-
-    return flattened_data
+        Series: The transformed column, with missing values passed to `function` as None
+    """
+    codes, uniques = pd.factorize(column.astype(object))
+    values = [function(value) for value in uniques] + [function(None)]
+
+    # Missing values have the code -1, which takes the last value
+    return pd.Series(np.array(values, dtype=object)[codes], index=column.index,
+                     name=column.name).infer_objects()
 
 
 def transform_email_column_using_regex(df: DataFrame) -> DataFrame:
     """
     Extract email from affiliation column and add to existing 'botanist_email' column.
+    Each raw string is only extracted once, using `normalize_botanist_email`.
 
     Args: 
         df (DataFrame): A pandas DataFrame containing all plant data
@@ -146,9 +208,8 @@ def transform_email_column_using_regex(df: DataFrame) -> DataFrame:
         DataFrame: A pandas DataFrame containing all plant data
     """
 
-    email_pattern = r"([\w.-]+@[\w.-]+)"
-    df["botanist_email"] = df["botanist_email"].str.extract(
-        email_pattern)
+    df["botanist_email"] = map_distinct_values(
+        df["botanist_email"], normalize_botanist_email)
 
     return df
 
@@ -176,6 +237,7 @@ def normalize_phone_number(phone_number: str) -> str:
 def transform_phone_column_using_regex(df: DataFrame) -> DataFrame:
     """
     Extract phone number from "botanist_phone_number" column and add to existing column.
+    Each raw string is only extracted once, using `normalize_botanist_phone_number`.
 
     Args: 
         df (DataFrame): A pandas DataFrame containing all plant data
@@ -183,11 +245,8 @@ def transform_phone_column_using_regex(df: DataFrame) -> DataFrame:
         DataFrame: A pandas DataFrame containing all plant data
     """
 
-    number_pattern = r"([(]?\d{3}[.-]?[)]?[(]?\d{3}[.-]?[)]?[(]?\d{4}[.-]?[)]?)"
-    df["botanist_phone_number"] = df["botanist_phone_number"].str.extract(
-        number_pattern)
-    df["botanist_phone_number"] = df.apply(
-        lambda row: normalize_phone_number(row["botanist_phone_number"]), axis=1)
+    df["botanist_phone_number"] = map_distinct_values(
+        df["botanist_phone_number"], normalize_botanist_phone_number)
     return df
 
 
@@ -219,32 +278,27 @@ def transform_scientific_name_column(df: DataFrame) -> DataFrame:
     Returns:
         DataFrame: A pandas DataFrame containing all plant data
     """
-    df["scientific_name"] = df.apply(
-        lambda row: get_scientific_name(row["scientific_name"]), axis=1)
+    df["scientific_name"] = get_text_accessor(
+        df["scientific_name"], lambda names: names.str.join(", "))
     return df
 
 
-def get_last_watered_date_time(datetime_string: str) -> datetime | str:
+def get_last_watered_date_time(datetime_string: str) -> datetime:
     """
     Convert date string from "last_watered" column to a datetime object
 
     Args: 
         datetime_string (str): A string containing date time information
     Returns:
-        datetime: A date time object
+        datetime: A timezone-aware UTC date time object, or None if the string is invalid
     """
-    try:
-        date_object = datetime.strptime(
-            datetime_string, "%a, %d %b %Y %H:%M:%S %Z")
-        return date_object
-    except:
-        return None
+    return parse_timestamp(datetime_string, LAST_WATERED_FORMAT)
 
 
 def transform_last_watered_column(df: DataFrame) -> DataFrame:
     """
     Extract date string from "last_watered" column and add to existing column
-    in date time corrected format.
+    as timezone-aware UTC date times.
 
     Args: 
         df (DataFrame): A pandas DataFrame containing all plant data
@@ -252,8 +306,8 @@ def transform_last_watered_column(df: DataFrame) -> DataFrame:
         DataFrame: A pandas DataFrame containing all plant data
     """
 
-    df["last_watered"] = df.apply(
-        lambda row: get_last_watered_date_time(row["last_watered"]), axis=1)
+    df["last_watered"] = parse_datetime_column(
+        df["last_watered"], LAST_WATERED_FORMAT)
 
     return df
 
@@ -265,19 +319,16 @@ def get_recording_taken_date_time(datetime_string: str) -> datetime:
     Args: 
         datetime_string (str): A string containing date time information
     Returns:
-        datetime: A date time object relating to when the recording was taken
+        datetime: A timezone-aware UTC date time object relating to when the recording
+        was taken, or None if the string is invalid
     """
-    try:
-        date_object = datetime.strptime(datetime_string, "%Y-%m-%d %H:%M:%S")
-        return date_object
-    except:
-        return None
+    return parse_timestamp(datetime_string, RECORDING_TAKEN_FORMAT)
 
 
 def transform_recording_taken_column(df: DataFrame) -> DataFrame:
     """
     Extract date string from "recording_taken" column and add to existing column
-    in date time corrected format.
+    as timezone-aware UTC date times.
 
     Args: 
         df (DataFrame): A pandas DataFrame containing all plant data
@@ -285,8 +336,8 @@ def transform_recording_taken_column(df: DataFrame) -> DataFrame:
         DataFrame: A pandas DataFrame containing all plant data
     """
 
-    df["recording_time"] = df.apply(
-        lambda row: get_recording_taken_date_time(row["recording_time"]), axis=1)
+    df["recording_time"] = parse_datetime_column(
+        df["recording_time"], RECORDING_TAKEN_FORMAT)
     return df
 
 
@@ -350,7 +401,8 @@ def get_location(origin_string: list[str]) -> str:
 def build_location_columns(df: DataFrame) -> DataFrame:
     """
     Extract locational information from "plant_origin" column and built three columns
-    for: plant_latitude, plant_longitude, plant_location.
+    for: plant_latitude, plant_longitude, plant_location. Data built by columnar.py
+    already has the three columns and no "plant_origin" column.
 
     Args: 
         df (DataFrame): A pandas DataFrame containing all plant data
@@ -358,12 +410,14 @@ def build_location_columns(df: DataFrame) -> DataFrame:
         DataFrame: A pandas DataFrame containing all plant data
     """
 
-    df["plant_latitude"] = df.apply(
-        lambda row: get_latitude(row["plant_origin"]), axis=1)
-    df["plant_longitude"] = df.apply(
-        lambda row: get_longitude(row["plant_origin"]), axis=1)
-    df["plant_location"] = df.apply(
-        lambda row: get_location(row["plant_origin"]), axis=1)
+    if "plant_origin" in df.columns:
+        plant_origin = df["plant_origin"].astype(object)
+        df["plant_latitude"] = get_text_accessor(
+            plant_origin, lambda origin: origin.str.get("origin_latitude"))
+        df["plant_longitude"] = get_text_accessor(
+            plant_origin, lambda origin: origin.str.get("origin_longitude"))
+        df["plant_location"] = get_text_accessor(
+            plant_origin, lambda origin: origin.str.get("origin_country"))
 
     df["plant_latitude"] = df["plant_latitude"].astype(float)
     df["plant_longitude"] = df["plant_longitude"].astype(float)
@@ -371,32 +425,19 @@ def build_location_columns(df: DataFrame) -> DataFrame:
     return df
 
 
-def get_valid_temperature(temperature_data: float) -> float:
-    """
-    Return temperature value if it meets the following criteria: -40 < temperature_data < 75
-    Else return None
-
-    Args:
-        temperature_data (float): A float value representing temperature in the data
-
-    Returns: float | str: A float value representing the temperature else return None for outliers
-    """
-    if temperature_data < -40 or temperature_data > 75:
-        return None
-    return temperature_data
-
-
 def transform_temperature_column(df: DataFrame) -> DataFrame:
     """
-    Remove outliers from "temperature" data.
+    Remove outliers from "temperature" data, using the bounds `get_valid_temperature`
+    applies to one reading.
 
     Args: 
         df (DataFrame): A pandas DataFrame containing all plant data
     Returns:
         DataFrame: A pandas DataFrame containing all plant data
     """
-    df["temperature"] = df.apply(
-        lambda row: get_valid_temperature(row["temperature"]), axis=1)
+    temperature = df["temperature"]
+    df["temperature"] = temperature.mask(
+        (temperature < MIN_VALID_TEMPERATURE) | (temperature > MAX_VALID_TEMPERATURE))
     return df
 
 
@@ -426,29 +467,46 @@ def normalize_column_text(df: DataFrame) -> DataFrame:
     Returns:
         DataFrame: A pandas DataFrame containing all plant data
     """
-    df["botanist_name"] = df["botanist_name"].apply(
-        lambda x: x.lower() if type(x) == str else x)
-    df["plant_name"] = df["plant_name"].apply(
-        lambda x: x.lower() if type(x) == str else x)
-    df["plant_cycle"] = df["plant_cycle"].apply(
-        lambda x: x.lower() if type(x) == str else x)
-    df["plant_location"] = df["plant_location"].apply(
-        lambda x: x.lower() if type(x) == str else x)
-    df["scientific_name"] = df["scientific_name"].apply(
-        lambda x: x.lower() if type(x) == str else x)
-    df["sun_condition"] = df["sun_condition"].apply(
-        lambda x: x.lower() if type(x) == str else x)
-    df["shade_condition"] = df["shade_condition"].apply(
-        lambda x: x.lower() if type(x) == str else x)
+    for column in LOWERCASE_COLUMNS:
+        # Values which aren't strings are kept as they are
+        df[column] = get_text_accessor(
+            df[column], lambda text: text.str.lower().fillna(text))
     return df
 
 
-def build_plant_dataframe(plant_data: list[dict]) -> DataFrame:
+def compact_plant_dataframe(df: DataFrame) -> DataFrame:
+    """
+    Convert transformed plant data to compact dtypes: categoricals for text with few
+    distinct values and nullable float32 for sensor values. Missing values stay as
+    NaN/NA/NaT, and are only converted to None by `load.get_rows`. The "plant_origin"
+    column is dropped, as its values are already in the location columns.
+
+    Args:
+        df (DataFrame): A pandas DataFrame containing all plant data
+    Returns:
+        DataFrame: A pandas DataFrame containing all plant data
+    """
+    df = df.drop(columns=["plant_origin"], errors="ignore")
+
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+
+    for column in SENSOR_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Float32")
+
+    return df
+
+
+def build_plant_dataframe(plant_data: list[dict] | dict[str, list],
+                          compact: bool = False) -> DataFrame:
     """
     Build a DataFrame from a a list of dictionaries.
 
     Args:
-        plant_data (list[dict]): A Python list of dictionaries containing the parsed JSON data without nested dictionaries.
+        plant_data (list[dict] | dict[str, list]): A Python list of dictionaries containing the parsed JSON data
+        without nested dictionaries, or the columns from `PlantColumnBuffer.to_columns`.
+        compact (bool): Use compact dtypes from `compact_plant_dataframe` and keep missing values
+        as NaN rather than None, which uses several times less memory for large batches.
     Returns:
         DataFrame: A pandas DataFrame containing all plant data
     """
@@ -463,21 +521,105 @@ def build_plant_dataframe(plant_data: list[dict]) -> DataFrame:
     df = build_location_columns(df)
     df = transform_temperature_column(df)
     df = normalize_column_text(df)
+
+    if compact:
+        return compact_plant_dataframe(df)
+
     df = df.replace(np.nan, None)
 
     return df
 
 
-if __name__ == "__main__":
+def iter_plant_dataframes(plant_data: Iterable[dict], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          compact: bool = True) -> Iterator[DataFrame]:
+    """
+    Lazily build DataFrames of at most `chunk_size` plants from a stream of flattened
+    plant data, so only one chunk is held in memory however long the stream is.
+
+    Args:
+        plant_data (Iterable[dict]): Flattened plant data, such as from `iter_flattened_data`.
+        chunk_size (int): The most plants in each DataFrame.
+        compact (bool): Build each chunk with compact dtypes, see `build_plant_dataframe`.
+    Returns:
+        Iterator[DataFrame]: A pandas DataFrame for each chunk, in the order of the stream
+    """
+    for chunk in iter_batches(plant_data, chunk_size):
+        yield build_plant_dataframe(chunk, compact)
 
-    json_file_path = "recent_plant_data.json"
 
-    loaded_data_from_file = load_data(json_file_path)
+def iter_plant_dataframes_parallel(plant_data: Iterable[dict], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                   max_workers: int = None,
+                                   compact: bool = True) -> Iterator[DataFrame]:
+    """
+    Like `iter_plant_dataframes`, but builds the chunks in a pool of processes so the
+    regex and list handling runs on every core. Chunks are yielded in the order of the
+    stream, and at most two chunks per worker are read ahead.
+
+    Args:
+        plant_data (Iterable[dict]): Flattened plant data, such as from `iter_flattened_data`.
+        chunk_size (int): The most plants in each DataFrame.
+        max_workers (int): The number of processes, defaults to the number of cores.
+        compact (bool): Build each chunk with compact dtypes, see `build_plant_dataframe`.
+    Returns:
+        Iterator[DataFrame]: A pandas DataFrame for each chunk, in the order of the stream
+    """
+    max_workers = max_workers or cpu_count() or 1
+    if max_workers == 1:
+        yield from iter_plant_dataframes(plant_data, chunk_size, compact)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+
+        for chunk in iter_batches(plant_data, chunk_size):
+            pending.append(executor.submit(build_plant_dataframe, chunk, compact))
+            if len(pending) >= max_workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_plant_dataframe_parallel(plant_data: Iterable[dict], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                   max_workers: int = None,
+                                   compact: bool = False) -> DataFrame:
+    """
+    Build one DataFrame from a large batch of flattened plant data, transforming
+    chunks of it in a pool of processes.
+
+    Args:
+        plant_data (Iterable[dict]): Flattened plant data.
+        chunk_size (int): The most plants transformed by a process at once.
+        max_workers (int): The number of processes, defaults to the number of cores.
+        compact (bool): Use compact dtypes, see `build_plant_dataframe`.
+    Returns:
+        DataFrame: A pandas DataFrame containing all plant data, in the original order
+    """
+    chunks = list(iter_plant_dataframes_parallel(plant_data, chunk_size, max_workers, compact))
+    if not chunks:
+        return pd.DataFrame()
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    if compact:
+        # Chunks with different categories are concatenated as object columns
+        df = compact_plant_dataframe(df)
+
+    return df
+
+
+if __name__ == "__main__":
+
+    ndjson_file_path = "recent_plant_data.ndjson"
 
-    flatted_plant_data = flatten_data(loaded_data_from_file)
+    loaded_data_from_file = load_ndjson_data(ndjson_file_path)
 
-    plant_df = build_plant_dataframe(flatted_plant_data)
+    flatted_plant_data = iter_flattened_data(loaded_data_from_file)
 
-    plant_df.to_csv('transformed_plant_data.csv')
+    rows = 0
+    for chunk_number, plant_df in enumerate(iter_plant_dataframes(flatted_plant_data, compact=False)):
+        plant_df.to_csv('transformed_plant_data.csv',
+                        mode="w" if chunk_number == 0 else "a", header=chunk_number == 0)
+        rows += len(plant_df)
 
-    print(plant_df)
+    print(f"Transformed {rows} plants")
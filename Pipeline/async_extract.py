@@ -0,0 +1,149 @@
+"""Pipeline Script: Extracting pipeline data from the API endpoint using asyncio"""
+
+import asyncio
+import random
+from os import environ
+from typing import Iterable
+
+import aiohttp
+from dotenv import load_dotenv
+
+from extract import (
+    process_plant_data_from_api,
+    clean_unicode_from_plant_data,
+    create_ndjson_file,
+    NUMBER_OF_PLANTS,
+    DEFAULT_MAX_WORKERS
+)
+
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8
+
+
+class RetryableResponseError(Exception):
+    """Raised when the API responds with a server error that is worth retrying"""
+
+
+def get_backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS,
+                      cap: float = BACKOFF_MAX_SECONDS) -> float:
+    """
+    Returns how long to wait before the next attempt, using exponential backoff
+    with full jitter
+
+    Args:
+        attempt (int): The number of attempts that have already failed, starting at 0
+
+        base (float): The delay in seconds for the first retry before jitter
+
+        cap (float): The largest delay in seconds that will be returned
+
+    Returns:
+        float: A number of seconds to wait
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def get_plant_data_from_api(plant_id: int, api_path: str, session: aiohttp.ClientSession,
+                                  timeout: float = REQUEST_TIMEOUT_SECONDS,
+                                  max_retries: int = MAX_RETRIES,
+                                  backoff_base: float = BACKOFF_BASE_SECONDS) -> dict:
+    """
+    Retrieves the data for a given plant and stores it as a dict, retrying
+    timeouts and 5xx responses
+
+    Args:
+        plant_id (int): A number representing the id value of the plant for which
+        data will be accessed.
+
+        api_path (str): A string containing the api path
+
+        session (ClientSession): An aiohttp session used to make the request
+
+        timeout (float): The number of seconds a single attempt may take
+
+        max_retries (int): The number of times a failed attempt is retried
+
+        backoff_base (float): The delay in seconds for the first retry before jitter
+
+    Returns:
+        dict: A python dictionary containing retrieved data from the API, or a dict
+        with an `error` key if every attempt failed or the body wasn't valid JSON
+    """
+    request_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    for attempt in range(max_retries + 1):
+        try:
+            async with session.get(f"{api_path}/plants/{plant_id}",
+                                   timeout=request_timeout) as response:
+                if response.status >= 500:
+                    raise RetryableResponseError(
+                        f"Server error {response.status}")
+                return await response.json(content_type=None)
+        except ValueError as err:
+            # A malformed body won't be fixed by asking again
+            print(f"Error retrieving plant {plant_id}: {err!r}")
+            return {"error": repr(err), "plant_id": plant_id}
+        except (asyncio.TimeoutError, aiohttp.ClientError, RetryableResponseError) as err:
+            if attempt == max_retries:
+                print(f"Error retrieving plant {plant_id}: {err!r}")
+                return {"error": repr(err), "plant_id": plant_id}
+            await asyncio.sleep(get_backoff_delay(attempt, backoff_base))
+
+
+async def get_all_plants_data(api_path: str,
+                              max_concurrency: int = DEFAULT_MAX_WORKERS,
+                              plant_ids: Iterable[int] = range(NUMBER_OF_PLANTS)) -> list[dict]:
+    """
+    Extracts the data for all plants concurrently, into a list of dicts ordered by plant id
+
+    Args:
+        api_path (str): A string containing the api path
+
+        max_concurrency (int): The maximum number of requests in flight at once
+
+        plant_ids (Iterable[int]): The ids of the plants to request
+
+    Returns:
+        list[dict]: A Python list containing all data from API for each plant
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with aiohttp.ClientSession() as session:
+
+        async def get_plant_data(plant_id: int) -> dict:
+            async with semaphore:
+                return await get_plant_data_from_api(plant_id, api_path, session)
+
+        raw_plants_data = await asyncio.gather(
+            *(get_plant_data(plant_id) for plant_id in plant_ids))
+
+    all_plants_data = []
+
+    for raw_plant_data in raw_plants_data:
+        processed_plant_data = process_plant_data_from_api(raw_plant_data)
+        if processed_plant_data:
+            all_plants_data.append(processed_plant_data)
+
+    return all_plants_data
+
+
+if __name__ == "__main__":
+
+    load_dotenv()
+
+    api_path = environ.get("API_PATH")
+
+    max_concurrency = int(environ.get("MAX_WORKERS", DEFAULT_MAX_WORKERS))
+
+    plant_data_file_path = "recent_plant_data.ndjson"
+
+    all_plants_data = asyncio.run(get_all_plants_data(api_path, max_concurrency))
+
+    cleaned_plants_data = clean_unicode_from_plant_data(all_plants_data)
+
+    create_ndjson_file(cleaned_plants_data, plant_data_file_path)
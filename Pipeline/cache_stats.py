@@ -0,0 +1,23 @@
+"""Pipeline Script: Reports how well the pipeline's `lru_cache` caches are working"""
+
+
+def get_cache_stats(cached_function) -> dict:
+    """
+    Returns how well an `lru_cache` is working
+
+    Args:
+        cached_function: A function wrapped in `lru_cache`
+
+    Returns:
+        dict: The number of hits, misses and cached values, and the hit rate
+    """
+    info = cached_function.cache_info()
+    lookups = info.hits + info.misses
+
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0
+    }
@@ -0,0 +1,190 @@
+"""Pipeline Script: Builds column-oriented plant data straight from API responses"""
+
+from array import array
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from sunlight import classify_sunlight
+
+TEXT_COLUMNS = ["botanist_name", "botanist_email", "botanist_phone_number",
+                "scientific_name", "plant_name", "plant_cycle", "last_watered",
+                "recording_time", "sun_condition", "shade_condition",
+                "plant_latitude", "plant_longitude", "plant_location"]
+# The typecode of the array each numeric column is buffered in
+NUMERIC_COLUMNS = {"plant_id": "q", "soil_moisture": "d", "temperature": "d"}
+NUMPY_DTYPES = {"q": np.int64, "d": np.float64}
+
+
+class PlantColumnBuffer:
+    """
+    Collects plant readings into one buffer per output column, skipping the nested
+    dict built by `process_plant_data_from_api` and the flat dict built by `flatten_data`.
+    Sensor values go into typed float arrays and the plant id into an integer array.
+    A numeric column falls back to a list of the raw values the first time it gets a
+    value its array can't hold, such as a missing plant id or a sensor value sent as
+    text, so the transform sees the same values as on the dict path.
+    """
+
+    def __init__(self):
+        self.numeric_columns = {column: array(typecode)
+                                for column, typecode in NUMERIC_COLUMNS.items()}
+        self.text_columns = {column: [] for column in TEXT_COLUMNS}
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append_number(self, column: str, value: object) -> None:
+        """
+        Appends a value to a numeric column, keeping the column typed while it can be
+
+        Args:
+            column (str): The name of the numeric column
+
+            value (object): The value from the API
+
+        Returns:
+            None
+        """
+        values = self.numeric_columns[column]
+
+        if isinstance(values, array):
+            # A missing sensor value is NaN either way once it's in a DataFrame
+            if value is None and values.typecode == "d":
+                value = np.nan
+            try:
+                values.append(value)
+                return
+            except (TypeError, OverflowError):
+                values = self.numeric_columns[column] = values.tolist()
+
+        values.append(value)
+
+    def append_raw_plant_data(self, plant_data: dict) -> bool:
+        """
+        Appends one raw API response, applying the same field mapping as
+        `process_plant_data_from_api`, `clean_unicode_from_plant_data` and `flatten_data`
+
+        Args:
+            plant_data (dict): Raw JSON response data from the API
+
+        Returns:
+            bool: False if the response was an error and nothing was appended
+        """
+        if 'error' in plant_data:
+            return False
+
+        botanist = plant_data.get("botanist", {})
+        origin_location = plant_data.get("origin_location", [])
+        sunlight = plant_data.get("sunlight")
+        name = plant_data.get("name")
+        if name:
+            name = name.replace(u"\u2018", "").replace(u"\u2019", "")
+
+        text = self.text_columns
+        text["botanist_name"].append(botanist.get("name"))
+        text["botanist_email"].append(botanist.get("email"))
+        text["botanist_phone_number"].append(botanist.get("phone"))
+        text["scientific_name"].append(plant_data.get("scientific_name"))
+        text["plant_name"].append(name)
+        text["plant_cycle"].append(plant_data.get("cycle"))
+        text["last_watered"].append(plant_data.get("last_watered"))
+        text["recording_time"].append(plant_data.get("recording_taken"))
+        sun_condition, shade_condition = classify_sunlight(sunlight)
+        text["sun_condition"].append(sun_condition)
+        text["shade_condition"].append(shade_condition)
+        text["plant_latitude"].append(
+            origin_location[0] if len(origin_location) > 0 else None)
+        text["plant_longitude"].append(
+            origin_location[1] if len(origin_location) > 1 else None)
+        text["plant_location"].append(
+            origin_location[-1] if len(origin_location) > 2 else None)
+
+        for column in NUMERIC_COLUMNS:
+            self.append_number(column, plant_data.get(column))
+
+        self._rows += 1
+        return True
+
+    def extend_raw_plants_data(self, plants_data: Iterable[dict]) -> int:
+        """
+        Appends many raw API responses
+
+        Args:
+            plants_data (Iterable[dict]): Raw JSON response data from the API
+
+        Returns:
+            int: The number of plants appended
+        """
+        return sum(self.append_raw_plant_data(plant_data) for plant_data in plants_data)
+
+    def to_columns(self) -> dict[str, object]:
+        """
+        Returns the buffers as columns, sharing memory with the typed arrays
+
+        Returns:
+            dict[str, object]: Column names mapped to numpy arrays or lists, which
+            can be passed to `build_plant_dataframe`
+        """
+        columns = {}
+        for column, values in self.numeric_columns.items():
+            if isinstance(values, array):
+                values = np.frombuffer(values, dtype=NUMPY_DTYPES[values.typecode])
+            columns[column] = values
+        columns.update(self.text_columns)
+        return columns
+
+    def to_dataframe(self) -> DataFrame:
+        """
+        Returns the buffers as an untransformed DataFrame
+
+        Returns:
+            DataFrame: A pandas DataFrame with one column per buffer
+        """
+        return pd.DataFrame(self.to_columns())
+
+
+def build_plant_columns(plants_data: Iterable[dict]) -> PlantColumnBuffer:
+    """
+    Builds column buffers from raw API responses
+
+    Args:
+        plants_data (Iterable[dict]): Raw JSON response data from the API
+
+    Returns:
+        PlantColumnBuffer: The buffered columns for every plant which wasn't an error
+    """
+    buffer = PlantColumnBuffer()
+    buffer.extend_raw_plants_data(plants_data)
+    return buffer
+
+
+def iter_plant_column_batches(plants_data: Iterable[dict],
+                              batch_size: int) -> Iterator[dict[str, object]]:
+    """
+    Lazily builds column buffers of at most `batch_size` plants from a stream of raw
+    API responses, so a large backfill never holds more than one batch of rows
+
+    Args:
+        plants_data (Iterable[dict]): Raw JSON response data from the API
+
+        batch_size (int): The most plants in each batch, not counting error responses
+
+    Returns:
+        Iterator[dict[str, object]]: The columns of each batch, from `PlantColumnBuffer.to_columns`
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    buffer = PlantColumnBuffer()
+
+    for plant_data in plants_data:
+        if buffer.append_raw_plant_data(plant_data) and len(buffer) >= batch_size:
+            yield buffer.to_columns()
+            buffer = PlantColumnBuffer()
+
+    if len(buffer):
+        yield buffer.to_columns()
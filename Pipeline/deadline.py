@@ -0,0 +1,70 @@
+"""Pipeline Script: Tracks how long a pipeline run has left before it must finish"""
+
+from time import monotonic
+from typing import Callable
+
+DEFAULT_MARGIN_SECONDS = 15.0
+
+
+class Deadline:
+    """
+    A point in time by which a run should stop starting new work. The margin
+    leaves time to transform and load whatever has been collected so far.
+    """
+
+    def __init__(self, seconds: float, margin: float = DEFAULT_MARGIN_SECONDS,
+                 clock: Callable[[], float] = monotonic):
+        """
+        Args:
+            seconds (float): How many seconds the run has in total from now
+
+            margin (float): How many of those seconds are kept back for finishing up
+
+            clock (Callable): Returns the current time in seconds
+        """
+        self._clock = clock
+        self.expires_at = clock() + seconds - margin
+
+    def remaining(self) -> float:
+        """
+        Returns how many seconds are left before new work should stop
+
+        Returns:
+            float: The number of seconds left, negative once the deadline has passed
+        """
+        return self.expires_at - self._clock()
+
+    def reached(self) -> bool:
+        """
+        Checks whether new work should stop
+
+        Returns:
+            bool: True once the deadline has passed
+        """
+        return self.remaining() <= 0
+
+
+def get_run_deadline(context: object = None, budget_seconds: float = None,
+                     margin: float = DEFAULT_MARGIN_SECONDS) -> Deadline:
+    """
+    Works out the deadline for a run, from the Lambda context when there is one
+    and otherwise from a configured budget
+
+    Args:
+        context (object): The Lambda context object, or None when run locally
+
+        budget_seconds (float): The number of seconds a local run may take, or None
+        for no limit
+
+        margin (float): How many seconds are kept back for transforming and loading
+
+    Returns:
+        Deadline: The deadline for the run, or None if the run has no time limit
+    """
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        return Deadline(context.get_remaining_time_in_millis() / 1000, margin)
+
+    if budget_seconds is not None:
+        return Deadline(budget_seconds, margin)
+
+    return None
@@ -1,12 +1,101 @@
 """Pipeline Script: Extracting pipeline data from the API endpoint"""
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from os import environ
+from threading import Lock
+from typing import Iterable, Iterator
+from time import perf_counter, sleep, time
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import (
+    ApiScheduler,
+    create_api_scheduler,
+    DEFAULT_RATE_LIMIT,
+    THROTTLED_STATUS_CODES
+)
+from deadline import Deadline
+from raw_archive import RawArchive
+from plant_index import (
+    PlantIndex,
+    load_plant_index,
+    save_plant_index,
+    DEFAULT_INDEX_PATH
+)
+
+NUMBER_OF_PLANTS = 51
+DEFAULT_MAX_WORKERS = 10
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_THROTTLE_RETRIES = 3
+THROTTLE_BACKOFF_SECONDS = 0.5
+# Set on error dicts for requests which failed before the API answered, which say
+# nothing about whether the plant exists
+REQUEST_FAILED = "request_failed"
+
+# Sessions live for the lifetime of the module so that warm Lambda invocations
+# keep reusing connections that are already open
+_sessions: dict[int, requests.Session] = {}
+_sessions_lock = Lock()
+
+
+def get_session(pool_size: int = DEFAULT_MAX_WORKERS) -> requests.Session:
+    """
+    Returns a shared keep-alive session with a connection pool of the given size,
+    creating it on first use
+
+    Args:
+        pool_size (int): The number of connections kept open to the API
+
+    Returns:
+        Session: A requests session which reuses pooled connections
+    """
+    with _sessions_lock:
+        if pool_size not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[pool_size] = session
+
+        return _sessions[pool_size]
+
+
+def close_sessions() -> None:
+    """
+    Closes every shared session and the connections they hold open
 
+    Returns:
+        None
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
 
-def get_plant_data_from_api(plant_id: int, api_path: str) -> dict:
+
+def get_request_timeout(deadline: Deadline = None) -> float:
+    """
+    Returns how long a single request may take, so that no request runs past the deadline
+
+    Args:
+        deadline (Deadline): The run deadline, or None for no limit
+
+    Returns:
+        float: The number of seconds the request may take, which is 0 or less once
+        the deadline has passed
+    """
+    if deadline is None:
+        return REQUEST_TIMEOUT_SECONDS
+
+    return min(REQUEST_TIMEOUT_SECONDS, deadline.remaining())
+
+
+def get_plant_data_from_api(plant_id: int, api_path: str,
+                            session: requests.Session = None,
+                            scheduler: ApiScheduler = None,
+                            deadline: Deadline = None) -> dict:
     """
     Retrieves the data for a given plant and stores it as a dict
 
@@ -16,13 +105,58 @@ def get_plant_data_from_api(plant_id: int, api_path: str) -> dict:
 
         api_path (str): A string containing the api path
 
+        session (Session): A session to make the request with, defaults to the
+        shared session
+
+        scheduler (ApiScheduler): Paces the request and learns from its outcome.
+        Throttled and 5xx responses are retried with backoff when one is given.
+
+        deadline (Deadline): No request or backoff runs past this deadline, or None
+        to allow every retry its full timeout
+
     Returns:
-        dict: A python dictionary containing retrieved data from the API
+        dict: A python dictionary containing retrieved data from the API, or None if
+        the deadline passed before the request could be made
     """
-    response = requests.get(f"{api_path}/plants/{plant_id}")
-    data = response.json()
-
-    return data
+    if session is None:
+        session = get_session()
+
+    url = f"{api_path}/plants/{plant_id}"
+
+    if scheduler is None:
+        timeout = get_request_timeout(deadline)
+        if timeout <= 0:
+            return None
+        response = session.get(url, timeout=timeout)
+        return response.json()
+
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        with scheduler.slot():
+            # The deadline may have passed while waiting for a slot
+            timeout = get_request_timeout(deadline)
+            if timeout <= 0:
+                return None
+            start = perf_counter()
+            try:
+                response = session.get(url, timeout=timeout)
+            except requests.RequestException:
+                scheduler.record_error()
+                raise
+            scheduler.record_response(
+                response.status_code, perf_counter() - start)
+
+        if response.status_code not in THROTTLED_STATUS_CODES and response.status_code < 500:
+            return response.json()
+
+        if attempt < MAX_THROTTLE_RETRIES:
+            backoff = THROTTLE_BACKOFF_SECONDS * 2 ** attempt
+            # Give up rather than retry a request which couldn't finish in time
+            if deadline is not None and deadline.remaining() <= backoff:
+                break
+            sleep(backoff)
+
+    return {"error": f"Request failed with status {response.status_code}", "plant_id": plant_id,
+            REQUEST_FAILED: True}
 
 
 def process_plant_data_from_api(plant_data: dict) -> dict:
@@ -60,19 +194,22 @@ def process_plant_data_from_api(plant_data: dict) -> dict:
         return plant_data_dict
 
 
-def get_all_plants_data(api_path: str) -> list[dict]:
+def get_all_plants_data(api_path: str,
+                        plant_ids: Iterable[int] = range(NUMBER_OF_PLANTS)) -> list[dict]:
     """
     Extracts the data for all plants, into a list of dicts
 
     Args:
         api_path (str): A string containing the api path
 
+        plant_ids (Iterable[int]): The ids of the plants to request
+
     Returns:
         list[dict]: A Python list containing all data from API for each plant
     """
     all_plants_data = []
 
-    for i in range(51):
+    for i in plant_ids:
         raw_plant_data = get_plant_data_from_api(i, api_path)
         processed_plant_data = process_plant_data_from_api(raw_plant_data)
         if processed_plant_data:
@@ -81,6 +218,227 @@ def get_all_plants_data(api_path: str) -> list[dict]:
     return all_plants_data
 
 
+def iter_raw_plants_data_concurrently(api_path: str, plant_ids: Iterable[int],
+                                      max_workers: int = DEFAULT_MAX_WORKERS,
+                                      scheduler: ApiScheduler = None,
+                                      deadline: Deadline = None) -> Iterator[dict]:
+    """
+    Retrieves the unprocessed data for the given plants using a bounded pool
+    of worker threads, yielding each response as soon as it and every earlier
+    plant have been fetched
+
+    Args:
+        api_path (str): A string containing the api path
+
+        plant_ids (Iterable[int]): The ids of the plants to request
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        scheduler (ApiScheduler): Paces requests within the pool, or None to send
+        them as fast as the pool allows
+
+        deadline (Deadline): Plants which haven't been requested by this deadline
+        are skipped, or None to request every plant
+
+    Returns:
+        Iterator[dict]: Raw API responses in the same order as `plant_ids`, with None
+        for any plant skipped because the deadline was reached and a dict with an
+        `error` key and `REQUEST_FAILED` set for any plant whose request failed
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    session = get_session(max_workers)
+
+    def get_plant_data_before_deadline(plant_id: int) -> dict:
+        if deadline is not None and deadline.reached():
+            return None
+        # One failed plant is reported rather than ending the whole run
+        try:
+            return get_plant_data_from_api(plant_id, api_path, session, scheduler, deadline)
+        except (requests.RequestException, ValueError) as err:
+            print(f"Error retrieving plant {plant_id}: {err!r}")
+            return {"error": repr(err), "plant_id": plant_id, REQUEST_FAILED: True}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(get_plant_data_before_deadline, plant_ids)
+
+
+def get_raw_plants_data_concurrently(api_path: str, plant_ids: Iterable[int],
+                                     max_workers: int = DEFAULT_MAX_WORKERS,
+                                     scheduler: ApiScheduler = None,
+                                     deadline: Deadline = None) -> list[dict]:
+    """
+    Retrieves the unprocessed data for the given plants using a bounded pool
+    of worker threads
+
+    Args:
+        api_path (str): A string containing the api path
+
+        plant_ids (Iterable[int]): The ids of the plants to request
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        scheduler (ApiScheduler): Paces requests within the pool, or None to send
+        them as fast as the pool allows
+
+        deadline (Deadline): Plants which haven't been requested by this deadline
+        are skipped, or None to request every plant
+
+    Returns:
+        list[dict]: A Python list of raw API responses in the same order as `plant_ids`,
+        with None for any plant skipped because the deadline was reached
+    """
+    return list(iter_raw_plants_data_concurrently(
+        api_path, plant_ids, max_workers, scheduler, deadline))
+
+
+def get_all_plants_data_concurrently(api_path: str,
+                                     max_workers: int = DEFAULT_MAX_WORKERS,
+                                     scheduler: ApiScheduler = None,
+                                     deadline: Deadline = None,
+                                     plant_ids: Iterable[int] = range(NUMBER_OF_PLANTS)) -> list[dict]:
+    """
+    Extracts the data for all plants using a bounded pool of worker threads,
+    into a list of dicts ordered by plant id
+
+    Args:
+        api_path (str): A string containing the api path
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        scheduler (ApiScheduler): Paces requests within the pool, or None to send
+        them as fast as the pool allows
+
+        deadline (Deadline): Plants which haven't been requested by this deadline
+        are skipped, or None to request every plant
+
+        plant_ids (Iterable[int]): The ids of the plants to request
+
+    Returns:
+        list[dict]: A Python list containing all data from API for each plant
+    """
+    raw_plants_data = get_raw_plants_data_concurrently(
+        api_path, plant_ids, max_workers, scheduler, deadline)
+
+    all_plants_data = []
+
+    for raw_plant_data in raw_plants_data:
+        if raw_plant_data is None:
+            continue
+        processed_plant_data = process_plant_data_from_api(raw_plant_data)
+        if processed_plant_data:
+            all_plants_data.append(processed_plant_data)
+
+    return all_plants_data
+
+
+def iter_plants_data_from_index(api_path: str, index: PlantIndex,
+                                max_workers: int = DEFAULT_MAX_WORKERS,
+                                scheduler: ApiScheduler = None,
+                                deadline: Deadline = None,
+                                archive: RawArchive = None) -> Iterator[dict]:
+    """
+    Extracts the data for the plants the index expects to be live, probing dead and
+    unseen ids as the index decides and recording the outcome of every request.
+    Plants are yielded as they are fetched.
+
+    Args:
+        api_path (str): A string containing the api path
+
+        index (PlantIndex): The index of live and dead plant ids, updated in place
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        scheduler (ApiScheduler): Paces requests within the pool, or None to send
+        them as fast as the pool allows
+
+        deadline (Deadline): Plants which haven't been requested by this deadline
+        are skipped, or None to request every plant
+
+        archive (RawArchive): Every raw response is appended to this archive before
+        it is processed, or None to not keep raw responses
+
+    Returns:
+        Iterator[dict]: Processed API data for each plant
+    """
+    now = time()
+    plant_ids = index.get_ids_to_fetch(now)
+
+    while plant_ids:
+        raw_plants_data = iter_raw_plants_data_concurrently(
+            api_path, plant_ids, max_workers, scheduler, deadline)
+
+        for plant_id, raw_plant_data in zip(plant_ids, raw_plants_data):
+            # Skipped plants, and plants whose request failed before the API answered,
+            # are left as they were in the index; only an API error counts as a miss
+            if raw_plant_data is None or raw_plant_data.get(REQUEST_FAILED):
+                continue
+            if archive is not None:
+                archive.append(raw_plant_data)
+            processed_plant_data = process_plant_data_from_api(raw_plant_data)
+            index.record(plant_id, bool(processed_plant_data), now)
+            if processed_plant_data:
+                yield processed_plant_data
+
+        if deadline is not None and deadline.reached():
+            print("Run deadline reached, stopping extract early.")
+            return
+
+        # Keep probing upwards while new plants are found at the edge of the index
+        plant_ids = index.get_frontier_ids(now)
+
+
+def get_all_plants_data_from_index(api_path: str, index: PlantIndex,
+                                   max_workers: int = DEFAULT_MAX_WORKERS,
+                                   scheduler: ApiScheduler = None,
+                                   deadline: Deadline = None,
+                                   archive: RawArchive = None) -> list[dict]:
+    """
+    Extracts the data for the plants the index expects to be live, probing dead and
+    unseen ids as the index decides and recording the outcome of every request
+
+    Args:
+        api_path (str): A string containing the api path
+
+        index (PlantIndex): The index of live and dead plant ids, updated in place
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        scheduler (ApiScheduler): Paces requests within the pool, or None to send
+        them as fast as the pool allows
+
+        deadline (Deadline): Plants which haven't been requested by this deadline
+        are skipped, or None to request every plant
+
+        archive (RawArchive): Every raw response is appended to this archive before
+        it is processed, or None to not keep raw responses
+
+    Returns:
+        list[dict]: A Python list containing all data from API for each plant
+    """
+    return list(iter_plants_data_from_index(
+        api_path, index, max_workers, scheduler, deadline, archive))
+
+
+def clean_unicode_from_plant(plant: dict) -> dict:
+    """
+    Remove unicode characters which appear in the `name` data of a single plant
+
+    Args:
+        plant (dict): A dictionary of processed plant data with uncleaned name data
+
+    Returns:
+        dict: The same dictionary with unicode removed from `name` data
+    """
+    if plant["name"]:
+
+        plant["name"] = plant["name"].replace(
+            u"\u2018", "").replace(u"\u2019", "")
+
+    return plant
+
+
 def clean_unicode_from_plant_data(plants_data: list[dict]) -> list[dict]:
     """
     Remove unicode characters which appear in the plant `name` data
@@ -94,11 +452,7 @@ def clean_unicode_from_plant_data(plants_data: list[dict]) -> list[dict]:
         with unicode removed from `name` data
     """
     for plant in plants_data:
-
-        if plant["name"]:
-
-            plant["name"] = plant["name"].replace(
-                u"\u2018", "").replace(u"\u2019", "")
+        clean_unicode_from_plant(plant)
 
     return plants_data
 
@@ -122,16 +476,54 @@ def create_json_file(data: list[dict], file_path: str) -> str:
     return "Data processed!"
 
 
+def create_ndjson_file(data: Iterable[dict], file_path: str, append: bool = False) -> str:
+    """
+    Writes data to a newline-delimited .json file one record at a time, so records
+    can be written as they are fetched without holding them all in memory
+
+    Args:
+        data (Iterable[dict]): An iterable of dictionaries of processed plant data
+
+        file_path (str): A string assigned as a file name
+
+        append (bool): Whether to add to the end of an existing file instead of
+        replacing it
+
+    Results:
+        str: A string to show successful writing of data
+    """
+    with open(file_path, "a" if append else "w") as ndjson_file:
+        for record in data:
+            ndjson_file.write(json.dumps(record, separators=(",", ":")))
+            ndjson_file.write("\n")
+
+    return "Data processed!"
+
+
 if __name__ == "__main__":
 
     load_dotenv()
 
     api_path = environ.get("API_PATH")
 
-    plant_data_file_path = "recent_plant_data.json"
+    plant_data_file_path = "recent_plant_data.ndjson"
+
+    max_workers = int(environ.get("MAX_WORKERS", DEFAULT_MAX_WORKERS))
+
+    plant_index_path = environ.get("PLANT_INDEX_PATH", DEFAULT_INDEX_PATH)
+
+    api_rate_limit = float(environ.get("API_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+
+    api_scheduler = create_api_scheduler(max_workers, api_rate_limit)
+
+    plant_index = load_plant_index(plant_index_path)
+
+    all_plants_data = iter_plants_data_from_index(
+        api_path, plant_index, max_workers, api_scheduler)
 
-    all_plants_data = get_all_plants_data(api_path)
+    cleaned_plants_data = (clean_unicode_from_plant(plant)
+                           for plant in all_plants_data)
 
-    cleaned_plants_data = clean_unicode_from_plant_data(all_plants_data)
+    create_ndjson_file(cleaned_plants_data, plant_data_file_path)
 
-    create_json_file(all_plants_data, plant_data_file_path)
+    save_plant_index(plant_index, plant_index_path)
@@ -0,0 +1,162 @@
+"""Pipeline Script: Stores transformed plant data in typed, columnar Parquet or Arrow files between stages"""
+
+from typing import Iterable, Iterator
+
+import pandas as pd
+from pandas import DataFrame
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from transform import compact_plant_dataframe
+
+DEFAULT_INTERMEDIATE_PATH = "transformed_plant_data.parquet"
+PARQUET_SUFFIX = ".parquet"
+# The Arrow IPC stream format, as unlike the file format it lets each chunk have
+# its own categories
+ARROW_SUFFIX = ".arrows"
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+UTC_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+PLANT_SCHEMA = pa.schema([
+    ("botanist_name", CATEGORY),
+    ("botanist_email", CATEGORY),
+    ("botanist_phone_number", CATEGORY),
+    ("plant_id", pa.int64()),
+    ("scientific_name", pa.string()),
+    ("plant_name", pa.string()),
+    ("plant_cycle", CATEGORY),
+    ("last_watered", UTC_TIMESTAMP),
+    ("recording_time", UTC_TIMESTAMP),
+    ("soil_moisture", pa.float32()),
+    ("sun_condition", CATEGORY),
+    ("shade_condition", CATEGORY),
+    ("temperature", pa.float32()),
+    ("plant_latitude", pa.float64()),
+    ("plant_longitude", pa.float64()),
+    ("plant_location", CATEGORY)
+])
+
+# Arrow types read back as pandas extension types, so sensor values stay nullable float32
+PANDAS_TYPES = {pa.float32(): pd.Float32Dtype()}
+
+
+def get_plant_table(df: DataFrame) -> pa.Table:
+    """
+    Converts transformed plant data to an Arrow table with `PLANT_SCHEMA`, so every
+    chunk is stored with the same types however its values were inferred
+
+    Args:
+        df (DataFrame): A pandas DataFrame from `build_plant_dataframe`
+
+    Returns:
+        pa.Table: The plant data as an Arrow table
+    """
+    df = compact_plant_dataframe(df)[PLANT_SCHEMA.names]
+    return pa.Table.from_pandas(df, schema=PLANT_SCHEMA, preserve_index=False)
+
+
+def is_arrow_path(file_path: str) -> bool:
+    """
+    Checks whether a path is for an Arrow IPC stream rather than a Parquet file
+
+    Args:
+        file_path (str): A string containing the path to the file
+
+    Returns:
+        bool: True for a path ending in `ARROW_SUFFIX`
+    """
+    return file_path.endswith(ARROW_SUFFIX)
+
+
+def write_plant_chunks(chunks: Iterable[DataFrame], file_path: str) -> int:
+    """
+    Writes a stream of transformed chunks, such as from `iter_plant_dataframes`, to
+    one Parquet file (a row group per chunk) or Arrow IPC stream (a batch per chunk)
+
+    Args:
+        chunks (Iterable[DataFrame]): The transformed plant data, chunk by chunk
+
+        file_path (str): A string containing the path to write to, ending in
+        ".parquet" or ".arrows"
+
+    Returns:
+        int: The number of rows written
+    """
+    rows = 0
+
+    if is_arrow_path(file_path):
+        writer = pa.ipc.new_stream(file_path, PLANT_SCHEMA)
+    else:
+        writer = pq.ParquetWriter(file_path, PLANT_SCHEMA)
+
+    with writer:
+        for chunk in chunks:
+            table = get_plant_table(chunk)
+            writer.write_table(table)
+            rows += table.num_rows
+
+    return rows
+
+
+def write_plant_data(df: DataFrame, file_path: str) -> None:
+    """
+    Writes transformed plant data to a Parquet file or Arrow IPC stream
+
+    Args:
+        df (DataFrame): A pandas DataFrame from `build_plant_dataframe`
+
+        file_path (str): A string containing the path to write to, ending in
+        ".parquet" or ".arrows"
+
+    Returns:
+        None
+    """
+    write_plant_chunks([df], file_path)
+
+
+def iter_plant_data(file_path: str, memory_map: bool = False) -> Iterator[DataFrame]:
+    """
+    Lazily reads transformed plant data back, one written chunk at a time. Types are
+    kept exactly: UTC datetimes, categoricals and nullable float32 sensor values.
+
+    Args:
+        file_path (str): A string containing the path to a file from `write_plant_chunks`
+
+        memory_map (bool): Map the file into memory rather than reading it, so pages
+        are only loaded as they are used
+
+    Returns:
+        Iterator[DataFrame]: A pandas DataFrame for each chunk
+    """
+    if is_arrow_path(file_path):
+        source = pa.memory_map(file_path) if memory_map else pa.OSFile(file_path)
+        with source, pa.ipc.open_stream(source) as reader:
+            for batch in reader:
+                yield batch.to_pandas(types_mapper=PANDAS_TYPES.get)
+        return
+
+    parquet_file = pq.ParquetFile(file_path, memory_map=memory_map)
+    for row_group in range(parquet_file.num_row_groups):
+        yield parquet_file.read_row_group(row_group).to_pandas(
+            types_mapper=PANDAS_TYPES.get)
+
+
+def read_plant_data(file_path: str, memory_map: bool = False) -> DataFrame:
+    """
+    Reads transformed plant data back as one DataFrame
+
+    Args:
+        file_path (str): A string containing the path to a file from `write_plant_chunks`
+
+        memory_map (bool): Map the file into memory rather than reading it
+
+    Returns:
+        DataFrame: A pandas DataFrame containing all plant data
+    """
+    chunks = list(iter_plant_data(file_path, memory_map))
+    if not chunks:
+        return PLANT_SCHEMA.empty_table().to_pandas(types_mapper=PANDAS_TYPES.get)
+
+    # Chunks with different categories are concatenated as object columns
+    return compact_plant_dataframe(pd.concat(chunks, ignore_index=True))
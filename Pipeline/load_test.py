@@ -0,0 +1,217 @@
+"""Pipeline Script: Load tests the extract functions against the local mock API"""
+
+import argparse
+import asyncio
+from math import ceil
+from time import perf_counter
+
+import async_extract
+import extract
+from mock_api import MockApiConfig, start_mock_api
+from plant_index import PlantIndex
+from rate_limit import create_api_scheduler
+
+ENGINES = ["sequential", "concurrent", "adaptive", "index", "async"]
+
+
+def get_percentile(values: list[float], percentile: float) -> float:
+    """
+    Returns the nearest-rank percentile of a list of values
+
+    Args:
+        values (list[float]): The values to summarise
+
+        percentile (float): The percentile wanted, between 0 and 100
+
+    Returns:
+        float: The value at that percentile, or None for an empty list
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    rank = max(ceil(percentile / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_engine(engine: str, api_path: str, max_workers: int,
+               plant_count: int = extract.NUMBER_OF_PLANTS) -> tuple[list[float], int, int]:
+    """
+    Runs one extract engine against the API, timing every request it makes
+
+    Args:
+        engine (str): One of `ENGINES`
+
+        api_path (str): A string containing the api path
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        plant_count (int): The number of plant ids requested, from 0, by the engines
+        given a fixed range. The index engine finds the plants itself.
+
+    Returns:
+        tuple[list[float], int, int]: The latency of each request in seconds, the
+        number of requests which raised an exception, and the number of plants extracted
+    """
+    latencies = []
+    exceptions = []
+    plant_ids = range(plant_count)
+
+    if engine == "async":
+        get_plant_data = async_extract.get_plant_data_from_api
+
+        async def timed_get_plant_data(*args, **kwargs):
+            start = perf_counter()
+            try:
+                data = await get_plant_data(*args, **kwargs)
+            except Exception as err:
+                exceptions.append(err)
+                data = {"error": repr(err)}
+            latencies.append(perf_counter() - start)
+            return data
+
+        async_extract.get_plant_data_from_api = timed_get_plant_data
+        try:
+            plants = asyncio.run(
+                async_extract.get_all_plants_data(api_path, max_workers, plant_ids))
+        finally:
+            async_extract.get_plant_data_from_api = get_plant_data
+
+        return latencies, len(exceptions), len(plants)
+
+    get_plant_data = extract.get_plant_data_from_api
+
+    def timed_get_plant_data(*args, **kwargs):
+        start = perf_counter()
+        try:
+            data = get_plant_data(*args, **kwargs)
+        except Exception as err:
+            exceptions.append(err)
+            data = {"error": repr(err)}
+        latencies.append(perf_counter() - start)
+        return data
+
+    extract.get_plant_data_from_api = timed_get_plant_data
+    try:
+        if engine == "sequential":
+            plants = extract.get_all_plants_data(api_path, plant_ids)
+        elif engine == "concurrent":
+            plants = extract.get_all_plants_data_concurrently(
+                api_path, max_workers, plant_ids=plant_ids)
+        elif engine == "adaptive":
+            plants = extract.get_all_plants_data_concurrently(
+                api_path, max_workers, create_api_scheduler(max_workers, rate_limit=None),
+                plant_ids=plant_ids)
+        elif engine == "index":
+            plants = extract.get_all_plants_data_from_index(
+                api_path, PlantIndex(), max_workers)
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+    finally:
+        extract.get_plant_data_from_api = get_plant_data
+
+    return latencies, len(exceptions), len(plants)
+
+
+def benchmark_engine(engine: str, api_path: str, max_workers: int, runs: int,
+                     plant_count: int = extract.NUMBER_OF_PLANTS) -> dict:
+    """
+    Runs an extract engine several times and summarises its throughput and latency
+
+    Args:
+        engine (str): One of `ENGINES`
+
+        api_path (str): A string containing the api path
+
+        max_workers (int): The maximum number of requests made to the API at once
+
+        runs (int): How many times to run the engine
+
+        plant_count (int): The number of plant ids requested in each run
+
+    Returns:
+        dict: A python dictionary of the results for the engine
+    """
+    latencies = []
+    exceptions = 0
+    plants = 0
+    start = perf_counter()
+
+    for _ in range(runs):
+        run_latencies, run_exceptions, run_plants = run_engine(
+            engine, api_path, max_workers, plant_count)
+        latencies.extend(run_latencies)
+        exceptions += run_exceptions
+        plants += run_plants
+
+    wall_seconds = perf_counter() - start
+
+    return {
+        "engine": engine,
+        "runs": runs,
+        "requests": len(latencies),
+        "exceptions": exceptions,
+        "plants": plants,
+        "wall_seconds": wall_seconds,
+        "seconds_per_run": wall_seconds / runs,
+        "requests_per_second": len(latencies) / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": get_percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": get_percentile(latencies, 95) * 1000 if latencies else None,
+        "p99_ms": get_percentile(latencies, 99) * 1000 if latencies else None
+    }
+
+
+def format_results(results: list[dict]) -> str:
+    """
+    Formats benchmark results as a table
+
+    Args:
+        results (list[dict]): The output of `benchmark_engine` for each engine
+
+    Returns:
+        str: A table with one row per engine
+    """
+    header = f"{'engine':<12}{'req':>7}{'exc':>6}{'plants':>8}{'s/run':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    rows = [header]
+
+    for result in results:
+        rows.append(f"{result['engine']:<12}{result['requests']:>7}{result['exceptions']:>6}"
+                    f"{result['plants']:>8}"
+                    f"{result['seconds_per_run']:>9.3f}{result['requests_per_second']:>9.1f}"
+                    f"{result['p50_ms'] or 0:>9.1f}{result['p95_ms'] or 0:>9.1f}"
+                    f"{result['p99_ms'] or 0:>9.1f}")
+
+    return "\n".join(rows)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the extract engines against a local mock API")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="Comma separated engines to run")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int,
+                        default=extract.DEFAULT_MAX_WORKERS)
+    parser.add_argument("--plants", type=int, default=51)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock_config = MockApiConfig(plant_count=args.plants, latency=args.latency,
+                                latency_jitter=args.jitter, error_rate=args.error_rate,
+                                malformed_rate=args.malformed_rate, seed=args.seed)
+    mock_server, mock_api_path = start_mock_api(mock_config)
+
+    try:
+        benchmark_results = [benchmark_engine(engine, mock_api_path, args.workers, args.runs,
+                                              args.plants)
+                             for engine in args.engines.split(",")]
+    finally:
+        mock_server.shutdown()
+        extract.close_sessions()
+
+    print(format_results(benchmark_results))
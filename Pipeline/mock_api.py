@@ -0,0 +1,196 @@
+"""Pipeline Script: A local stand-in for the plants API, used for testing and benchmarking"""
+
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import sleep
+
+PLANT_NAMES = ["Venus flytrap", "Corpse flower", "Rafflesia arnoldii",
+               "Black bat flower", "Pitcher plant", "Wollemi pine",
+               "Bird of paradise", "Cactus", "Dragon tree", "Asclepias curassavica"]
+BOTANISTS = [
+    {"email": "carl.linnaeus@lnhm.co.uk",
+        "name": "Carl Linnaeus", "phone": "(146)994-1635x35992"},
+    {"email": "gertrude.jekyll@lnhm.co.uk",
+        "name": "Gertrude Jekyll", "phone": "001-481-273-3691x127"},
+    {"email": "eliza.andrews@lnhm.co.uk",
+        "name": "Eliza Andrews", "phone": "(846)669-6651x75948"}
+]
+CYCLES = ["Annual", "Perennial", "Biennial"]
+SUNLIGHT = [["full sun"], ["part shade"], ["full sun", "part shade"],
+            ["part sun/part shade"], ["full shade"]]
+ORIGINS = [["-19.32556", "-41.25528", "Resplendor", "America/Sao_Paulo", "BR"],
+           ["33.95015", "-118.03917", "South Whittier", "America/Los_Angeles", "US"],
+           ["43.50891", "16.43915", "Split", "Europe/Zagreb", "HR"]]
+
+
+@dataclass
+class MockApiConfig:
+    """Settings which control how the mock API behaves"""
+    plant_count: int = 51
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    seed: int = None
+
+
+def generate_plant_data(plant_id: int, now: datetime) -> dict:
+    """
+    Builds a response for a plant in the same shape as the real plants API.
+    The plant's details are fixed by its id and the readings change each minute.
+
+    Args:
+        plant_id (int): The id of the plant
+
+        now (datetime): The time the reading is taken
+
+    Returns:
+        dict: A python dictionary matching the API response for a plant
+    """
+    plant_random = random.Random(plant_id)
+    reading_random = random.Random(f"{plant_id}-{now:%Y%m%d%H%M}")
+    last_watered = now.replace(hour=0, minute=0, second=0) - \
+        timedelta(hours=plant_random.randint(0, 12))
+
+    return {
+        "botanist": plant_random.choice(BOTANISTS),
+        "cycle": plant_random.choice(CYCLES),
+        "last_watered": last_watered.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        "name": plant_random.choice(PLANT_NAMES),
+        "origin_location": plant_random.choice(ORIGINS),
+        "plant_id": plant_id,
+        "recording_taken": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "scientific_name": [f"Plantae {plant_id}"],
+        "soil_moisture": round(reading_random.uniform(10, 100), 6),
+        "sunlight": plant_random.choice(SUNLIGHT),
+        "temperature": round(reading_random.uniform(5, 30), 6)
+    }
+
+
+def get_mock_response(path: str, config: MockApiConfig, rng: random.Random) -> tuple[int, str]:
+    """
+    Decides the status code and body the mock API returns for a request path
+
+    Args:
+        path (str): The path of the request, such as `/plants/3`
+
+        config (MockApiConfig): The settings for the mock API
+
+        rng (random.Random): The random number generator used to inject faults
+
+    Returns:
+        tuple[int, str]: The status code and the response body
+    """
+    parts = path.strip("/").split("/")
+
+    if len(parts) != 2 or parts[0] != "plants" or not parts[1].isdigit():
+        return 404, json.dumps({"error": "Not found"})
+
+    plant_id = int(parts[1])
+
+    if plant_id >= config.plant_count:
+        return 404, json.dumps({"error": "plant not found", "plant_id": plant_id})
+
+    if rng.random() < config.error_rate:
+        return 500, json.dumps({"error": "Internal server error"})
+
+    body = json.dumps(generate_plant_data(plant_id, datetime.now()))
+
+    if rng.random() < config.malformed_rate:
+        return 200, body[:len(body) // 2]
+
+    return 200, body
+
+
+class MockApiServer(ThreadingHTTPServer):
+    """A threaded HTTP server which ignores clients hanging up mid-response"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def create_mock_api_server(config: MockApiConfig, port: int = 0) -> MockApiServer:
+    """
+    Creates a threaded HTTP server which serves `/plants/<id>` like the real API
+
+    Args:
+        config (MockApiConfig): The settings for the mock API
+
+        port (int): The port to listen on, 0 picks a free port
+
+    Returns:
+        MockApiServer: A server which has not started serving yet
+    """
+    rng = random.Random(config.seed)
+
+    class MockApiHandler(BaseHTTPRequestHandler):
+        """Handles requests made to the mock API"""
+
+        def do_GET(self):
+            delay = config.latency + rng.uniform(0, config.latency_jitter)
+            if delay:
+                sleep(delay)
+
+            status, body = get_mock_response(self.path, config, rng)
+            encoded_body = body.encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded_body)))
+            self.end_headers()
+            self.wfile.write(encoded_body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockApiServer(("127.0.0.1", port), MockApiHandler)
+
+
+def start_mock_api(config: MockApiConfig, port: int = 0) -> tuple[MockApiServer, str]:
+    """
+    Starts the mock API on a background thread
+
+    Args:
+        config (MockApiConfig): The settings for the mock API
+
+        port (int): The port to listen on, 0 picks a free port
+
+    Returns:
+        tuple[MockApiServer, str]: The running server, and its base url to use as `api_path`.
+        Call `shutdown()` on the server to stop it.
+    """
+    server = create_mock_api_server(config, port)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serve a local mock plants API")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--plants", type=int, default=51)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Up to this many extra seconds added at random")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    mock_config = MockApiConfig(plant_count=args.plants, latency=args.latency,
+                                latency_jitter=args.jitter, error_rate=args.error_rate,
+                                malformed_rate=args.malformed_rate, seed=args.seed)
+
+    mock_server = create_mock_api_server(mock_config, args.port)
+    print(f"Serving mock plants API on http://127.0.0.1:{args.port}")
+    mock_server.serve_forever()
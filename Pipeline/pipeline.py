@@ -1,48 +1,312 @@
 """Pipeline Script: Main pipeline for running ETL scripts"""
 
+import argparse
+from math import floor
 from os import environ
+from signal import signal, SIGINT, SIGTERM
+from threading import Event
+from time import monotonic, perf_counter
+from typing import Callable
 from dotenv import load_dotenv
 
 
 from extract import (
-    get_all_plants_data,
+    get_all_plants_data_from_index,
     clean_unicode_from_plant_data,
+    close_sessions,
+    DEFAULT_MAX_WORKERS
 )
 
-from transform import (
+from deadline import (
+    get_run_deadline,
+    DEFAULT_MARGIN_SECONDS
+)
+
+from sharding import (
+    Shard,
+    parse_shard_spec
+)
+
+from rate_limit import (
+    create_api_scheduler,
+    DEFAULT_RATE_LIMIT
+)
+
+from raw_archive import RawArchive
+from botanist_contacts import get_contact_cache_info
+from quality import check_plant_data, write_quarantine, DEFAULT_QUARANTINE_PATH
+
+from plant_index import (
+    load_plant_index,
+    save_plant_index,
+    DEFAULT_INDEX_PATH
+)
+
+from change_detection import (
+    load_change_cache,
+    save_change_cache,
+    DEFAULT_CHANGE_CACHE_PATH
+)
+
+from light_transform import (
     flatten_data,
-    build_plant_dataframe
+    build_plant_data,
+    DEFAULT_MAX_LIGHT_ROWS
 )
 
 from load import (
-    get_db_connection,
-    insert_into_plant_origin_table,
-    insert_into_plant_table,
-    insert_into_botanist_table,
-    insert_into_water_history_table,
-    insert_into_reading_information_table
+    ensure_db_connection,
+    load_plant_data,
+    load_dimension_cache,
+    save_dimension_cache,
+    DEFAULT_DIMENSION_CACHE_PATH,
+    DEFAULT_RESYNC_SECONDS
 )
 
-if __name__ == "__main__":
+DEFAULT_POLL_INTERVAL_SECONDS = 60.0
 
-    load_dotenv()
 
+class PipelineState:
+    """
+    The resources a long-running pipeline keeps between runs: the database
+    connection, the API scheduler, the plant index, the change cache, the raw
+    response archive and the dimension rows already inserted
+    """
+
+    def __init__(self):
+        self.conn = None
+        self.archive = None
+        self.api_scheduler = None
+        self.plant_index = None
+        self.change_cache = None
+        self.dimension_cache = None
+
+    def close(self) -> None:
+        """
+        Closes the database connection and any pooled HTTP sessions, and writes any
+        buffered raw responses
+
+        Returns:
+            None
+        """
+        if self.archive is not None:
+            self.archive.close()
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+        close_sessions()
+
+
+def run_pipeline(shard: Shard = None, state: PipelineState = None) -> dict:
+    """
+    Runs extract, transform and load once, for every plant or for one shard of plants
+
+    Args:
+        shard (Shard): The slice of plant ids to process, or None for every plant
+
+        state (PipelineState): Resources kept from earlier runs, or None for a
+        one-off run which closes everything it opens
+
+    Returns:
+        dict: A summary of the run, with the number of plants extracted, readings
+        loaded and the seconds spent in each stage
+    """
     config = environ
 
     api_path = environ.get("API_PATH")
+    max_workers = int(environ.get("MAX_WORKERS", DEFAULT_MAX_WORKERS))
+    api_rate_limit = float(environ.get("API_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+    plant_index_path = environ.get("PLANT_INDEX_PATH", DEFAULT_INDEX_PATH)
+    run_budget_seconds = environ.get("RUN_BUDGET_SECONDS")
+    deadline_margin = float(environ.get(
+        "DEADLINE_MARGIN_SECONDS", DEFAULT_MARGIN_SECONDS))
+    change_cache_path = environ.get(
+        "CHANGE_CACHE_PATH", DEFAULT_CHANGE_CACHE_PATH)
+    raw_archive_dir = environ.get("RAW_ARCHIVE_DIR")
+    max_light_rows = int(environ.get(
+        "LIGHT_TRANSFORM_MAX_ROWS", DEFAULT_MAX_LIGHT_ROWS))
+    dimension_cache_path = environ.get(
+        "DIMENSION_CACHE_PATH", DEFAULT_DIMENSION_CACHE_PATH)
+    resync_seconds = float(environ.get(
+        "DIMENSION_RESYNC_SECONDS", DEFAULT_RESYNC_SECONDS))
+    quarantine_path = environ.get("QUARANTINE_PATH", DEFAULT_QUARANTINE_PATH)
+
+    owns = None
+    if shard is not None:
+        # Shards share the API's rate limit and keep their own state files
+        api_rate_limit /= shard.count
+        plant_index_path = shard.get_path(plant_index_path)
+        change_cache_path = shard.get_path(change_cache_path)
+        dimension_cache_path = shard.get_path(dimension_cache_path)
+        quarantine_path = shard.get_path(quarantine_path)
+        if raw_archive_dir:
+            raw_archive_dir = f"{raw_archive_dir}/shard-{shard.index}-of-{shard.count}"
+        owns = shard.owns
+
+    is_one_off = state is None
+    if is_one_off:
+        state = PipelineState()
+
+    if state.api_scheduler is None:
+        state.api_scheduler = create_api_scheduler(max_workers, api_rate_limit)
+    if state.plant_index is None:
+        state.plant_index = load_plant_index(plant_index_path, owns)
+    if state.change_cache is None:
+        state.change_cache = load_change_cache(change_cache_path)
+    if state.dimension_cache is None:
+        state.dimension_cache = load_dimension_cache(
+            dimension_cache_path, resync_seconds)
+    if state.archive is None and raw_archive_dir:
+        state.archive = RawArchive(raw_archive_dir)
+
+    result = {"shard": str(shard) if shard else None, "plants": 0, "readings": 0}
+    start = perf_counter()
+
+    deadline = get_run_deadline(
+        None, float(run_budget_seconds) if run_budget_seconds else None, deadline_margin)
+
+    try:
+        all_plants_data = get_all_plants_data_from_index(
+            api_path, state.plant_index, max_workers, state.api_scheduler, deadline,
+            state.archive)
+        if state.archive is not None:
+            state.archive.flush()
+        save_plant_index(state.plant_index, plant_index_path)
+        cleaned_plants_data = clean_unicode_from_plant_data(all_plants_data)
+
+        changed_plants_data = state.change_cache.filter_changed_plants(
+            cleaned_plants_data)
+
+        result["plants"] = len(all_plants_data)
+        result["extract_seconds"] = perf_counter() - start
 
-    all_plants_data = get_all_plants_data(api_path)
-    cleaned_plants_data = clean_unicode_from_plant_data(all_plants_data)
+        if not changed_plants_data:
+            print("No new readings since the last run.")
+        else:
+            start = perf_counter()
+            flatted_plant_data = flatten_data(changed_plants_data)
+            plant_df = build_plant_data(flatted_plant_data, max_light_rows)
+            quality_report = check_plant_data(plant_df)
+            plant_df = quality_report.accepted
+            result["quarantined"] = write_quarantine(quality_report, quarantine_path)
+            result["rule_counts"] = quality_report.counts
+            result["transform_seconds"] = perf_counter() - start
+            result["contact_cache_hit_rate"] = get_contact_cache_info()[
+                "email"]["hit_rate"]
 
-    flatted_plant_data = flatten_data(cleaned_plants_data)
-    plant_df = build_plant_dataframe(flatted_plant_data)
+            start = perf_counter()
+            state.conn = ensure_db_connection(state.conn, config)
+            result["dimension_rows"] = load_plant_data(
+                state.conn, plant_df, state.dimension_cache)
+            save_dimension_cache(state.dimension_cache, dimension_cache_path)
 
-    conn = get_db_connection(config)
+            state.change_cache.mark_plants_seen(changed_plants_data)
+            save_change_cache(state.change_cache, change_cache_path)
+            result["readings"] = len(plant_df)
+            result["load_seconds"] = perf_counter() - start
+    finally:
+        if is_one_off:
+            state.close()
+
+    result["deadline_reached"] = deadline is not None and deadline.reached()
+
+    return result
+
+
+def get_next_run_time(started_at: float, interval: float, now: float) -> float:
+    """
+    Returns when the next run is due on a fixed cadence. Runs are due at
+    `started_at + k * interval`, so time spent running doesn't push later runs back,
+    and runs missed while an earlier run overran are skipped rather than bunched up.
+
+    Args:
+        started_at (float): When the first run was due
+
+        interval (float): The number of seconds between runs
+
+        now (float): The current time
+
+    Returns:
+        float: The time of the next due run, always after `now`
+    """
+    runs_due = floor((now - started_at) / interval) + 1
+    return started_at + max(runs_due, 1) * interval
+
+
+def run_daemon(interval: float = DEFAULT_POLL_INTERVAL_SECONDS, shard: Shard = None,
+               stop_event: Event = None, clock: Callable[[], float] = monotonic,
+               run: Callable[[Shard, PipelineState], dict] = run_pipeline) -> int:
+    """
+    Runs the pipeline every `interval` seconds until `stop_event` is set, keeping
+    the connection, session and caches warm between runs. A failed run is
+    reported and its database connection dropped, and the daemon carries on.
+
+    Args:
+        interval (float): The number of seconds between the start of each run
+
+        shard (Shard): The slice of plant ids to process, or None for every plant
+
+        stop_event (Event): Set to stop after the current run, defaults to SIGINT/SIGTERM
+
+        clock (Callable): Returns the current time in seconds
+
+        run (Callable): Runs the pipeline once with the kept state
+
+    Returns:
+        int: The number of runs made
+    """
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+
+    if stop_event is None:
+        stop_event = Event()
+
+        def request_stop(signal_number, frame):
+            print("Stopping after the current run.")
+            stop_event.set()
+
+        signal(SIGINT, request_stop)
+        signal(SIGTERM, request_stop)
+
+    state = PipelineState()
+    started_at = clock()
+    runs = 0
+
+    try:
+        while not stop_event.is_set():
+            try:
+                print(run(shard, state))
+            except Exception as err:
+                print(f"Pipeline run failed: {err}")
+                state.close()
+            runs += 1
+
+            next_run = get_next_run_time(started_at, interval, clock())
+            stop_event.wait(max(next_run - clock(), 0))
+    finally:
+        state.close()
+
+    return runs
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shard", default=None,
+                        help="Only process one shard of plant ids, e.g. 3/8")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running, polling the API every --interval seconds")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="The number of seconds between daemon runs")
+    args = parser.parse_args()
+
+    load_dotenv()
 
-    insert_into_plant_origin_table(conn, plant_df)
-    insert_into_plant_table(conn, plant_df)
-    insert_into_botanist_table(conn, plant_df)
-    insert_into_water_history_table(conn, plant_df)
-    insert_into_reading_information_table(conn, plant_df)
+    shard = parse_shard_spec(args.shard)
 
-    conn.close()
+    if args.daemon:
+        interval = args.interval or float(environ.get(
+            "POLL_INTERVAL_SECONDS", DEFAULT_POLL_INTERVAL_SECONDS))
+        run_daemon(interval, shard)
+    else:
+        print(run_pipeline(shard))
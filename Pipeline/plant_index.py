@@ -0,0 +1,213 @@
+"""Pipeline Script: Keeps track of which plant ids the API has data for"""
+
+import json
+from time import time
+from typing import Callable
+
+DEFAULT_INDEX_PATH = "plant_index.json"
+INITIAL_ID_RANGE = 51
+FRONTIER_SIZE = 5
+MISSES_BEFORE_DEAD = 3
+DEAD_REPROBE_SECONDS = 60 * 60
+
+
+class PlantIndex:
+    """
+    A record of plant ids which return data (live) and those which return an error (dead).
+
+    Live ids are fetched on every run. Dead ids are only probed again once
+    `DEAD_REPROBE_SECONDS` have passed, and a small frontier of ids above the highest
+    live id is probed so that new plants are picked up without a code change.
+
+    When `owns` is given the index only covers the plant ids it accepts, which is how
+    a shard keeps an index of its own slice of the id space.
+    """
+
+    def __init__(self, live_ids: dict[int, int] = None, dead_ids: dict[int, float] = None,
+                 frontier_size: int = FRONTIER_SIZE, reprobe_seconds: float = DEAD_REPROBE_SECONDS,
+                 owns: Callable[[int], bool] = None):
+        """
+        Args:
+            live_ids (dict[int, int]): Live plant ids mapped to their number of consecutive misses
+
+            dead_ids (dict[int, float]): Dead plant ids mapped to when they were last probed
+
+            frontier_size (int): How many ids above the highest live id are probed
+
+            reprobe_seconds (float): How long a dead id is skipped for before it is probed again
+
+            owns (Callable): Returns whether a plant id belongs in this index, defaults to every id
+        """
+        self.live_ids = live_ids if live_ids is not None else {}
+        self.dead_ids = dead_ids if dead_ids is not None else {}
+        self.frontier_size = frontier_size
+        self.reprobe_seconds = reprobe_seconds
+        self.owns = owns if owns is not None else lambda plant_id: True
+
+    @property
+    def highest_live_id(self) -> int:
+        """The highest plant id known to be live, or -1 when there are none"""
+        return max(self.live_ids, default=-1)
+
+    def is_due(self, plant_id: int, now: float) -> bool:
+        """
+        Checks whether a plant id should be requested on this run
+
+        Args:
+            plant_id (int): The id of a plant
+
+            now (float): The current time as a unix timestamp
+
+        Returns:
+            bool: True if the id is live, unknown or a dead id due to be probed again
+        """
+        if plant_id in self.live_ids:
+            return True
+        last_probed = self.dead_ids.get(plant_id)
+        return last_probed is None or now - last_probed >= self.reprobe_seconds
+
+    def get_frontier_ids(self, now: float) -> list[int]:
+        """
+        Returns the ids just above the highest live id which are due to be probed
+
+        Args:
+            now (float): The current time as a unix timestamp
+
+        Returns:
+            list[int]: A sorted list of plant ids
+        """
+        frontier_ids = []
+        plant_id = self.highest_live_id + 1
+
+        while len(frontier_ids) < self.frontier_size:
+            if self.owns(plant_id):
+                frontier_ids.append(plant_id)
+            plant_id += 1
+
+        return [plant_id for plant_id in frontier_ids if self.is_due(plant_id, now)]
+
+    def get_ids_to_fetch(self, now: float = None) -> list[int]:
+        """
+        Returns every plant id which should be requested on this run
+
+        Args:
+            now (float): The current time as a unix timestamp, defaults to now
+
+        Returns:
+            list[int]: A sorted list of plant ids
+        """
+        if now is None:
+            now = time()
+
+        if not self.live_ids and not self.dead_ids:
+            candidates = set(filter(self.owns, range(INITIAL_ID_RANGE)))
+        else:
+            candidates = set(self.live_ids)
+            candidates.update(plant_id for plant_id in self.dead_ids
+                              if self.is_due(plant_id, now))
+
+        candidates.update(self.get_frontier_ids(now))
+
+        return sorted(candidates)
+
+    def record(self, plant_id: int, is_live: bool, now: float = None) -> None:
+        """
+        Records the outcome of requesting a plant id
+
+        A live id only becomes dead after `MISSES_BEFORE_DEAD` misses in a row, so a
+        single failed reading does not hide a plant for an hour.
+
+        Args:
+            plant_id (int): The id of the plant which was requested
+
+            is_live (bool): Whether the API returned data for the plant
+
+            now (float): The current time as a unix timestamp, defaults to now
+
+        Returns:
+            None
+        """
+        if now is None:
+            now = time()
+
+        if is_live:
+            self.live_ids[plant_id] = 0
+            self.dead_ids.pop(plant_id, None)
+        elif plant_id in self.live_ids:
+            self.live_ids[plant_id] += 1
+            if self.live_ids[plant_id] >= MISSES_BEFORE_DEAD:
+                del self.live_ids[plant_id]
+                self.dead_ids[plant_id] = now
+        else:
+            self.dead_ids[plant_id] = now
+
+    def to_dict(self) -> dict:
+        """
+        Returns the index as a JSON serialisable dict
+
+        Returns:
+            dict: A python dictionary of the live and dead plant ids
+        """
+        return {
+            "live": {str(plant_id): misses for plant_id, misses in self.live_ids.items()},
+            "dead": {str(plant_id): probed for plant_id, probed in self.dead_ids.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, owns: Callable[[int], bool] = None) -> "PlantIndex":
+        """
+        Builds an index from the output of `to_dict`
+
+        Args:
+            data (dict): A python dictionary of the live and dead plant ids
+
+            owns (Callable): Returns whether a plant id belongs in this index
+
+        Returns:
+            PlantIndex: The rebuilt index
+        """
+        return cls(
+            live_ids={int(plant_id): misses for plant_id,
+                      misses in data.get("live", {}).items()},
+            dead_ids={int(plant_id): probed for plant_id,
+                      probed in data.get("dead", {}).items()},
+            owns=owns
+        )
+
+
+def load_plant_index(file_path: str, owns: Callable[[int], bool] = None) -> PlantIndex:
+    """
+    Loads a plant index from a .json file, or starts a new one if there isn't one
+
+    Args:
+        file_path (str): A string containing the path to the index file
+
+        owns (Callable): Returns whether a plant id belongs in the index, defaults to every id
+
+    Returns:
+        PlantIndex: The stored index, or an empty index
+    """
+    try:
+        with open(file_path, "r") as index_file:
+            return PlantIndex.from_dict(json.load(index_file), owns)
+    except FileNotFoundError:
+        return PlantIndex(owns=owns)
+    except json.JSONDecodeError as e:
+        print(f"Error loading plant index, starting a new one: {e}")
+        return PlantIndex(owns=owns)
+
+
+def save_plant_index(index: PlantIndex, file_path: str) -> None:
+    """
+    Saves a plant index to a .json file
+
+    Args:
+        index (PlantIndex): The index to save
+
+        file_path (str): A string containing the path to the index file
+
+    Returns:
+        None
+    """
+    with open(file_path, "w") as index_file:
+        json.dump(index.to_dict(), index_file)
@@ -0,0 +1,206 @@
+"""Pipeline Script: Checks transformed plant data against data-quality rules, quarantining rows which fail"""
+
+from datetime import datetime, timedelta, timezone
+from functools import reduce
+import json
+from typing import NamedTuple, TYPE_CHECKING
+
+from light_transform import PlantTable, is_missing
+
+# pandas is only imported to check DataFrames, so small batches can be checked
+# as a PlantTable without it
+if TYPE_CHECKING:
+    from pandas import DataFrame, Series
+
+DEFAULT_QUARANTINE_PATH = "quarantine.ndjson"
+# Allows for clock differences between the sensors and this machine
+FUTURE_TOLERANCE = timedelta(minutes=5)
+
+
+class QualityRule(NamedTuple):
+    """
+    A check on one column of the transformed plant data. `kind` is one of
+    "required" (the value can't be missing), "range" (a value must be between
+    `minimum` and `maximum`) or "not_future" (a time can't be later than now).
+    Missing values only fail "required" rules.
+    """
+    code: str
+    column: str
+    kind: str
+    minimum: float = None
+    maximum: float = None
+
+
+# Temperature outliers aren't rejected here, as the transform already replaces
+# them with None
+QUALITY_RULES = [
+    QualityRule("missing_recording_time", "recording_time", "required"),
+    QualityRule("missing_last_watered", "last_watered", "required"),
+    QualityRule("missing_botanist", "botanist_name", "required"),
+    QualityRule("soil_moisture_out_of_range", "soil_moisture", "range", 0, 100),
+    QualityRule("recording_time_in_future", "recording_time", "not_future"),
+    QualityRule("last_watered_in_future", "last_watered", "not_future")
+]
+
+
+class QualityReport(NamedTuple):
+    """
+    The result of checking plant data: the rows which passed every rule, the rows
+    which failed any, the codes of the rules each rejected row failed, and the
+    number of rows which failed each rule
+    """
+    accepted: "DataFrame | PlantTable"
+    rejected: "DataFrame | PlantTable"
+    reasons: list[list[str]]
+    counts: dict[str, int]
+
+
+def check_value(rule: QualityRule, value: object, now: datetime) -> bool:
+    """
+    Checks one value against a rule
+
+    Args:
+        rule (QualityRule): The rule to check
+
+        value (object): A value from the rule's column
+
+        now (datetime): The latest time which isn't in the future
+
+    Returns:
+        bool: True if the value fails the rule
+    """
+    if rule.kind == "required":
+        return is_missing(value)
+    if is_missing(value):
+        return False
+    if rule.kind == "range":
+        return value < rule.minimum or value > rule.maximum
+    if rule.kind == "not_future":
+        return value > now
+    raise ValueError(f"Unknown rule kind: {rule.kind}")
+
+
+def get_rule_mask(rule: QualityRule, column: "Series", now: datetime) -> "Series":
+    """
+    Checks a whole column against a rule at once
+
+    Args:
+        rule (QualityRule): The rule to check
+
+        column (Series): The rule's column of a pandas DataFrame
+
+        now (datetime): The latest time which isn't in the future
+
+    Returns:
+        Series: True for each row which fails the rule
+    """
+    import pandas as pd
+
+    if rule.kind == "required":
+        return column.isna()
+    if rule.kind == "range":
+        values = pd.to_numeric(column, errors="coerce")
+        failed = (values < rule.minimum) | (values > rule.maximum)
+    elif rule.kind == "not_future":
+        values = column
+        if getattr(column.dtype, "tz", None) is None:
+            values = pd.to_datetime(column, utc=True, errors="coerce")
+        failed = values > pd.Timestamp(now)
+    else:
+        raise ValueError(f"Unknown rule kind: {rule.kind}")
+
+    return failed.fillna(False).astype(bool)
+
+
+def check_plant_data(data: "DataFrame | PlantTable", rules: list[QualityRule] = QUALITY_RULES,
+                     now: datetime = None) -> QualityReport:
+    """
+    Checks every row of transformed plant data against every rule in one pass.
+    DataFrames are checked a column at a time, using vectorised masks.
+
+    Args:
+        data (DataFrame | PlantTable): The transformed data for all plants
+
+        rules (list[QualityRule]): The rules to check
+
+        now (datetime): The current time in UTC, defaults to the system time
+
+    Returns:
+        QualityReport: The accepted and rejected rows, and why rows were rejected
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    now = now + FUTURE_TOLERANCE
+
+    if isinstance(data, PlantTable):
+        failures = {rule.code: [check_value(rule, value, now)
+                                for value in data.get_column(rule.column)]
+                    for rule in rules}
+        rejected_rows = [position for position, failed in enumerate(zip(*failures.values()))
+                         if any(failed)] if failures else []
+        rejected_set = set(rejected_rows)
+        accepted = data.take([position for position in range(len(data))
+                              if position not in rejected_set])
+        rejected = data.take(rejected_rows)
+        counts = {code: sum(failed) for code, failed in failures.items()}
+    else:
+        import numpy as np
+
+        failures = {rule.code: get_rule_mask(rule, data[rule.column], now).to_numpy()
+                    for rule in rules}
+        rejected_mask = reduce(np.logical_or, failures.values(),
+                               np.zeros(len(data), dtype=bool))
+        rejected_rows = rejected_mask.nonzero()[0].tolist()
+        accepted = data[~rejected_mask]
+        rejected = data[rejected_mask]
+        counts = {code: int(failed.sum()) for code, failed in failures.items()}
+
+    reasons = [[code for code, failed in failures.items() if failed[position]]
+               for position in rejected_rows]
+
+    return QualityReport(accepted, rejected, reasons, counts)
+
+
+def get_quarantine_records(report: QualityReport) -> list[dict]:
+    """
+    Returns each rejected row as a dictionary, with the rules it failed under "reasons"
+
+    Args:
+        report (QualityReport): The output of `check_plant_data`
+
+    Returns:
+        list[dict]: One dictionary per rejected row, with missing values as None
+    """
+    rejected = report.rejected
+
+    if isinstance(rejected, PlantTable):
+        rows = rejected.rows
+    else:
+        rejected = rejected.astype(object)
+        rows = rejected.where(rejected.notna(), None).values.tolist()
+
+    return [{**dict(zip(rejected.columns, row)), "reasons": reasons}
+            for row, reasons in zip(rows, report.reasons)]
+
+
+def write_quarantine(report: QualityReport, file_path: str = DEFAULT_QUARANTINE_PATH) -> int:
+    """
+    Appends the rejected rows to a newline-delimited JSON quarantine file
+
+    Args:
+        report (QualityReport): The output of `check_plant_data`
+
+        file_path (str): A string containing the path to the quarantine file
+
+    Returns:
+        int: The number of rows written
+    """
+    records = get_quarantine_records(report)
+    if not records:
+        return 0
+
+    with open(file_path, "a") as quarantine_file:
+        for record in records:
+            quarantine_file.write(json.dumps(record, default=str) + "\n")
+
+    return len(records)
@@ -0,0 +1,307 @@
+"""Pipeline Script: Client-side rate limiting and adaptive concurrency for the plants API"""
+
+from contextlib import contextmanager
+from threading import Condition, Lock
+from time import monotonic, sleep
+from typing import Callable, Iterator
+
+DEFAULT_RATE_LIMIT = 20.0
+DEFAULT_BURST = 10
+DEFAULT_LATENCY_TARGET_SECONDS = 2.0
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN_SECONDS = 1.0
+THROTTLED_STATUS_CODES = {429}
+
+# Schedulers live for the lifetime of the module so that warm Lambda invocations
+# keep their learned concurrency limit, with one per rate so shards stay paced
+_schedulers: dict[tuple, "ApiScheduler"] = {}
+_schedulers_lock = Lock()
+
+
+class TokenBucket:
+    """
+    Allows at most `rate` requests per second on average, with bursts of up to
+    `capacity` requests. Safe to share between threads.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_LIMIT, capacity: float = DEFAULT_BURST,
+                 clock: Callable[[], float] = monotonic, sleeper: Callable[[float], None] = sleep):
+        """
+        Args:
+            rate (float): The number of tokens added per second
+
+            capacity (float): The most tokens the bucket can hold
+
+            clock (Callable): Returns the current time in seconds
+
+            sleeper (Callable): Waits for a number of seconds
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleeper
+        self._updated = clock()
+        self._lock = Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens +
+                           (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a token if one is available without waiting
+
+        Returns:
+            bool: True if a token was taken
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until one is available
+
+        Returns:
+            float: The number of seconds spent waiting
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+
+            self._sleep(wait)
+            waited += wait
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits how many requests are in flight, using additive-increase/multiplicative-decrease.
+
+    Every healthy response raises the limit by 1/limit, so it grows by roughly one per
+    round of requests. A throttled, failed or slow response halves it, at most once per
+    cooldown so that a burst of failures from the same round only counts once.
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int = 1, max_limit: int = None,
+                 latency_target: float = DEFAULT_LATENCY_TARGET_SECONDS,
+                 decrease_factor: float = DECREASE_FACTOR,
+                 cooldown: float = DECREASE_COOLDOWN_SECONDS,
+                 clock: Callable[[], float] = monotonic):
+        """
+        Args:
+            initial_limit (int): The number of requests allowed in flight to begin with
+
+            min_limit (int): The limit never drops below this
+
+            max_limit (int): The limit never rises above this, defaults to no ceiling
+
+            latency_target (float): Responses slower than this many seconds count as congestion
+
+            decrease_factor (float): The limit is multiplied by this when backing off
+
+            cooldown (float): The minimum number of seconds between two decreases
+
+            clock (Callable): Returns the current time in seconds
+        """
+        if min_limit < 1 or initial_limit < min_limit:
+            raise ValueError("limits must be at least 1 and initial_limit >= min_limit")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._clock = clock
+        self._last_decrease = None
+        self._condition = Condition()
+
+    @property
+    def limit(self) -> int:
+        """The number of requests currently allowed in flight"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests currently in flight"""
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """
+        Waits until there is room for another request in flight
+
+        Returns:
+            None
+        """
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        """
+        Marks a request as no longer in flight
+
+        Returns:
+            None
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """
+        Records a healthy response, raising the limit unless it was slow
+
+        Args:
+            latency (float): How many seconds the request took
+
+        Returns:
+            None
+        """
+        if latency > self.latency_target:
+            self.record_failure()
+            return
+
+        with self._condition:
+            self._limit += 1 / self._limit
+            if self.max_limit is not None:
+                self._limit = min(self._limit, self.max_limit)
+            self._condition.notify_all()
+
+    def record_failure(self) -> None:
+        """
+        Records a throttled, failed or slow response, lowering the limit
+
+        Returns:
+            None
+        """
+        with self._condition:
+            now = self._clock()
+            if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+
+
+class ApiScheduler:
+    """
+    Schedules requests to the plants API through a token bucket and an adaptive
+    concurrency limit. Share one scheduler between all requests to the same API.
+    """
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, bucket: TokenBucket = None):
+        """
+        Args:
+            limiter (AdaptiveConcurrencyLimiter): Limits the number of requests in flight
+
+            bucket (TokenBucket): Limits the request rate, or None for no rate limit
+        """
+        self.limiter = limiter
+        self.bucket = bucket
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Waits for a concurrency slot and a token, holding the slot until the block exits
+        """
+        self.limiter.acquire()
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            yield
+        finally:
+            self.limiter.release()
+
+    def record_response(self, status_code: int, latency: float) -> None:
+        """
+        Feeds the outcome of a request back into the concurrency limit
+
+        Args:
+            status_code (int): The HTTP status code of the response
+
+            latency (float): How many seconds the request took
+
+        Returns:
+            None
+        """
+        if status_code in THROTTLED_STATUS_CODES or status_code >= 500:
+            self.limiter.record_failure()
+        else:
+            self.limiter.record_success(latency)
+
+    def record_error(self) -> None:
+        """
+        Records a request which failed without a response, such as a timeout
+
+        Returns:
+            None
+        """
+        self.limiter.record_failure()
+
+
+def create_api_scheduler(max_workers: int, rate_limit: float = DEFAULT_RATE_LIMIT,
+                         burst: int = DEFAULT_BURST) -> ApiScheduler:
+    """
+    Creates a scheduler which starts at half of `max_workers` requests in flight and
+    adapts between one and `max_workers`
+
+    Args:
+        max_workers (int): The most requests ever allowed in flight at once
+
+        rate_limit (float): The average number of requests per second allowed,
+        or None for no rate limit
+
+        burst (int): The number of requests which may be made back to back
+
+    Returns:
+        ApiScheduler: A new scheduler
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=max(1, max_workers // 2),
+                                         max_limit=max_workers)
+    bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+
+    return ApiScheduler(limiter, bucket)
+
+
+def get_api_scheduler(max_workers: int, rate_limit: float = DEFAULT_RATE_LIMIT,
+                      burst: int = DEFAULT_BURST) -> ApiScheduler:
+    """
+    Returns a shared scheduler for the given settings, creating it on first use, so
+    an invocation with a different rate limit, such as one shard of several, never
+    reuses a scheduler paced for another rate
+
+    Args:
+        max_workers (int): The most requests ever allowed in flight at once
+
+        rate_limit (float): The average number of requests per second allowed,
+        or None for no rate limit
+
+        burst (int): The number of requests which may be made back to back
+
+    Returns:
+        ApiScheduler: The scheduler for these settings
+    """
+    key = (max_workers, rate_limit, burst)
+
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = create_api_scheduler(max_workers, rate_limit, burst)
+
+        return _schedulers[key]
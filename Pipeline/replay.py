@@ -0,0 +1,197 @@
+"""Pipeline Script: Re-runs transform and load over the raw response archive"""
+
+import argparse
+from os import environ
+from time import perf_counter
+from typing import Iterator
+
+from dotenv import load_dotenv
+from psycopg2.extensions import connection
+
+from columnar import iter_plant_column_batches
+from extract import process_plant_data_from_api, clean_unicode_from_plant
+from raw_archive import iter_archive, DEFAULT_ARCHIVE_DIR
+from quality import check_plant_data, write_quarantine
+from transform import iter_batch_dataframes
+from load import (
+    DimensionCache,
+    DEFAULT_PAGE_SIZE,
+    get_db_connection,
+    load_plant_data,
+    switch_to_schema
+)
+
+DEFAULT_REPLAY_BATCH_SIZE = 5000
+
+
+def iter_archived_raw_plants_data(directory: str, since: str = None,
+                                  until: str = None) -> Iterator[dict]:
+    """
+    Streams archived raw responses, skipping readings outside the time range
+
+    Args:
+        directory (str): The directory the archive segments were written to
+
+        since (str): Only replay readings taken at or after this time, e.g. "2023-01-01 00:00:00"
+
+        until (str): Only replay readings taken before this time
+
+    Returns:
+        Iterator[dict]: The raw response for each archived reading, including errors
+    """
+    for raw_plant_data in iter_archive(directory):
+        recording_taken = raw_plant_data.get("recording_taken")
+        if since is not None and (recording_taken is None or recording_taken < since):
+            continue
+        if until is not None and (recording_taken is None or recording_taken >= until):
+            continue
+
+        yield raw_plant_data
+
+
+def iter_archived_plants_data(directory: str, since: str = None,
+                              until: str = None) -> Iterator[dict]:
+    """
+    Streams archived responses through `process_plant_data_from_api` and
+    `clean_unicode_from_plant`, skipping errors and readings outside the time range
+
+    Args:
+        directory (str): The directory the archive segments were written to
+
+        since (str): Only replay readings taken at or after this time, e.g. "2023-01-01 00:00:00"
+
+        until (str): Only replay readings taken before this time
+
+    Returns:
+        Iterator[dict]: Processed data for each archived reading
+    """
+    for raw_plant_data in iter_archived_raw_plants_data(directory, since, until):
+        processed_plant_data = process_plant_data_from_api(raw_plant_data)
+        if processed_plant_data:
+            yield clean_unicode_from_plant(processed_plant_data)
+
+
+def replay_archive(directory: str, conn_postgres: connection = None, schema: str = None,
+                   batch_size: int = DEFAULT_REPLAY_BATCH_SIZE,
+                   since: str = None, until: str = None, max_workers: int = 1,
+                   quarantine_path: str = None, page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+    """
+    Transforms archived responses in batches and loads each batch into the database.
+    Responses go straight into column buffers, without the nested and flat dict built
+    for each plant on the per-minute path. Rows are bulk-loaded a page per statement,
+    and dimension rows are only inserted once for the whole replay.
+
+    Args:
+        directory (str): The directory the archive segments were written to
+
+        conn_postgres (connection): A connection to a Postgres database, or None to
+        only transform the readings
+
+        schema (str): The schema to load into, or None for the connection's default
+
+        batch_size (int): The number of readings transformed and loaded at once
+
+        since (str): Only replay readings taken at or after this time
+
+        until (str): Only replay readings taken before this time
+
+        max_workers (int): The number of processes transforming batches, or None
+        for one per core
+
+        quarantine_path (str): The file rows which fail a quality rule are written
+        to, or None to only count them
+
+        page_size (int): The number of rows inserted by each statement
+
+    Returns:
+        dict: The number of batches and rows replayed, the rows which failed each
+        quality rule, the seconds spent reading and transforming and loading, and
+        the rows per second overall and while loading
+    """
+    if conn_postgres is not None and schema:
+        switch_to_schema(conn_postgres, schema)
+
+    dimension_cache = DimensionCache()
+    result = {"batches": 0, "rows": 0, "quarantined": 0, "rule_counts": {},
+              "transform_seconds": 0.0, "load_seconds": 0.0}
+    start = perf_counter()
+
+    plant_columns = iter_plant_column_batches(
+        iter_archived_raw_plants_data(directory, since, until), batch_size)
+    plant_dfs = iter_batch_dataframes(plant_columns, max_workers)
+
+    while True:
+        transform_start = perf_counter()
+        plant_df = next(plant_dfs, None)
+        if plant_df is None:
+            result["transform_seconds"] += perf_counter() - transform_start
+            break
+
+        quality_report = check_plant_data(plant_df)
+        plant_df = quality_report.accepted
+        result["quarantined"] += len(quality_report.reasons)
+        for code, count in quality_report.counts.items():
+            result["rule_counts"][code] = result["rule_counts"].get(code, 0) + count
+        if quarantine_path is not None:
+            write_quarantine(quality_report, quarantine_path)
+        result["transform_seconds"] += perf_counter() - transform_start
+
+        if conn_postgres is not None:
+            load_start = perf_counter()
+            load_plant_data(conn_postgres, plant_df, dimension_cache, page_size)
+            result["load_seconds"] += perf_counter() - load_start
+
+        result["batches"] += 1
+        result["rows"] += len(plant_df)
+
+    result["seconds"] = perf_counter() - start
+    result["rows_per_second"] = result["rows"] / result["seconds"] if result["seconds"] else 0.0
+    result["load_rows_per_second"] = (result["rows"] / result["load_seconds"]
+                                      if result["load_seconds"] else 0.0)
+
+    return result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--archive-dir", default=None,
+                        help="The archive directory, defaults to RAW_ARCHIVE_DIR")
+    parser.add_argument("--schema", default=None,
+                        help="The schema to load into, defaults to the connection's search path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_REPLAY_BATCH_SIZE)
+    parser.add_argument("--since", default=None,
+                        help="Only replay readings taken at or after this time")
+    parser.add_argument("--until", default=None,
+                        help="Only replay readings taken before this time")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="The number of processes transforming batches, 0 for one per core")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help="The number of rows inserted by each statement")
+    parser.add_argument("--quarantine", default=None,
+                        help="The file rows which fail a quality rule are written to")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Transform the readings without loading them")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    config = environ
+    directory = args.archive_dir or environ.get(
+        "RAW_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR)
+
+    conn = None if args.dry_run else get_db_connection(config)
+
+    try:
+        result = replay_archive(directory, conn, args.schema, args.batch_size,
+                                args.since, args.until, args.workers or None,
+                                args.quarantine, args.page_size)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    print(f"Replayed {result['rows']} rows in {result['batches']} batches in "
+          f"{result['seconds']:.2f}s ({result['rows_per_second']:.0f} rows/sec, "
+          f"transform {result['transform_seconds']:.2f}s, load {result['load_seconds']:.2f}s "
+          f"at {result['load_rows_per_second']:.0f} rows/sec), "
+          f"{result['quarantined']} rows quarantined: {result['rule_counts']}")
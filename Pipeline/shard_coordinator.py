@@ -0,0 +1,97 @@
+"""Pipeline Script: Runs the pipeline as parallel shards and collects their results"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Callable
+
+from dotenv import load_dotenv
+
+from pipeline import run_pipeline
+from sharding import Shard, get_all_shards
+
+
+def run_shard(shard: Shard, run: Callable[[Shard], dict] = run_pipeline) -> dict:
+    """
+    Runs the pipeline for one shard, timing it and catching any error so that one
+    failing shard does not stop the others from reporting
+
+    Args:
+        shard (Shard): The slice of plant ids to process
+
+        run (Callable): Runs the pipeline for a shard and returns its summary
+
+    Returns:
+        dict: The summary of the shard's run, with its wall time and any error
+    """
+    start = perf_counter()
+
+    try:
+        result = run(shard)
+    except Exception as err:
+        print(f"Shard {shard} failed: {err}")
+        result = {"shard": str(shard), "error": repr(err)}
+
+    result["wall_seconds"] = perf_counter() - start
+
+    return result
+
+
+def run_shards(shard_count: int, max_processes: int = None,
+               run: Callable[[Shard], dict] = run_pipeline) -> list[dict]:
+    """
+    Fans out every shard as a local process and waits for them all to finish
+
+    Args:
+        shard_count (int): The number of shards to split the plant ids into
+
+        max_processes (int): The most shards run at once, defaults to `shard_count`
+
+        run (Callable): Runs the pipeline for a shard and returns its summary
+
+    Returns:
+        list[dict]: The summary of each shard's run, in shard order
+    """
+    shards = get_all_shards(shard_count)
+
+    with ProcessPoolExecutor(max_workers=max_processes or shard_count) as executor:
+        return list(executor.map(run_shard, shards, [run] * len(shards)))
+
+
+def format_shard_results(results: list[dict]) -> str:
+    """
+    Formats the shard summaries as a table, with a total row
+
+    Args:
+        results (list[dict]): The output of `run_shards`
+
+    Returns:
+        str: A table with one row per shard
+    """
+    header = f"{'shard':>8} {'plants':>7} {'readings':>9} {'seconds':>8}  error"
+    rows = [header]
+
+    for result in results:
+        rows.append(f"{result['shard']:>8} {result.get('plants', 0):>7} "
+                    f"{result.get('readings', 0):>9} {result['wall_seconds']:>8.2f}  "
+                    f"{result.get('error', '')}".rstrip())
+
+    rows.append(f"{'total':>8} {sum(result.get('plants', 0) for result in results):>7} "
+                f"{sum(result.get('readings', 0) for result in results):>9} "
+                f"{max((result['wall_seconds'] for result in results), default=0):>8.2f}")
+
+    return "\n".join(rows)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shards", type=int, default=4,
+                        help="The number of shards to split the plant ids into")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="The most shards run at once, defaults to one per shard")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    print(format_shard_results(run_shards(args.shards, args.processes)))
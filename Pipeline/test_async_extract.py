@@ -0,0 +1,144 @@
+"""Test Script: Tests async_extract.py"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import aiohttp
+
+from async_extract import (
+    get_backoff_delay,
+    get_plant_data_from_api,
+    get_all_plants_data
+)
+
+
+class MockResponse:
+    """A stand-in for an aiohttp response used as an async context manager"""
+
+    def __init__(self, status: int, data: dict = None, delay: float = 0,
+                 error: Exception = None):
+        self.status = status
+        self.data = data
+        self.delay = delay
+        self.error = error
+
+    async def __aenter__(self):
+        if self.delay:
+            raise asyncio.TimeoutError()
+        if isinstance(self.error, aiohttp.ClientError):
+            raise self.error
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def json(self, content_type=None):
+        if isinstance(self.error, ValueError):
+            raise self.error
+        return self.data
+
+
+class MockSession:
+    """A stand-in for an aiohttp session which replays a list of responses"""
+
+    def __init__(self, responses: list[MockResponse]):
+        self.responses = responses
+        self.call_count = 0
+
+    def get(self, url, timeout=None):
+        response = self.responses[min(self.call_count, len(self.responses) - 1)]
+        self.call_count += 1
+        return response
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def test_get_backoff_delay_is_capped():
+    """
+    Test `get_backoff_delay` never waits longer than the cap
+    """
+    for attempt in range(10):
+        assert 0 <= get_backoff_delay(attempt, base=0.5, cap=2) <= 2
+
+
+def test_get_plant_data_from_api_returns_json(mock_api_data):
+    """
+    Test `get_plant_data_from_api` returns the decoded response on success
+    """
+    session = MockSession([MockResponse(200, mock_api_data)])
+
+    result = asyncio.run(get_plant_data_from_api(0, "mock_api_path", session))
+
+    assert result == mock_api_data
+    assert session.call_count == 1
+
+
+def test_get_plant_data_from_api_retries_server_errors_and_timeouts(mock_api_data):
+    """
+    Test `get_plant_data_from_api` retries 5xx responses and timeouts before succeeding
+    """
+    session = MockSession([MockResponse(503), MockResponse(200, delay=1),
+                           MockResponse(200, mock_api_data)])
+
+    result = asyncio.run(get_plant_data_from_api(
+        0, "mock_api_path", session, backoff_base=0))
+
+    assert result == mock_api_data
+    assert session.call_count == 3
+
+
+def test_get_plant_data_from_api_gives_up_after_max_retries():
+    """
+    Test `get_plant_data_from_api` returns an error dict once retries are exhausted
+    """
+    session = MockSession([MockResponse(500)])
+
+    result = asyncio.run(get_plant_data_from_api(
+        0, "mock_api_path", session, max_retries=2, backoff_base=0))
+
+    assert "error" in result
+    assert session.call_count == 3
+
+
+def test_get_plant_data_from_api_returns_error_for_malformed_json():
+    """
+    Test `get_plant_data_from_api` returns an error dict, without retrying, when the
+    body isn't valid JSON
+    """
+    session = MockSession([MockResponse(
+        200, error=json.JSONDecodeError("truncated", "{", 1))])
+
+    result = asyncio.run(get_plant_data_from_api(0, "mock_api_path", session))
+
+    assert result["plant_id"] == 0
+    assert "JSONDecodeError" in result["error"]
+    assert session.call_count == 1
+
+
+def test_get_plant_data_from_api_retries_connection_errors(mock_api_data):
+    """
+    Test `get_plant_data_from_api` retries a connection error before succeeding
+    """
+    session = MockSession([MockResponse(200, error=aiohttp.ClientConnectionError("reset")),
+                           MockResponse(200, mock_api_data)])
+
+    result = asyncio.run(get_plant_data_from_api(
+        0, "mock_api_path", session, backoff_base=0))
+
+    assert result == mock_api_data
+    assert session.call_count == 2
+
+
+def test_get_all_plants_data_keeps_plant_order(mock_api_data, mock_nested_data):
+    """
+    Test `get_all_plants_data` returns processed data for every plant
+    """
+    with patch("aiohttp.ClientSession", return_value=MockSession([MockResponse(200, mock_api_data)])):
+        result = asyncio.run(get_all_plants_data("mock_api_path", 5))
+
+    assert result == [mock_nested_data] * 51
@@ -0,0 +1,57 @@
+"""Test Script: Testing functions from botanist_contacts.py"""
+
+import pytest
+
+from botanist_contacts import (
+    get_email,
+    get_phone_number,
+    normalize_botanist_email,
+    normalize_botanist_phone_number,
+    get_contact_cache_info,
+    clear_contact_caches
+)
+
+
+@pytest.mark.parametrize("phone_number,expected_result", [
+    ("001.251-701-7428x7358", "251-701-7428"),
+    ("531)160(8892x4734", "531-160-8892"),
+    ("none", None),
+    (None, None)
+])
+def test_get_phone_number(phone_number, expected_result):
+    """
+    Test `get_phone_number` extracts and normalises phone numbers
+    """
+    assert get_phone_number(phone_number) == expected_result
+
+
+@pytest.mark.parametrize("email,expected_result", [
+    ("Contact: mock@example.com (work)", "mock@example.com"),
+    ("no email", None),
+    (float("nan"), None)
+])
+def test_get_email(email, expected_result):
+    """
+    Test `get_email` extracts email addresses
+    """
+    assert get_email(email) == expected_result
+
+
+def test_normalize_botanist_contacts_caches_raw_strings():
+    """
+    Test each raw string is only normalised once, and the hit rate is reported
+    """
+    clear_contact_caches()
+
+    for _ in range(4):
+        assert normalize_botanist_email("mock@example.com") == "mock@example.com"
+        assert normalize_botanist_phone_number(
+            "001.251-701-7428x7358") == "251-701-7428"
+    assert normalize_botanist_email(None) is None
+
+    cache_info = get_contact_cache_info()
+
+    assert cache_info["email"]["misses"] == 1
+    assert cache_info["email"]["hits"] == 3
+    assert cache_info["email"]["hit_rate"] == 0.75
+    assert cache_info["phone_number"]["size"] == 1
@@ -0,0 +1,62 @@
+"""Test Script: Testing functions from change_detection.py"""
+
+import os
+import tempfile
+
+from change_detection import (
+    get_plant_content_hash,
+    PlantChangeCache,
+    load_change_cache,
+    save_change_cache
+)
+
+
+def test_get_plant_content_hash_ignores_key_order(mock_nested_data):
+    """
+    Test `get_plant_content_hash` gives the same hash for the same content
+    """
+    reordered = dict(reversed(list(mock_nested_data.items())))
+
+    assert get_plant_content_hash(
+        mock_nested_data) == get_plant_content_hash(reordered)
+
+
+def test_unseen_plants_have_changed(mock_nested_data):
+    """
+    Test plants the cache hasn't seen are kept
+    """
+    cache = PlantChangeCache()
+
+    assert cache.filter_changed_plants([mock_nested_data]) == [mock_nested_data]
+
+
+def test_seen_plants_are_dropped_until_they_change(mock_nested_data):
+    """
+    Test plants are dropped once marked as seen, and kept again when a new reading arrives
+    """
+    cache = PlantChangeCache()
+    cache.mark_plants_seen([mock_nested_data])
+
+    assert cache.filter_changed_plants([mock_nested_data]) == []
+
+    new_reading = {**mock_nested_data, "recording_time": "2023-01-01 00:01:00"}
+    assert cache.filter_changed_plants([new_reading]) == [new_reading]
+
+    new_content = {**mock_nested_data, "temperature": 12.5}
+    assert cache.filter_changed_plants([new_content]) == [new_content]
+
+
+def test_save_and_load_change_cache_round_trip(mock_nested_data):
+    """
+    Test a cache saved to file still recognises the plants it has seen
+    """
+    cache = PlantChangeCache()
+    cache.mark_plants_seen([mock_nested_data])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = os.path.join(temp_dir, "cache.json")
+        save_change_cache(cache, cache_path)
+        result = load_change_cache(cache_path)
+
+    assert result.last_seen == cache.last_seen
+    assert result.filter_changed_plants([mock_nested_data]) == []
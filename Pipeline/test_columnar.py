@@ -0,0 +1,96 @@
+"""Test Script: Testing functions from columnar.py"""
+
+import numpy as np
+import pandas as pd
+
+from extract import process_plant_data_from_api, clean_unicode_from_plant_data
+from transform import flatten_data, build_plant_dataframe
+from columnar import PlantColumnBuffer, build_plant_columns, iter_plant_column_batches
+
+
+def test_build_plant_columns_skips_errors(mock_api_data):
+    """
+    Test `build_plant_columns` leaves out error responses
+    """
+    buffer = build_plant_columns([mock_api_data, {"error": "plant not found"}])
+
+    assert len(buffer) == 1
+
+
+def test_to_columns_uses_typed_arrays(mock_api_data):
+    """
+    Test `PlantColumnBuffer.to_columns` returns numeric columns as numpy arrays
+    """
+    buffer = PlantColumnBuffer()
+    buffer.append_raw_plant_data(mock_api_data)
+    columns = buffer.to_columns()
+
+    assert columns["plant_id"].dtype == np.int64
+    assert columns["soil_moisture"].dtype == np.float64
+    assert columns["plant_latitude"] == ["0.000"]
+    assert columns["plant_location"] == ["Mock Country"]
+
+
+def test_to_columns_keeps_values_arrays_cannot_hold(mock_api_data):
+    """
+    Test `PlantColumnBuffer.to_columns` falls back to the raw values for a missing
+    plant id or a sensor value sent as text, and uses NaN for a missing sensor value
+    """
+    buffer = build_plant_columns([
+        mock_api_data,
+        dict(mock_api_data, plant_id=None, soil_moisture="12.5", temperature=None)])
+    columns = buffer.to_columns()
+
+    assert columns["plant_id"] == [mock_api_data["plant_id"], None]
+    assert columns["soil_moisture"] == [mock_api_data["soil_moisture"], "12.5"]
+    assert columns["temperature"].dtype == np.float64
+    assert np.isnan(columns["temperature"][1])
+
+
+def test_iter_plant_column_batches_skips_errors(mock_api_data):
+    """
+    Test `iter_plant_column_batches` fills each batch with plants, not counting errors
+    """
+    raw_data = [dict(mock_api_data, plant_id=plant_id) for plant_id in range(5)]
+    raw_data.insert(1, {"error": "plant not found"})
+
+    batches = list(iter_plant_column_batches(raw_data, 2))
+
+    assert [batch["plant_id"].tolist() for batch in batches] == [[0, 1], [2, 3], [4]]
+
+
+def test_columnar_dataframe_matches_dict_path(mock_api_data):
+    """
+    Test the columnar path builds the same DataFrame as the nested dict path
+    """
+    missing_temperature = dict(mock_api_data, plant_id=1, temperature=None,
+                               name=u"Mock \u2018Name\u2019")
+    raw_data = [mock_api_data, missing_temperature]
+
+    processed_data = [process_plant_data_from_api(plant) for plant in raw_data]
+    expected = build_plant_dataframe(
+        flatten_data(clean_unicode_from_plant_data(processed_data)))
+    result = build_plant_dataframe(build_plant_columns(raw_data).to_columns())
+
+    expected = expected.drop(columns=["plant_origin"])
+    pd.testing.assert_frame_equal(
+        result[expected.columns], expected, check_dtype=False)
+
+
+def test_columnar_compact_dataframe_matches_dict_path(mock_api_data):
+    """
+    Test the columnar path keeps a plant without an id and coerces sensor values
+    the same way as the nested dict path
+    """
+    raw_data = [mock_api_data,
+                dict(mock_api_data, plant_id=None, soil_moisture="12.5"),
+                dict(mock_api_data, plant_id=2, soil_moisture="not a number")]
+
+    processed_data = [process_plant_data_from_api(plant) for plant in raw_data]
+    expected = build_plant_dataframe(
+        flatten_data(clean_unicode_from_plant_data(processed_data)), compact=True)
+    result = build_plant_dataframe(
+        build_plant_columns(raw_data).to_columns(), compact=True)
+
+    pd.testing.assert_frame_equal(
+        result[expected.columns], expected, check_dtype=False)
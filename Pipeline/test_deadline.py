@@ -0,0 +1,57 @@
+"""Test Script: Testing functions from deadline.py"""
+
+from unittest.mock import MagicMock
+
+from deadline import Deadline, get_run_deadline
+
+
+class MockClock:
+    """A clock which only moves when told to"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_deadline_keeps_back_margin():
+    """
+    Test a `Deadline` is reached once only the margin is left
+    """
+    clock = MockClock()
+    deadline = Deadline(30, margin=10, clock=clock)
+
+    assert deadline.remaining() == 20
+    assert not deadline.reached()
+
+    clock.now += 20
+    assert deadline.reached()
+
+
+def test_get_run_deadline_uses_lambda_context():
+    """
+    Test `get_run_deadline` reads the remaining time from a Lambda context over a budget
+    """
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 60_000
+
+    deadline = get_run_deadline(context, budget_seconds=5, margin=10)
+
+    assert 49 < deadline.remaining() <= 50
+
+
+def test_get_run_deadline_uses_budget_without_context():
+    """
+    Test `get_run_deadline` falls back to the configured budget when run locally
+    """
+    deadline = get_run_deadline(None, budget_seconds=30, margin=10)
+
+    assert 19 < deadline.remaining() <= 20
+
+
+def test_get_run_deadline_without_limit():
+    """
+    Test `get_run_deadline` gives no deadline when there is no context or budget
+    """
+    assert get_run_deadline(None, None) is None
@@ -5,23 +5,32 @@ import tempfile
 import json
 from unittest.mock import MagicMock, patch
 
+import pytest
+import requests
 
+from plant_index import PlantIndex
 from extract import (
     get_plant_data_from_api,
     process_plant_data_from_api,
     get_all_plants_data,
+    get_all_plants_data_concurrently,
+    get_all_plants_data_from_index,
     clean_unicode_from_plant_data,
-    create_json_file
+    create_json_file,
+    create_ndjson_file,
+    get_session,
+    close_sessions,
+    REQUEST_FAILED
 )
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_get_plant_data_from_api_calls_correct_functions(mock_get, mock_api_data):
     """
-    Test `get_plant_data` to see if the `requests.get` function is called correctly
+    Test `get_plant_data` to see if the `Session.get` function is called correctly
 
     Args:
-        mock_get (MagicMock): A MagicMock object used to patch the `requests.get` function
+        mock_get (MagicMock): A MagicMock object used to patch the `Session.get` function
 
         mock_api_data (dict): A mock dictionary representing unprocessed data
         retrieved from the API
@@ -79,6 +88,220 @@ def test_get_all_plants_data(mock_get_plant_data_from_api, mock_api_data, mock_n
     assert mock_get_plant_data_from_api.call_count == 51
 
 
+@patch("extract.get_plant_data_from_api")
+def test_get_all_plants_data_concurrently_keeps_plant_order(mock_get_plant_data_from_api, mock_api_data):
+    """
+    Test `get_all_plants_data_concurrently` returns processed plants in plant id order
+    and skips plants the API returns an error for
+
+    Args:
+        mock_get_plant_data_from_api (MagicMock): A MagicMock object used to patch
+        the extract.get_plant_data_from_api function
+
+        mock_api_data (dict): A mock dictionary representing unprocessed data
+        retrieved from the API
+    """
+    def mock_response(plant_id, api_path, session, scheduler=None, deadline=None):
+        if plant_id == 7:
+            return {"error": "plant not found"}
+        return {**mock_api_data, "plant_id": plant_id}
+
+    mock_get_plant_data_from_api.side_effect = mock_response
+
+    result = get_all_plants_data_concurrently("mock_path", max_workers=4)
+
+    assert [plant["plant_id"] for plant in result] == [
+        i for i in range(51) if i != 7]
+    assert mock_get_plant_data_from_api.call_count == 51
+
+
+@patch("extract.get_plant_data_from_api")
+def test_get_all_plants_data_from_index_discovers_new_plants(mock_get_plant_data_from_api, mock_api_data):
+    """
+    Test `get_all_plants_data_from_index` only requests indexed plants, keeps probing
+    while new plants are found and records the outcome in the index
+
+    Args:
+        mock_get_plant_data_from_api (MagicMock): A MagicMock object used to patch
+        the extract.get_plant_data_from_api function
+
+        mock_api_data (dict): A mock dictionary representing unprocessed data
+        retrieved from the API
+    """
+    live_plant_ids = {0, 1, 60, 61, 62}
+
+    def mock_response(plant_id, api_path, session, scheduler=None, deadline=None):
+        if plant_id in live_plant_ids:
+            return {**mock_api_data, "plant_id": plant_id}
+        return {"error": "plant not found"}
+
+    mock_get_plant_data_from_api.side_effect = mock_response
+    index = PlantIndex(live_ids={0: 0, 1: 0, 60: 0}, frontier_size=2)
+
+    result = get_all_plants_data_from_index("mock_path", index, max_workers=2)
+
+    requested = sorted(call.args[0]
+                       for call in mock_get_plant_data_from_api.call_args_list)
+    assert requested == [0, 1, 60, 61, 62, 63, 64]
+    assert [plant["plant_id"] for plant in result] == [0, 1, 60, 61, 62]
+    assert set(index.live_ids) == live_plant_ids
+    assert set(index.dead_ids) == {63, 64}
+
+
+@patch("extract.get_plant_data_from_api")
+def test_get_all_plants_data_from_index_stops_at_deadline(mock_get_plant_data_from_api, mock_api_data):
+    """
+    Test `get_all_plants_data_from_index` stops requesting plants once the deadline
+    is reached, keeps the plants already fetched and leaves skipped plants in the index
+
+    Args:
+        mock_get_plant_data_from_api (MagicMock): A MagicMock object used to patch
+        the extract.get_plant_data_from_api function
+
+        mock_api_data (dict): A mock dictionary representing unprocessed data
+        retrieved from the API
+    """
+    deadline = MagicMock()
+    deadline.reached.return_value = False
+
+    def mock_response(plant_id, api_path, session, scheduler=None, deadline=None):
+        if plant_id == 2:
+            deadline.reached.return_value = True
+        return {**mock_api_data, "plant_id": plant_id}
+
+    mock_get_plant_data_from_api.side_effect = mock_response
+    index = PlantIndex(live_ids={i: 0 for i in range(10)})
+
+    result = get_all_plants_data_from_index(
+        "mock_path", index, max_workers=1, deadline=deadline)
+
+    assert [plant["plant_id"] for plant in result] == [0, 1, 2]
+    assert mock_get_plant_data_from_api.call_count == 3
+    assert set(index.live_ids) == set(range(10))
+
+
+@patch("extract.get_plant_data_from_api")
+def test_get_all_plants_data_from_index_archives_raw_responses(mock_get_plant_data_from_api, mock_api_data):
+    """
+    Test `get_all_plants_data_from_index` archives every raw response, including errors
+
+    Args:
+        mock_get_plant_data_from_api (MagicMock): A MagicMock object used to patch
+        the extract.get_plant_data_from_api function
+
+        mock_api_data (dict): A mock dictionary representing unprocessed data
+        retrieved from the API
+    """
+    error_response = {"error": "plant not found"}
+    mock_get_plant_data_from_api.side_effect = [mock_api_data, error_response]
+    index = PlantIndex(live_ids={0: 0, 1: 0}, frontier_size=0)
+    archive = MagicMock()
+
+    get_all_plants_data_from_index(
+        "mock_path", index, max_workers=1, archive=archive)
+
+    assert [call.args[0] for call in archive.append.call_args_list] == [
+        mock_api_data, error_response]
+
+
+@patch("extract.get_plant_data_from_api")
+def test_get_all_plants_data_from_index_keeps_going_after_failed_plant(mock_get_plant_data_from_api, mock_api_data):
+    """
+    Test `get_all_plants_data_from_index` still returns every other plant when one
+    plant's request raised, and doesn't count the failure as a miss in the index
+
+    Args:
+        mock_get_plant_data_from_api (MagicMock): A MagicMock object used to patch
+        the extract.get_plant_data_from_api function
+
+        mock_api_data (dict): A mock dictionary representing unprocessed data
+        retrieved from the API
+    """
+    def mock_response(plant_id, api_path, session, scheduler=None, deadline=None):
+        if plant_id == 1:
+            raise requests.Timeout("mock timeout")
+        if plant_id == 2:
+            raise json.JSONDecodeError("truncated", "{", 1)
+        return {**mock_api_data, "plant_id": plant_id}
+
+    mock_get_plant_data_from_api.side_effect = mock_response
+    index = PlantIndex(live_ids={i: 0 for i in range(4)}, frontier_size=0)
+
+    result = get_all_plants_data_from_index("mock_path", index, max_workers=2)
+
+    assert [plant["plant_id"] for plant in result] == [0, 3]
+    assert index.live_ids == {0: 0, 1: 0, 2: 0, 3: 0}
+
+
+@patch("extract.sleep")
+def test_get_plant_data_from_api_stops_retrying_at_deadline(mock_sleep):
+    """
+    Test `get_plant_data_from_api` caps each request's timeout at the time left
+    and doesn't back off past the deadline
+
+    Args:
+        mock_sleep (MagicMock): A MagicMock object used to patch the extract.sleep function
+    """
+    session = MagicMock()
+    session.get.return_value.status_code = 503
+    scheduler = MagicMock()
+    deadline = MagicMock()
+    deadline.remaining.return_value = 0.75
+
+    result = get_plant_data_from_api(
+        1, "mock_path", session, scheduler, deadline)
+
+    assert result == {"error": "Request failed with status 503", "plant_id": 1,
+                      REQUEST_FAILED: True}
+    assert session.get.call_count == 2
+    assert session.get.call_args.kwargs["timeout"] == 0.75
+    mock_sleep.assert_called_once_with(0.5)
+
+
+def test_get_all_plants_data_from_index_leaves_index_after_deadline():
+    """
+    Test `get_all_plants_data_from_index` makes no request once the deadline has passed
+    while waiting for a slot, and leaves every plant as it was in the index
+    """
+    session = MagicMock()
+    deadline = MagicMock()
+    deadline.reached.return_value = False
+    deadline.remaining.return_value = -1
+    index = PlantIndex(live_ids={0: 1, 1: 0}, frontier_size=0)
+
+    with patch("extract.get_session", return_value=session):
+        result = get_all_plants_data_from_index(
+            "mock_path", index, max_workers=1, scheduler=MagicMock(), deadline=deadline)
+
+    assert result == []
+    assert not session.get.called
+    assert index.live_ids == {0: 1, 1: 0}
+    assert index.dead_ids == {}
+
+
+def test_get_session_reuses_session_per_pool_size():
+    """
+    Test `get_session` hands back the same pooled session for repeated calls
+    """
+    close_sessions()
+
+    session = get_session(4)
+
+    assert get_session(4) is session
+    assert get_session(8) is not session
+    assert session.get_adapter("https://mock")._pool_maxsize == 4
+
+    close_sessions()
+
+
+def test_get_all_plants_data_concurrently_rejects_empty_pool():
+    """
+    Test `get_all_plants_data_concurrently` raises an error when no workers are allowed
+    """
+    with pytest.raises(ValueError):
+        get_all_plants_data_concurrently("mock_path", max_workers=0)
+
+
 def test_clean_unicode_from_plant_data():
     """
     Test `clean_unicode_from_plant_data` is removing the specified unicode characters
@@ -116,3 +339,30 @@ def test_create_json_file():
         assert actual_data == expected_data
 
     os.remove(temp_file_path)
+
+
+def test_create_ndjson_file_writes_one_record_per_line():
+    """
+    Test `create_ndjson_file` writes each record on its own line and can append
+    to an existing file
+    """
+    test_data = [
+        {"id": 1, "name": "daisy"},
+        {"id": 2, "name": "marigold"}
+    ]
+
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file_path = temp_file.name
+
+    result = create_ndjson_file(iter(test_data), temp_file_path)
+    create_ndjson_file([{"id": 3, "name": "tulip"}],
+                       temp_file_path, append=True)
+
+    assert result == "Data processed!"
+
+    with open(temp_file_path, "r") as ndjson_file:
+        actual_data = [json.loads(line) for line in ndjson_file]
+
+    assert actual_data == test_data + [{"id": 3, "name": "tulip"}]
+
+    os.remove(temp_file_path)
@@ -0,0 +1,75 @@
+"""Test Script: Testing functions from intermediate.py"""
+
+import pandas as pd
+import pytest
+
+from intermediate import (
+    write_plant_chunks,
+    write_plant_data,
+    iter_plant_data,
+    read_plant_data,
+    PLANT_SCHEMA
+)
+from load import get_rows
+from transform import build_plant_dataframe, iter_plant_dataframes
+
+
+@pytest.fixture
+def mock_plants_data(mock_flattened_data):
+    """
+    Five flattened plants with different botanists and temperatures
+
+    Returns:
+        list[dict]: Flattened plant data
+    """
+    return [{**mock_flattened_data[0], "plant_id": plant_id,
+             "botanist_name": f"Botanist {plant_id % 2}", "temperature": plant_id * 10.5}
+            for plant_id in range(5)]
+
+
+@pytest.mark.parametrize("file_name", ["plants.parquet", "plants.arrows"])
+@pytest.mark.parametrize("memory_map", [False, True])
+def test_write_plant_chunks_keeps_types(tmp_path, mock_plants_data, file_name, memory_map):
+    """
+    Test chunks are read back one at a time, with their datetime, categorical and
+    float32 types, and the same values for the database
+    """
+    file_path = str(tmp_path / file_name)
+
+    rows = write_plant_chunks(iter_plant_dataframes(mock_plants_data, 2), file_path)
+    chunks = list(iter_plant_data(file_path, memory_map))
+
+    assert rows == 5
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[0]["recording_time"].dtype == "datetime64[us, UTC]"
+    assert isinstance(chunks[0]["botanist_name"].dtype, pd.CategoricalDtype)
+    assert chunks[0]["temperature"].dtype == "Float32"
+
+    expected_df = build_plant_dataframe(mock_plants_data)
+    assert (get_rows(read_plant_data(file_path, memory_map), PLANT_SCHEMA.names)
+            == get_rows(expected_df, PLANT_SCHEMA.names))
+
+
+def test_write_plant_data_empty_file(tmp_path):
+    """
+    Test a file with no chunks reads back as an empty DataFrame with every column
+    """
+    file_path = str(tmp_path / "plants.parquet")
+
+    write_plant_chunks([], file_path)
+    result_df = read_plant_data(file_path)
+
+    assert result_df.empty
+    assert list(result_df.columns) == PLANT_SCHEMA.names
+
+
+def test_write_plant_data(tmp_path, mock_transformed_database):
+    """
+    Test a whole DataFrame is written as one chunk
+    """
+    file_path = str(tmp_path / "plants.arrows")
+
+    write_plant_data(mock_transformed_database, file_path)
+
+    assert len(list(iter_plant_data(file_path))) == 1
+    assert len(read_plant_data(file_path)) == len(mock_transformed_database)
@@ -0,0 +1,121 @@
+"""Test Script: Testing functions from light_transform.py"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from light_transform import (
+    PlantTable,
+    build_plant_table,
+    build_plant_data,
+    iter_batches,
+    get_joined_scientific_name,
+    get_valid_temperature,
+    PLANT_COLUMNS
+)
+from load import get_rows, load_plant_data, DimensionCache
+from transform import build_plant_dataframe
+
+LOADED_COLUMNS = [column for column in PLANT_COLUMNS if column != "plant_origin"]
+
+
+def test_build_plant_table_matches_dataframe(mock_flattened_data):
+    """
+    Test `build_plant_table` gives the load functions the same rows as `build_plant_dataframe`
+    """
+    missing_values = dict(mock_flattened_data[0], plant_id=1, temperature=90,
+                          last_watered="garbage", botanist_phone_number=None)
+    plant_data = mock_flattened_data + [missing_values]
+
+    table = build_plant_table(plant_data)
+    plant_df = build_plant_dataframe(plant_data)
+
+    assert get_rows(table, LOADED_COLUMNS) == get_rows(plant_df, LOADED_COLUMNS)
+
+
+def test_build_plant_table_drops_plants_without_names(mock_flattened_data):
+    """
+    Test `build_plant_table` leaves out plants with no name, like `build_plant_dataframe`
+    """
+    unnamed = dict(mock_flattened_data[0], plant_name=None)
+
+    table = build_plant_table(mock_flattened_data + [unnamed])
+
+    assert len(table) == 1
+    assert table.get_column("recording_time") == [
+        datetime(2023, 1, 1, tzinfo=timezone.utc)]
+
+
+@pytest.mark.parametrize("scientific_name,expected_result", [
+    (["A", "B"], "A, B"),
+    (["A"], "A"),
+    ([1], None),
+    (None, None)
+])
+def test_get_joined_scientific_name(scientific_name, expected_result):
+    """
+    Test `get_joined_scientific_name` joins names and skips values it can't join
+    """
+    assert get_joined_scientific_name(scientific_name) == expected_result
+
+
+@pytest.mark.parametrize("temperature,expected_result", [
+    (-40, -40),
+    (75.5, None),
+    (float("nan"), None),
+    (None, None)
+])
+def test_get_valid_temperature(temperature, expected_result):
+    """
+    Test `get_valid_temperature` removes outliers and missing readings
+    """
+    assert get_valid_temperature(temperature) == expected_result
+
+
+def test_plant_table_dropna():
+    """
+    Test `PlantTable.dropna` removes rows missing any of the given columns
+    """
+    table = PlantTable(["a", "b"], [(1, None), (None, 2), (3, 4)])
+
+    assert table.dropna(subset=["a"]).rows == [(1, None), (3, 4)]
+    assert table.dropna(subset=["a", "b"]).rows == [(3, 4)]
+
+
+def test_build_plant_data_picks_engine_by_size(mock_flattened_data):
+    """
+    Test `build_plant_data` only uses pandas for batches above `max_light_rows`
+    """
+    assert isinstance(build_plant_data(mock_flattened_data, 1), PlantTable)
+    assert isinstance(build_plant_data(mock_flattened_data, 0), pd.DataFrame)
+
+
+def test_load_plant_data_accepts_plant_table(mock_flattened_data):
+    """
+    Test `load_plant_data` loads a `PlantTable` and skips known dimension rows
+    """
+    mock_connection = MagicMock()
+    mock_executemany = mock_connection.cursor.return_value.__enter__.return_value.executemany
+    dimension_cache = DimensionCache()
+    table = build_plant_table(mock_flattened_data * 2)
+
+    load_plant_data(mock_connection, table, dimension_cache)
+    load_plant_data(mock_connection, table, dimension_cache)
+
+    assert mock_executemany.call_count == 7
+    origin_rows = mock_executemany.call_args_list[0].args[1]
+    assert origin_rows == [[0.0, 0.0, "mock country"]]
+
+
+@pytest.mark.parametrize("items,batch_size,expected_result", [
+    (range(5), 2, [[0, 1], [2, 3], [4]]),
+    (range(2), 5, [[0, 1]]),
+    ([], 3, [])
+])
+def test_iter_batches(items, batch_size, expected_result):
+    """
+    Test `iter_batches` splits items into lists of at most `batch_size`
+    """
+    assert list(iter_batches(items, batch_size)) == expected_result
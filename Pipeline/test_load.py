@@ -1,11 +1,25 @@
 """Test Script: Testing functions from load.py"""
-from unittest.mock import MagicMock
+from datetime import datetime, timezone
+import json
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
 from load import (
+    get_rows,
+    DimensionCache,
+    load_dimension_cache,
+    save_dimension_cache,
+    ensure_db_connection,
+    load_plant_data,
+    load_plant_chunks,
     insert_into_plant_origin_table,
     insert_into_plant_table,
     insert_into_botanist_table,
     insert_into_water_history_table,
-    insert_into_reading_information_table
+    insert_into_reading_information_table,
+    insert_into_quarantine_table,
+    bulk_insert_into_table
 )
 
 
@@ -132,3 +146,188 @@ def test_insert_into_reading_information_table(mock_transformed_database):
                     (SELECT shade_condition_id FROM shade_condition WHERE shade_condition_type = %s))
                     ON CONFLICT DO NOTHING;
                     """, mock_reading_info)
+
+
+def test_ensure_db_connection_reuses_open_connection():
+    """
+    Test `ensure_db_connection` only reconnects when the connection is closed
+    """
+    open_connection = MagicMock(closed=0)
+    closed_connection = MagicMock(closed=1)
+
+    with patch("load.get_db_connection") as mock_get_db_connection:
+        assert ensure_db_connection(
+            open_connection, {}) is open_connection
+        assert ensure_db_connection(
+            closed_connection, {}) is mock_get_db_connection.return_value
+
+    mock_get_db_connection.assert_called_once()
+
+
+def test_load_plant_data_skips_known_dimension_rows(mock_transformed_database):
+    """
+    Test `load_plant_data` only inserts dimension rows once per `DimensionCache`
+    """
+    mock_connection = MagicMock()
+    mock_executemany = mock_connection.cursor.return_value.__enter__.return_value.executemany
+    dimension_cache = DimensionCache()
+
+    load_plant_data(mock_connection, mock_transformed_database, dimension_cache)
+    assert mock_executemany.call_count == 5
+
+    mock_executemany.reset_mock()
+    load_plant_data(mock_connection, mock_transformed_database, dimension_cache)
+    assert mock_executemany.call_count == 2
+
+
+def test_get_rows_converts_values_for_the_database():
+    """
+    Test `get_rows` turns UTC datetimes naive and missing values into None
+    """
+    data = pd.DataFrame({
+        "recording_time": pd.to_datetime(["2023-01-01 12:00:00", None], utc=True),
+        "temperature": [20.5, float("nan")]
+    })
+
+    result = get_rows(data, ["recording_time", "temperature"])
+
+    assert result == [[datetime(2023, 1, 1, 12), 20.5], [None, None]]
+    assert result[0][0].tzinfo is None
+
+
+def test_get_rows_converts_compact_dtypes():
+    """
+    Test `get_rows` turns categoricals into strings and float32 values into the floats
+    they were read as, with missing values as None
+    """
+    data = pd.DataFrame({
+        "botanist_name": pd.Series(["mock botanist", None], dtype="category"),
+        "temperature": pd.Series([20.1, None], dtype="Float32")
+    })
+
+    result = get_rows(data, ["botanist_name", "temperature"])
+
+    assert result == [["mock botanist", 20.1], [None, None]]
+
+
+def test_load_plant_chunks_shares_dimension_cache(mock_transformed_database):
+    """
+    Test `load_plant_chunks` loads every chunk, inserting dimension rows only once
+    """
+    mock_connection = MagicMock()
+    mock_executemany = mock_connection.cursor.return_value.__enter__.return_value.executemany
+
+    result = load_plant_chunks(mock_connection, [mock_transformed_database] * 3)
+
+    assert result == len(mock_transformed_database) * 3
+    assert mock_executemany.call_count == 5 + 2 + 2
+
+
+def test_load_plant_data_resends_changed_dimension_rows(mock_transformed_database):
+    """
+    Test `load_plant_data` sends a plant again once its details change
+    """
+    mock_connection = MagicMock()
+    mock_executemany = mock_connection.cursor.return_value.__enter__.return_value.executemany
+    dimension_cache = DimensionCache()
+
+    assert load_plant_data(mock_connection, mock_transformed_database, dimension_cache) == 3
+
+    renamed_plant = mock_transformed_database.copy()
+    renamed_plant["plant_name"] = "renamed plant"
+
+    mock_executemany.reset_mock()
+    assert load_plant_data(mock_connection, renamed_plant, dimension_cache) == 1
+    assert mock_executemany.call_count == 3
+
+
+def test_load_plant_data_resyncs_on_schedule(mock_transformed_database):
+    """
+    Test every dimension row is sent again once `resync_seconds` have passed
+    """
+    mock_connection = MagicMock()
+    now = [0.0]
+    dimension_cache = DimensionCache(resync_seconds=60, clock=lambda: now[0])
+
+    assert load_plant_data(mock_connection, mock_transformed_database, dimension_cache) == 3
+
+    now[0] = 59
+    assert load_plant_data(mock_connection, mock_transformed_database, dimension_cache) == 0
+
+    now[0] = 60
+    assert load_plant_data(mock_connection, mock_transformed_database, dimension_cache) == 3
+    assert dimension_cache.last_resync == 60
+
+
+def test_save_and_load_dimension_cache(tmp_path, mock_transformed_database):
+    """
+    Test a saved dimension cache still skips the rows it has seen
+    """
+    cache_path = str(tmp_path / "dimension_cache.json")
+    dimension_cache = DimensionCache()
+    load_plant_data(MagicMock(), mock_transformed_database, dimension_cache)
+
+    save_dimension_cache(dimension_cache, cache_path)
+    loaded_cache = load_dimension_cache(cache_path)
+
+    assert loaded_cache.seen == dimension_cache.seen
+    assert loaded_cache.last_resync == dimension_cache.last_resync
+    assert load_plant_data(MagicMock(), mock_transformed_database, loaded_cache) == 0
+
+
+def test_load_dimension_cache_missing_file(tmp_path):
+    """
+    Test a new, empty cache is used when there is no cache file
+    """
+    dimension_cache = load_dimension_cache(str(tmp_path / "missing.json"))
+
+    assert dimension_cache.seen == {"plant_origin": {}, "plant": {}, "botanist": {}}
+    assert dimension_cache.is_resync_due()
+
+
+def test_insert_into_quarantine_table():
+    """
+    Test `insert_into_quarantine_table` inserts each rejected row with its reasons,
+    a naive UTC reading time and the whole row as JSON
+    """
+    mock_connection = MagicMock()
+    mock_cursor = mock_connection.cursor.return_value.__enter__.return_value
+    recording_time = datetime(2023, 9, 27, 10, 2, 3, tzinfo=timezone.utc)
+    records = [{"plant_id": 1, "recording_time": recording_time,
+                "soil_moisture": 150.0, "reasons": ["soil_moisture_out_of_range"]}]
+
+    assert insert_into_quarantine_table(mock_connection, records) == 1
+
+    rows = mock_cursor.executemany.call_args.args[1]
+    assert rows[0][:3] == [1, datetime(2023, 9, 27, 10, 2, 3),
+                           ["soil_moisture_out_of_range"]]
+    assert json.loads(rows[0][3]) == {"plant_id": 1, "recording_time": str(recording_time),
+                                      "soil_moisture": 150.0}
+    assert mock_connection.commit.called
+
+
+def test_insert_into_quarantine_table_without_rows():
+    """
+    Test `insert_into_quarantine_table` doesn't touch the database when nothing was rejected
+    """
+    mock_connection = MagicMock()
+
+    assert insert_into_quarantine_table(mock_connection, []) == 0
+    assert not mock_connection.cursor.called
+
+
+@patch("load.execute_values")
+def test_bulk_insert_into_table_sends_pages(mock_execute_values, mock_transformed_database):
+    """
+    Test `bulk_insert_into_table` sends the table's rows to `execute_values` with the page size
+    """
+    mock_connection = MagicMock()
+
+    bulk_insert_into_table(mock_connection, mock_transformed_database,
+                           "reading_information", page_size=500)
+
+    query, rows = mock_execute_values.call_args.args[1:]
+    assert "FROM (VALUES %s)" in query
+    assert len(rows) == len(mock_transformed_database)
+    assert mock_execute_values.call_args.kwargs["page_size"] == 500
+    assert mock_connection.commit.called
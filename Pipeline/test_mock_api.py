@@ -0,0 +1,114 @@
+"""Test Script: Testing the mock API and load test harness"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+from extract import get_plant_data_from_api, process_plant_data_from_api
+from load_test import get_percentile, benchmark_engine
+from mock_api import (
+    MockApiConfig,
+    generate_plant_data,
+    get_mock_response,
+    start_mock_api
+)
+
+
+@pytest.fixture
+def mock_api_path():
+    """
+    Runs the mock API on a free port for the duration of a test
+
+    Returns:
+        str: The base url of the running mock API
+    """
+    server, api_path = start_mock_api(MockApiConfig(plant_count=5))
+    yield api_path
+    server.shutdown()
+
+
+def test_generate_plant_data_matches_api_shape(mock_api_data):
+    """
+    Test `generate_plant_data` returns the same keys as the real API
+    """
+    result = generate_plant_data(3, datetime(2023, 1, 1, 12, 0))
+
+    assert set(result) == set(mock_api_data)
+    assert set(result["botanist"]) == set(mock_api_data["botanist"])
+    assert result["recording_taken"] == "2023-01-01 12:00:00"
+    assert len(result["origin_location"]) == 5
+
+
+@pytest.mark.parametrize("path,config,expected_status", [
+    ("/plants/1", MockApiConfig(), 200),
+    ("/plants/60", MockApiConfig(), 404),
+    ("/plants/1", MockApiConfig(error_rate=1), 500),
+    ("/unknown", MockApiConfig(), 404)
+])
+def test_get_mock_response_status(path, config, expected_status):
+    """
+    Test `get_mock_response` returns the expected status code
+    """
+    status, _ = get_mock_response(path, config, random.Random(0))
+
+    assert status == expected_status
+
+
+def test_get_mock_response_malformed_payload():
+    """
+    Test `get_mock_response` can return a body which isn't valid JSON
+    """
+    _, body = get_mock_response(
+        "/plants/1", MockApiConfig(malformed_rate=1), random.Random(0))
+
+    assert not body.endswith("}")
+
+
+def test_mock_api_serves_plants(mock_api_path):
+    """
+    Test the running mock API can be consumed by the extract functions
+    """
+    plant = process_plant_data_from_api(
+        get_plant_data_from_api(2, mock_api_path))
+    missing_plant = process_plant_data_from_api(
+        get_plant_data_from_api(10, mock_api_path))
+
+    assert plant["plant_id"] == 2
+    assert missing_plant is None
+
+
+@pytest.mark.parametrize("values,percentile,expected_result", [
+    ([5, 1, 3, 2, 4], 50, 3),
+    ([5, 1, 3, 2, 4], 100, 5),
+    ([5, 1, 3, 2, 4], 0, 1),
+    ([], 50, None)
+])
+def test_get_percentile(values, percentile, expected_result):
+    """
+    Test `get_percentile` uses the nearest rank
+    """
+    assert get_percentile(values, percentile) == expected_result
+
+
+def test_benchmark_engine_reports_requests(mock_api_path):
+    """
+    Test `benchmark_engine` counts every request made by an engine
+    """
+    result = benchmark_engine("concurrent", mock_api_path, 4, 1, plant_count=5)
+
+    assert result["requests"] == 5
+    assert result["plants"] == 5
+    assert result["exceptions"] == 0
+    assert result["p50_ms"] <= result["p99_ms"]
+
+
+@pytest.mark.parametrize("engine", ["sequential", "adaptive", "async"])
+def test_benchmark_engine_requests_plant_count(mock_api_path, engine):
+    """
+    Test every engine with a fixed range requests the same number of plants
+    """
+    result = benchmark_engine(engine, mock_api_path, 4, 1, plant_count=7)
+
+    assert result["requests"] == 7
+    assert result["plants"] == 5
@@ -0,0 +1,98 @@
+"""Test Script: Testing functions from pipeline.py"""
+
+from threading import Event
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pipeline import PipelineState, get_next_run_time, run_daemon
+
+
+class MockClock:
+    """A clock which only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize("now,expected_result", [
+    (0, 60),
+    (12.5, 60),
+    (60, 120),
+    (185, 240)
+])
+def test_get_next_run_time_stays_on_cadence(now, expected_result):
+    """
+    Test `get_next_run_time` keeps to multiples of the interval and skips missed runs
+    """
+    assert get_next_run_time(0, 60, now) == expected_result
+
+
+def test_run_daemon_keeps_state_between_runs():
+    """
+    Test `run_daemon` reuses the same state for every run until it is stopped
+    """
+    stop_event = Event()
+    states = []
+
+    def mock_run(shard, state):
+        states.append(state)
+        if len(states) == 3:
+            stop_event.set()
+        return {}
+
+    runs = run_daemon(0.01, stop_event=stop_event, run=mock_run)
+
+    assert runs == 3
+    assert states[0] is states[1] is states[2]
+
+
+def test_run_daemon_survives_failed_run():
+    """
+    Test `run_daemon` drops the connection after a failed run and carries on
+    """
+    stop_event = Event()
+    clock = MockClock()
+    connection = MagicMock(closed=False)
+    calls = []
+
+    def mock_run(shard, state):
+        calls.append(shard)
+        if len(calls) == 1:
+            state.conn = connection
+            raise ConnectionError("mock failure")
+        stop_event.set()
+        return {}
+
+    runs = run_daemon(0.01, "mock shard", stop_event, clock, mock_run)
+
+    assert runs == 2
+    assert calls == ["mock shard", "mock shard"]
+    connection.close.assert_called_once()
+
+
+def test_run_daemon_rejects_bad_interval():
+    """
+    Test `run_daemon` refuses an interval which isn't positive
+    """
+    with pytest.raises(ValueError):
+        run_daemon(0, stop_event=Event())
+
+
+@patch("pipeline.close_sessions")
+def test_pipeline_state_close(mock_close_sessions):
+    """
+    Test `PipelineState.close` closes the connection and the HTTP sessions
+    """
+    state = PipelineState()
+    connection = MagicMock(closed=False)
+    state.conn = connection
+
+    state.close()
+
+    connection.close.assert_called_once()
+    mock_close_sessions.assert_called_once()
+    assert state.conn is None
@@ -0,0 +1,85 @@
+"""Test Script: Testing functions from plant_index.py"""
+
+import os
+import tempfile
+
+from plant_index import (
+    PlantIndex,
+    load_plant_index,
+    save_plant_index,
+    INITIAL_ID_RANGE,
+    MISSES_BEFORE_DEAD
+)
+
+
+def test_empty_index_probes_initial_range():
+    """
+    Test a new index asks for the initial id range and the frontier above it
+    """
+    index = PlantIndex(frontier_size=3)
+
+    assert index.get_ids_to_fetch(now=0) == list(range(INITIAL_ID_RANGE))
+
+
+def test_dead_ids_are_only_reprobed_after_interval():
+    """
+    Test dead ids are skipped until the reprobe interval has passed
+    """
+    index = PlantIndex(live_ids={0: 0, 1: 0}, dead_ids={2: 100, 3: 100},
+                       frontier_size=2, reprobe_seconds=60)
+
+    assert index.get_ids_to_fetch(now=120) == [0, 1]
+    assert index.get_ids_to_fetch(now=160) == [0, 1, 2, 3]
+
+
+def test_frontier_extends_past_highest_live_id():
+    """
+    Test unseen ids above the highest live id are probed
+    """
+    index = PlantIndex(live_ids={0: 0, 10: 0}, frontier_size=2)
+
+    assert index.get_ids_to_fetch(now=0) == [0, 10, 11, 12]
+
+
+def test_live_id_needs_repeated_misses_to_become_dead():
+    """
+    Test a live id is only moved to the dead ids after several misses in a row
+    """
+    index = PlantIndex(live_ids={5: 0})
+
+    for _ in range(MISSES_BEFORE_DEAD - 1):
+        index.record(5, False, now=0)
+    assert 5 in index.live_ids
+
+    index.record(5, False, now=0)
+    assert 5 not in index.live_ids
+    assert index.dead_ids[5] == 0
+
+    index.record(5, True, now=1)
+    assert index.live_ids[5] == 0
+    assert 5 not in index.dead_ids
+
+
+def test_save_and_load_plant_index_round_trip():
+    """
+    Test an index saved to file is loaded back unchanged
+    """
+    index = PlantIndex(live_ids={1: 0, 2: 1}, dead_ids={3: 50.0})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, "index.json")
+        save_plant_index(index, index_path)
+        result = load_plant_index(index_path)
+
+    assert result.live_ids == index.live_ids
+    assert result.dead_ids == index.dead_ids
+
+
+def test_load_plant_index_missing_file():
+    """
+    Test a missing index file gives an empty index
+    """
+    result = load_plant_index("/nonexistent/plant_index.json")
+
+    assert result.live_ids == {}
+    assert result.dead_ids == {}
@@ -0,0 +1,91 @@
+"""Test Script: Testing functions from quality.py"""
+
+from datetime import datetime, timezone
+import json
+
+import pytest
+
+from light_transform import build_plant_table
+from quality import (
+    QualityRule,
+    check_plant_data,
+    write_quarantine
+)
+from transform import build_plant_dataframe
+
+NOW = datetime(2023, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def mock_plants_data(mock_flattened_data):
+    """
+    Four flattened plants: one valid, one missing its botanist and last watered time,
+    one with a soil moisture over 100 and one recorded in the future
+
+    Returns:
+        list[dict]: Flattened plant data
+    """
+    plant = mock_flattened_data[0]
+    return [
+        {**plant, "plant_id": 0, "soil_moisture": 50},
+        {**plant, "plant_id": 1, "botanist_name": None, "last_watered": None},
+        {**plant, "plant_id": 2, "soil_moisture": 101.5},
+        {**plant, "plant_id": 3, "recording_time": "2024-01-01 00:00:00"}
+    ]
+
+
+@pytest.mark.parametrize("build", [
+    build_plant_table,
+    build_plant_dataframe,
+    lambda plant_data: build_plant_dataframe(plant_data, compact=True)
+])
+def test_check_plant_data(mock_plants_data, build):
+    """
+    Test `check_plant_data` gives the same result for each engine's output
+    """
+    report = check_plant_data(build(mock_plants_data), now=NOW)
+
+    assert len(report.accepted) == 1
+    assert len(report.rejected) == 3
+    assert report.reasons == [["missing_last_watered", "missing_botanist"],
+                              ["soil_moisture_out_of_range"],
+                              ["recording_time_in_future"]]
+    assert report.counts == {
+        "missing_recording_time": 0,
+        "missing_last_watered": 1,
+        "missing_botanist": 1,
+        "soil_moisture_out_of_range": 1,
+        "recording_time_in_future": 1,
+        "last_watered_in_future": 0
+    }
+
+
+def test_check_plant_data_custom_rules(mock_plants_data):
+    """
+    Test rules can be swapped for other checks
+    """
+    rules = [QualityRule("plant_id_too_high", "plant_id", "range", 0, 1)]
+
+    report = check_plant_data(build_plant_dataframe(mock_plants_data), rules, NOW)
+
+    assert report.accepted["plant_id"].tolist() == [0, 1]
+    assert report.counts == {"plant_id_too_high": 2}
+
+
+def test_write_quarantine(tmp_path, mock_plants_data):
+    """
+    Test rejected rows are appended to the quarantine file with their reasons
+    """
+    quarantine_path = str(tmp_path / "quarantine.ndjson")
+    report = check_plant_data(build_plant_dataframe(mock_plants_data), now=NOW)
+
+    assert write_quarantine(report, quarantine_path) == 3
+    assert write_quarantine(report, quarantine_path) == 3
+
+    with open(quarantine_path, "r") as quarantine_file:
+        records = [json.loads(line) for line in quarantine_file]
+
+    assert len(records) == 6
+    assert records[0]["plant_id"] == 1
+    assert records[0]["botanist_name"] is None
+    assert records[1]["reasons"] == ["soil_moisture_out_of_range"]
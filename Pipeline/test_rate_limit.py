@@ -0,0 +1,162 @@
+"""Test Script: Testing functions from rate_limit.py"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from extract import get_plant_data_from_api
+from rate_limit import (
+    TokenBucket,
+    AdaptiveConcurrencyLimiter,
+    ApiScheduler,
+    create_api_scheduler,
+    get_api_scheduler,
+    DEFAULT_RATE_LIMIT
+)
+from sharding import parse_shard_spec
+
+
+class MockClock:
+    """A clock which only moves when told to, or when something sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_paces():
+    """
+    Test `TokenBucket` allows a burst up to its capacity then waits for new tokens
+    """
+    clock = MockClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleeper=clock.sleep)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    waited = bucket.acquire()
+
+    assert waited == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_token_bucket_rejects_bad_settings():
+    """
+    Test `TokenBucket` refuses a rate it could never satisfy
+    """
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_limiter_increases_additively_on_healthy_responses():
+    """
+    Test the limit rises by about one after a full round of healthy responses
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=10)
+
+    for _ in range(4):
+        limiter.record_success(0.1)
+
+    assert limiter.limit == 4
+    limiter.record_success(0.1)
+    assert limiter.limit == 5
+
+
+def test_limiter_never_exceeds_max_limit():
+    """
+    Test the limit stops rising at `max_limit`
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+
+    for _ in range(100):
+        limiter.record_success(0.1)
+
+    assert limiter.limit == 3
+
+
+def test_limiter_halves_on_failure_once_per_cooldown():
+    """
+    Test failures halve the limit, but a burst of failures only counts once
+    """
+    clock = MockClock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, cooldown=1, clock=clock)
+
+    limiter.record_failure()
+    limiter.record_failure()
+    assert limiter.limit == 4
+
+    clock.now = 2
+    limiter.record_failure()
+    assert limiter.limit == 2
+
+    clock.now = 4
+    limiter.record_success(latency=10)
+    assert limiter.limit == 1
+
+
+@pytest.mark.parametrize("status_code,expected_limit", [
+    (200, 4),
+    (404, 4),
+    (429, 2),
+    (503, 2)
+])
+def test_scheduler_backs_off_on_throttling_and_server_errors(status_code, expected_limit):
+    """
+    Test `ApiScheduler.record_response` only backs off for 429 and 5xx responses
+    """
+    scheduler = ApiScheduler(AdaptiveConcurrencyLimiter(initial_limit=4))
+
+    scheduler.record_response(status_code, 0.1)
+
+    assert scheduler.limiter.limit == expected_limit
+
+
+def test_scheduler_slot_tracks_requests_in_flight():
+    """
+    Test `ApiScheduler.slot` holds a concurrency slot for the duration of the block
+    """
+    scheduler = create_api_scheduler(max_workers=4, rate_limit=None)
+
+    with scheduler.slot():
+        assert scheduler.limiter.in_flight == 1
+
+    assert scheduler.limiter.in_flight == 0
+
+
+@patch("extract.sleep")
+def test_get_plant_data_from_api_retries_throttled_requests(mock_sleep, mock_api_data):
+    """
+    Test `get_plant_data_from_api` retries a throttled request when given a scheduler
+    """
+    throttled = MagicMock(status_code=429)
+    success = MagicMock(status_code=200)
+    success.json.return_value = mock_api_data
+    session = MagicMock()
+    session.get.side_effect = [throttled, success]
+    scheduler = create_api_scheduler(max_workers=4, rate_limit=None)
+
+    result = get_plant_data_from_api(0, "mock_api_path", session, scheduler)
+
+    assert result == mock_api_data
+    assert session.get.call_count == 2
+    assert mock_sleep.call_count == 1
+    assert scheduler.limiter.limit == 2
+
+
+def test_get_api_scheduler_for_shard_after_unsharded_run():
+    """
+    Test `get_api_scheduler` paces a sharded invocation at its share of the rate limit
+    after an unsharded one, and reuses each scheduler between invocations
+    """
+    unsharded = get_api_scheduler(4, DEFAULT_RATE_LIMIT)
+    shard = parse_shard_spec("1/4")
+    sharded = get_api_scheduler(4, DEFAULT_RATE_LIMIT / shard.count)
+
+    assert sharded is not unsharded
+    assert unsharded.bucket.rate == DEFAULT_RATE_LIMIT
+    assert sharded.bucket.rate == DEFAULT_RATE_LIMIT / 4
+    assert get_api_scheduler(4, DEFAULT_RATE_LIMIT / shard.count) is sharded
@@ -0,0 +1,111 @@
+"""Test Script: Testing functions from raw_archive.py"""
+
+import gzip
+
+from raw_archive import (
+    RawArchive,
+    get_segment_paths,
+    iter_archive,
+    iter_segment_index,
+    find_records
+)
+
+
+class MockClock:
+    """A clock which only moves when told to"""
+
+    def __init__(self):
+        self.now = 1700000000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_plant(plant_id: int, recording_taken: str = "2023-01-01 00:00:00") -> dict:
+    """Returns a small raw response for a plant"""
+    return {"plant_id": plant_id, "recording_taken": recording_taken, "name": "Mock"}
+
+
+def test_archive_round_trip(tmp_path):
+    """
+    Test every appended response can be streamed back in order
+    """
+    archive = RawArchive(str(tmp_path), batch_size=2)
+
+    for plant_id in range(5):
+        archive.append(make_plant(plant_id))
+    archive.close()
+
+    assert [plant["plant_id"] for plant in iter_archive(str(tmp_path))] == [0, 1, 2, 3, 4]
+
+
+def test_archive_appends_gzip_members(tmp_path):
+    """
+    Test each batch is written as its own gzip member which is readable as one file
+    """
+    archive = RawArchive(str(tmp_path), batch_size=2)
+
+    for plant_id in range(4):
+        archive.append(make_plant(plant_id))
+
+    entries = list(iter_segment_index(archive.segment_path))
+    with gzip.open(archive.segment_path, "rt") as segment_file:
+        lines = segment_file.read().splitlines()
+
+    assert len(lines) == 4
+    assert entries[0]["offset"] == 0
+    assert entries[2]["offset"] == entries[0]["length"]
+    assert [entry["line"] for entry in entries] == [0, 1, 0, 1]
+
+
+def test_archive_rotates_by_age(tmp_path):
+    """
+    Test a new segment is started once the current one is too old
+    """
+    clock = MockClock()
+    archive = RawArchive(str(tmp_path), max_segment_seconds=60,
+                         batch_size=1, clock=clock)
+
+    archive.append(make_plant(0))
+    clock.now += 30
+    archive.append(make_plant(1))
+    clock.now += 60
+    archive.append(make_plant(2))
+
+    assert len(get_segment_paths(str(tmp_path))) == 2
+
+
+def test_archive_rotates_by_size(tmp_path):
+    """
+    Test a new segment is started once the current one is too large
+    """
+    archive = RawArchive(str(tmp_path), max_segment_bytes=1, batch_size=1)
+
+    for plant_id in range(3):
+        archive.append(make_plant(plant_id))
+
+    assert len(get_segment_paths(str(tmp_path))) == 3
+
+
+def test_find_records_uses_index(tmp_path):
+    """
+    Test `find_records` returns the responses for a plant and reading time
+    """
+    archive = RawArchive(str(tmp_path), batch_size=3)
+    archive.append(make_plant(1, "2023-01-01 00:00:00"))
+    archive.append(make_plant(2, "2023-01-01 00:00:00"))
+    archive.append(make_plant(1, "2023-01-01 00:01:00"))
+    archive.append({"error": "plant not found", "plant_id": 7})
+    archive.close()
+
+    assert len(find_records(str(tmp_path), 1)) == 2
+    assert find_records(str(tmp_path), 1, "2023-01-01 00:01:00") == [
+        make_plant(1, "2023-01-01 00:01:00")]
+    assert find_records(str(tmp_path), 7)[0]["error"] == "plant not found"
+
+
+def test_get_segment_paths_missing_directory(tmp_path):
+    """
+    Test `get_segment_paths` returns nothing for an archive which doesn't exist
+    """
+    assert get_segment_paths(str(tmp_path / "missing")) == []
@@ -0,0 +1,97 @@
+"""Test Script: Testing functions from replay.py"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from load import DEFAULT_PAGE_SIZE
+from raw_archive import RawArchive
+from replay import iter_archived_plants_data, replay_archive
+
+
+@pytest.fixture
+def mock_archive_dir(tmp_path, mock_api_data):
+    """
+    An archive holding five readings for two plants and one error response
+
+    Returns:
+        str: The directory of the archive
+    """
+    archive = RawArchive(str(tmp_path), batch_size=2)
+    for minute in range(5):
+        archive.append({**mock_api_data, "plant_id": minute % 2,
+                        "recording_taken": f"2023-01-01 00:0{minute}:00"})
+    archive.append({"error": "plant not found", "plant_id": 9})
+    archive.close()
+    return str(tmp_path)
+
+
+def test_iter_archived_plants_data_filters_time_range(mock_archive_dir):
+    """
+    Test `iter_archived_plants_data` skips errors and readings outside the time range
+    """
+    result = list(iter_archived_plants_data(
+        mock_archive_dir, "2023-01-01 00:01:00", "2023-01-01 00:04:00"))
+
+    assert [plant["recording_time"] for plant in result] == [
+        "2023-01-01 00:01:00", "2023-01-01 00:02:00", "2023-01-01 00:03:00"]
+
+
+def test_replay_archive_without_database(mock_archive_dir):
+    """
+    Test `replay_archive` transforms every archived reading in batches
+    """
+    result = replay_archive(mock_archive_dir, batch_size=2)
+
+    assert result["rows"] == 5
+    assert result["batches"] == 3
+    assert result["load_seconds"] == 0
+    assert result["rows_per_second"] > 0
+
+
+@patch("replay.switch_to_schema")
+@patch("replay.load_plant_data")
+def test_replay_archive_loads_each_batch(mock_load_plant_data, mock_switch_to_schema,
+                                         mock_archive_dir):
+    """
+    Test `replay_archive` loads every batch into the chosen schema, sharing one
+    dimension cache between batches
+    """
+    mock_connection = MagicMock()
+
+    replay_archive(mock_archive_dir, mock_connection, "long_term", batch_size=3)
+
+    mock_switch_to_schema.assert_called_once_with(mock_connection, "long_term")
+    assert mock_load_plant_data.call_count == 2
+    dimension_caches = [call.args[2]
+                        for call in mock_load_plant_data.call_args_list]
+    assert dimension_caches[0] is dimension_caches[1]
+    assert [call.args[3] for call in mock_load_plant_data.call_args_list] == [
+        DEFAULT_PAGE_SIZE, DEFAULT_PAGE_SIZE]
+
+
+@patch("load.execute_values")
+def test_replay_archive_bulk_loads_pages(mock_execute_values, mock_archive_dir):
+    """
+    Test `replay_archive` inserts each table a page of rows per statement and reports
+    the load rows per second
+    """
+    mock_connection = MagicMock()
+
+    result = replay_archive(mock_archive_dir, mock_connection, batch_size=5, page_size=2)
+
+    assert not mock_connection.cursor.return_value.__enter__.return_value.executemany.called
+    assert {len(call.args[2]) for call in mock_execute_values.call_args_list
+            if "reading_information" in call.args[1]} == {5}
+    assert {call.kwargs["page_size"] for call in mock_execute_values.call_args_list} == {2}
+    assert result["load_rows_per_second"] > 0
+
+
+def test_replay_archive_with_worker_processes(mock_archive_dir):
+    """
+    Test `replay_archive` gives the same totals when batches are transformed in processes
+    """
+    result = replay_archive(mock_archive_dir, batch_size=2, max_workers=2)
+
+    assert result["rows"] == 5
+    assert result["batches"] == 3
@@ -0,0 +1,92 @@
+"""Test Script: Testing functions from sharding.py and shard_coordinator.py"""
+
+import pytest
+
+from plant_index import PlantIndex
+from sharding import Shard, parse_shard_spec, get_all_shards
+from shard_coordinator import run_shard, run_shards, format_shard_results
+
+
+def mock_run(shard: Shard) -> dict:
+    """Stands in for `run_pipeline`, failing for the last shard"""
+    if shard.index == shard.count - 1:
+        raise RuntimeError("mock failure")
+    return {"shard": str(shard), "plants": shard.index, "readings": shard.index}
+
+
+@pytest.mark.parametrize("spec,expected_result", [
+    ("3/8", Shard(3, 8)),
+    ("0/1", Shard(0, 1)),
+    ("", None),
+    (None, None)
+])
+def test_parse_shard_spec(spec, expected_result):
+    """
+    Test `parse_shard_spec` parses "<index>/<count>"
+    """
+    assert parse_shard_spec(spec) == expected_result
+
+
+@pytest.mark.parametrize("spec", ["8/8", "-1/8", "3", "a/b", "0/0"])
+def test_parse_shard_spec_rejects_bad_specs(spec):
+    """
+    Test `parse_shard_spec` raises a ValueError for an invalid spec
+    """
+    with pytest.raises(ValueError):
+        parse_shard_spec(spec)
+
+
+def test_every_plant_id_has_one_shard():
+    """
+    Test each plant id is owned by exactly one shard
+    """
+    shards = get_all_shards(8)
+
+    for plant_id in range(100):
+        assert sum(shard.owns(plant_id) for shard in shards) == 1
+
+
+def test_shard_get_path():
+    """
+    Test `Shard.get_path` gives each shard its own state file
+    """
+    assert Shard(3, 8).get_path(
+        "/tmp/plant_index.json") == "/tmp/plant_index.shard-3-of-8.json"
+
+
+def test_sharded_index_only_fetches_owned_ids():
+    """
+    Test a `PlantIndex` for a shard only requests and probes that shard's ids
+    """
+    shard = Shard(1, 4)
+    index = PlantIndex(owns=shard.owns, frontier_size=2)
+
+    ids_to_fetch = index.get_ids_to_fetch(now=0)
+    assert all(shard.owns(plant_id) for plant_id in ids_to_fetch)
+    assert 1 in ids_to_fetch and 49 in ids_to_fetch
+
+    index.record(49, True, now=0)
+    assert index.get_frontier_ids(now=0) == [53, 57]
+
+
+def test_run_shard_catches_errors():
+    """
+    Test `run_shard` reports a failing shard instead of raising
+    """
+    result = run_shard(Shard(1, 2), mock_run)
+
+    assert result["shard"] == "1/2"
+    assert "mock failure" in result["error"]
+    assert result["wall_seconds"] >= 0
+
+
+def test_run_shards_collects_every_shard():
+    """
+    Test `run_shards` returns a result for every shard, in order
+    """
+    results = run_shards(3, run=mock_run)
+
+    assert [result["shard"] for result in results] == ["0/3", "1/3", "2/3"]
+    assert "error" in results[2]
+    assert format_shard_results(results).splitlines()[-1].split()[:3] == [
+        "total", "1", "1"]
@@ -0,0 +1,54 @@
+"""Test Script: Testing functions from sunlight.py"""
+
+import pytest
+
+from sunlight import (
+    classify_sunlight,
+    classify_sunlight_details,
+    get_sunlight_cache_info,
+    pick_condition
+)
+
+
+@pytest.mark.parametrize("sunlight,expected_result", [
+    (["full sun"], ("full sun", "No Information")),
+    (["part sun", "part shade"], ("part sun", "part shade")),
+    (["Part sun/part shade", "part Sun"], ("Part sun", "part shade")),
+    (["full sun", "part sun"], ("No Information", "No Information")),
+    (["full shade", "deep shade"], ("No Information", "No Information")),
+    ([], ("No Information", "No Information")),
+    (None, ("No Information", "No Information"))
+])
+def test_classify_sunlight(sunlight, expected_result):
+    """
+    Test `classify_sunlight` finds the sun and shade conditions in one pass
+    """
+    assert classify_sunlight(sunlight) == expected_result
+
+
+@pytest.mark.parametrize("conditions,expected_result", [
+    (["part sun"], "part sun"),
+    (["Part Sun", "part sun"], "Part Sun"),
+    (["part sun", "full sun"], "No Information"),
+    ([], "No Information")
+])
+def test_pick_condition(conditions, expected_result):
+    """
+    Test `pick_condition` only reports a condition when every match agrees
+    """
+    assert pick_condition(conditions) == expected_result
+
+
+def test_classify_sunlight_caches_repeated_lists():
+    """
+    Test repeated sunlight lists are served from the cache
+    """
+    classify_sunlight_details.cache_clear()
+
+    for _ in range(10):
+        classify_sunlight(["full sun", "part shade"])
+    classify_sunlight(["full shade"])
+
+    info = get_sunlight_cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (9, 2, 2)
+    assert info["hit_rate"] == pytest.approx(9 / 11)
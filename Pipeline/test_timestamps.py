@@ -0,0 +1,84 @@
+"""Test Script: Testing functions from timestamps.py"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from timestamps import (
+    TimestampCache,
+    parse_timestamp,
+    parse_timestamp_uncached,
+    parse_timestamps,
+    MISSING,
+    LAST_WATERED_FORMAT,
+    RECORDING_TAKEN_FORMAT
+)
+from transform import parse_datetime_column
+
+
+@pytest.mark.parametrize("text,date_format,expected_result", [
+    ("Mon, 1 Jan 2023 00:00:00 GMT", LAST_WATERED_FORMAT,
+     datetime(2023, 1, 1, tzinfo=timezone.utc)),
+    ("Mon, 1 Jul 2023 12:00:00 Europe/London", LAST_WATERED_FORMAT,
+     datetime(2023, 7, 1, 11, tzinfo=timezone.utc)),
+    ("Mon, 1 Jan 2023 00:00:00 Nowhere", LAST_WATERED_FORMAT, None),
+    ("2023-01-01 12:30:00", RECORDING_TAKEN_FORMAT,
+     datetime(2023, 1, 1, 12, 30, tzinfo=timezone.utc)),
+    ("garbage", RECORDING_TAKEN_FORMAT, None),
+    (None, RECORDING_TAKEN_FORMAT, None)
+])
+def test_parse_timestamp_uncached(text, date_format, expected_result):
+    """
+    Test `parse_timestamp_uncached` applies the zone name and returns UTC
+    """
+    assert parse_timestamp_uncached(text, date_format) == expected_result
+
+
+def test_parse_timestamps_reuses_repeated_strings():
+    """
+    Test `parse_timestamps` only parses each distinct string once
+    """
+    cache = TimestampCache()
+    texts = ["2023-01-01 00:00:00"] * 3 + ["bad", "bad"]
+
+    result = parse_timestamps(texts, RECORDING_TAKEN_FORMAT, cache)
+
+    assert result[:3] == [datetime(2023, 1, 1, tzinfo=timezone.utc)] * 3
+    assert result[3:] == [None, None]
+    assert (cache.misses, cache.hits) == (2, 3)
+
+
+def test_timestamp_cache_evicts_least_recently_used():
+    """
+    Test `TimestampCache` drops the least recently used string when full
+    """
+    cache = TimestampCache(max_size=2)
+    cache.put("format", "a", None)
+    cache.put("format", "b", None)
+    cache.get("format", "a")
+    cache.put("format", "c", None)
+
+    assert cache.get("format", "b") is MISSING
+    assert cache.get("format", "a") is None
+    assert len(cache) == 2
+
+
+def test_parse_datetime_column_matches_scalar_parse():
+    """
+    Test `parse_datetime_column` returns the same UTC values as `parse_timestamp`
+    and fills strings from the cache
+    """
+    cache = TimestampCache()
+    column = pd.Series(["Mon, 1 Jan 2023 00:00:00 GMT", "bad", None,
+                        "Mon, 1 Jan 2023 00:00:00 GMT", "Tue, 2 Jan 2023 5:00:00 EST"])
+
+    result = parse_datetime_column(column, LAST_WATERED_FORMAT, cache)
+
+    assert str(result.dt.tz) == "UTC"
+    assert result.isna().tolist() == [False, True, True, False, False]
+    assert result[0] == parse_timestamp(column[0], LAST_WATERED_FORMAT)
+    assert result[4] == datetime(2023, 1, 2, 10, tzinfo=timezone.utc)
+
+    parse_datetime_column(column, LAST_WATERED_FORMAT, cache)
+    assert cache.hits == 3
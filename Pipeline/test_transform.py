@@ -1,6 +1,9 @@
 """Test Script: Testing functions from transform.py"""
 
-from datetime import datetime
+from datetime import datetime, timezone
+import json
+import os
+import tempfile
 import pandas as pd
 import pytest
 
@@ -9,6 +12,8 @@ from transform import (
     get_conditions_sun,
     get_conditions_shade,
     flatten_data,
+    iter_flattened_data,
+    load_ndjson_data,
     transform_email_column_using_regex,
     transform_phone_column_using_regex,
     transform_scientific_name_column,
@@ -16,7 +21,12 @@ from transform import (
     transform_recording_taken_column,
     build_location_columns,
     get_valid_temperature,
-    normalize_column_text
+    transform_temperature_column,
+    normalize_column_text,
+    build_plant_dataframe,
+    iter_plant_dataframes,
+    build_plant_dataframe_parallel,
+    CATEGORY_COLUMNS
 )
 
 
@@ -80,6 +90,52 @@ def test_flatten_data_returns_correct_data(mock_nested_data, mock_flattened_data
     assert result == mock_flattened_data
 
 
+def test_iter_flattened_data_is_lazy(mock_nested_data, mock_flattened_data):
+    """
+    Test `iter_flattened_data` only flattens records as they are requested
+    """
+    def records():
+        yield mock_nested_data
+        raise AssertionError("Only one record should have been read")
+
+    result = iter_flattened_data(records())
+
+    assert next(result) == mock_flattened_data[0]
+
+
+def test_load_ndjson_data_skips_malformed_lines(mock_nested_data):
+    """
+    Test `load_ndjson_data` yields each record and skips blank or truncated lines
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as temp_file:
+        temp_file.write(json.dumps(mock_nested_data) + "\n")
+        temp_file.write("\n")
+        temp_file.write(json.dumps(mock_nested_data) + "\n")
+        temp_file.write('{"plant_id": 1, "na')
+        temp_file_path = temp_file.name
+
+    result = list(load_ndjson_data(temp_file_path))
+
+    os.remove(temp_file_path)
+
+    assert result == [mock_nested_data, mock_nested_data]
+
+
+def test_flatten_data_accepts_ndjson_stream(mock_nested_data, mock_flattened_data):
+    """
+    Test `flatten_data` consumes records straight from `load_ndjson_data`
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as temp_file:
+        temp_file.write(json.dumps(mock_nested_data) + "\n")
+        temp_file_path = temp_file.name
+
+    result = flatten_data(load_ndjson_data(temp_file_path))
+
+    os.remove(temp_file_path)
+
+    assert result == mock_flattened_data
+
+
 def test_transform_email_column_using_regex():
     """
     Testing `transform_email_column_using_regex` function
@@ -150,7 +206,7 @@ def test_transform_last_watered_column(mock_database):
 
     result_df = transform_last_watered_column(mock_database)
 
-    expected_result = [datetime(2023, 1, 1, 0, 0, 0)]
+    expected_result = [datetime(2023, 1, 1, 0, 0, 0, tzinfo=timezone.utc)]
 
     assert result_df["last_watered"].tolist() == expected_result
 
@@ -162,7 +218,7 @@ def test_transform_recording_taken_column(mock_database):
 
     result_df = transform_recording_taken_column(mock_database)
 
-    expected_result = [datetime(2023, 1, 1, 0, 0, 0)]
+    expected_result = [datetime(2023, 1, 1, 0, 0, 0, tzinfo=timezone.utc)]
 
     assert result_df["recording_time"].tolist() == expected_result
 
@@ -182,10 +238,67 @@ def test_build_location_columns(mock_database):
     assert result_df["plant_location"].tolist() == expected_country
 
 
+def test_transform_scientific_name_column_matches_get_scientific_name():
+    """
+    Testing `transform_scientific_name_column` joins lists and leaves missing values missing
+    """
+    mock_database = pd.DataFrame(
+        {"scientific_name": [["A", "B"], ["C"], [], None]})
+
+    result_df = transform_scientific_name_column(mock_database)
+
+    assert result_df["scientific_name"].tolist()[:3] == ["A, B", "C", ""]
+    assert pd.isna(result_df["scientific_name"].tolist()[3])
+
+
+def test_transform_datetime_columns_invalid_values():
+    """
+    Testing the datetime transforms leave values which don't match the format missing
+    """
+    mock_database = pd.DataFrame({
+        "last_watered": ["Mon, 1 Jan 2023 00:00:00 GMT", "garbage", None],
+        "recording_time": ["2023-01-01 00:00:00", "2023-01-01T00:00:00", None]
+    })
+
+    result_df = transform_last_watered_column(mock_database)
+    result_df = transform_recording_taken_column(result_df)
+
+    assert result_df["last_watered"].isna().tolist() == [False, True, True]
+    assert result_df["recording_time"].isna().tolist() == [False, True, True]
+
+
+def test_transform_temperature_column():
+    """
+    Testing `transform_temperature_column` removes the same outliers as `get_valid_temperature`
+    """
+    mock_database = pd.DataFrame(
+        {"temperature": [-273.15, -40, 37, 75, 5600, None]})
+
+    result_df = transform_temperature_column(mock_database)
+
+    assert result_df["temperature"].isna().tolist() == [
+        True, False, False, False, True, True]
+
+
+def test_normalize_column_text_keeps_missing_columns(mock_database):
+    """
+    Testing `normalize_column_text` leaves a column with no text in it unchanged
+    """
+    result_df = transform_scientific_name_column(mock_database)
+    result_df = build_location_columns(result_df)
+    result_df["plant_cycle"] = float("nan")
+
+    result_df = normalize_column_text(result_df)
+
+    assert result_df["plant_cycle"].isna().all()
+    assert result_df["plant_name"].tolist() == ["mock name"]
+
+
 @pytest.mark.parametrize("temperature,expected_result", [
     (-273.15, None),
     (5600, None),
-    (37, 37.0)
+    (37, 37.0),
+    (None, None)
 ])
 def test_get_valid_temperature(temperature, expected_result):
     """
@@ -212,3 +325,78 @@ def test_normalize_column_text(mock_database):
     assert result_df["scientific_name"].tolist() == ["mock scientific name"]
     assert result_df["sun_condition"].tolist() == ["mock sun detail"]
     assert result_df["shade_condition"].tolist() == ["mock shade detail"]
+
+
+def test_build_plant_dataframe_compact_dtypes(mock_flattened_data):
+    """
+    Test `build_plant_dataframe` with `compact=True` uses categoricals, nullable
+    float32 and datetime64 columns, and keeps missing values as NA
+    """
+    result_df = build_plant_dataframe(mock_flattened_data * 3, compact=True)
+
+    for column in CATEGORY_COLUMNS:
+        assert isinstance(result_df[column].dtype, pd.CategoricalDtype)
+    assert result_df["temperature"].dtype == "Float32"
+    assert result_df["soil_moisture"].dtype == "Float32"
+    assert result_df["recording_time"].dtype == "datetime64[us, UTC]"
+    assert result_df["last_watered"].dtype == "datetime64[us, UTC]"
+    assert "plant_origin" not in result_df.columns
+
+
+def test_build_plant_dataframe_compact_uses_less_memory(mock_flattened_data):
+    """
+    Test the compact frame is smaller than the default one for a repetitive batch
+    """
+    plant_data = mock_flattened_data * 1000
+
+    default_df = build_plant_dataframe(plant_data)
+    compact_df = build_plant_dataframe(plant_data, compact=True)
+
+    assert (compact_df.memory_usage(deep=True).sum() * 2
+            < default_df.memory_usage(deep=True).sum())
+
+
+def test_iter_plant_dataframes_is_lazy(mock_flattened_data):
+    """
+    Test `iter_plant_dataframes` only reads one chunk of the stream at a time
+    """
+    consumed = []
+
+    def stream():
+        for plant_id in range(5):
+            consumed.append(plant_id)
+            yield {**mock_flattened_data[0], "plant_id": plant_id}
+
+    chunks = iter_plant_dataframes(stream(), chunk_size=2)
+
+    first_chunk = next(chunks)
+    assert first_chunk["plant_id"].tolist() == [0, 1]
+    assert consumed == [0, 1]
+
+    assert [chunk["plant_id"].tolist() for chunk in chunks] == [[2, 3], [4]]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_build_plant_dataframe_parallel_matches_serial(mock_flattened_data, max_workers):
+    """
+    Test `build_plant_dataframe_parallel` gives the same DataFrame as
+    `build_plant_dataframe`, in the original order
+    """
+    plant_data = [{**mock_flattened_data[0], "plant_id": plant_id}
+                  for plant_id in range(7)]
+
+    result_df = build_plant_dataframe_parallel(plant_data, chunk_size=2, max_workers=max_workers)
+
+    pd.testing.assert_frame_equal(result_df, build_plant_dataframe(plant_data))
+
+
+def test_build_plant_dataframe_parallel_compact(mock_flattened_data):
+    """
+    Test the chunks of a compact parallel build are joined back into categoricals
+    """
+    result_df = build_plant_dataframe_parallel(mock_flattened_data * 4, chunk_size=3,
+                                               max_workers=2, compact=True)
+
+    assert len(result_df) == 4
+    for column in CATEGORY_COLUMNS:
+        assert isinstance(result_df[column].dtype, pd.CategoricalDtype)
@@ -0,0 +1,244 @@
+"""Pipeline Script: Parses API timestamps into timezone-aware UTC datetimes"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone, tzinfo
+from threading import Lock
+from typing import Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+LAST_WATERED_FORMAT = "%a, %d %b %Y %H:%M:%S %Z"
+RECORDING_TAKEN_FORMAT = "%Y-%m-%d %H:%M:%S"
+UTC_ZONE_NAMES = {"UTC", "GMT", "Z"}
+DEFAULT_CACHE_SIZE = 100_000
+
+# Returned by `TimestampCache.get` for strings which haven't been parsed yet,
+# since None is a cached result for strings which don't parse
+MISSING = object()
+
+
+class TimestampCache:
+    """
+    A bounded map from (format, string) to its parsed timestamp, evicting the least
+    recently used entry when full. The same `last_watered` string repeats on every
+    poll until a plant is watered again, so most lookups are hits.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            max_size (int): The most parsed strings kept
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, date_format: str, text: str) -> datetime:
+        """
+        Looks up a parsed string
+
+        Args:
+            date_format (str): The format the string was parsed with
+
+            text (str): The string
+
+        Returns:
+            datetime: The cached timestamp, None if the string didn't parse, or
+            `MISSING` if it hasn't been parsed
+        """
+        key = (date_format, text)
+
+        with self._lock:
+            value = self._values.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._values.move_to_end(key)
+
+        return value
+
+    def put(self, date_format: str, text: str, value: datetime) -> None:
+        """
+        Stores a parsed string
+
+        Args:
+            date_format (str): The format the string was parsed with
+
+            text (str): The string
+
+            value (datetime): The parsed timestamp, or None if it didn't parse
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._values[(date_format, text)] = value
+            self._values.move_to_end((date_format, text))
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+    def get_many(self, date_format: str, texts: list[str]) -> list[datetime]:
+        """
+        Looks up many parsed strings at once
+
+        Args:
+            date_format (str): The format the strings were parsed with
+
+            texts (list[str]): The strings
+
+        Returns:
+            list[datetime]: The result of `get` for each string
+        """
+        values = self._values
+        results = []
+
+        with self._lock:
+            for text in texts:
+                value = values.get((date_format, text), MISSING)
+                if value is not MISSING:
+                    values.move_to_end((date_format, text))
+                results.append(value)
+            misses = results.count(MISSING)
+            self.misses += misses
+            self.hits += len(results) - misses
+
+        return results
+
+    def put_many(self, date_format: str, texts: list[str], values: list[datetime]) -> None:
+        """
+        Stores many parsed strings at once
+
+        Args:
+            date_format (str): The format the strings were parsed with
+
+            texts (list[str]): The strings
+
+            values (list[datetime]): The parsed timestamps, with None for strings
+            which didn't parse
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._values.update(zip(((date_format, text) for text in texts), values))
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the hit and miss counts
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+TIMESTAMP_CACHE = TimestampCache()
+
+
+def get_zone(zone_name: str) -> tzinfo:
+    """
+    Returns the timezone for a zone name such as "GMT" or "Europe/London"
+
+    Args:
+        zone_name (str): The name of the timezone
+
+    Returns:
+        tzinfo: The timezone, or None if the name isn't known
+    """
+    if zone_name in UTC_ZONE_NAMES:
+        return timezone.utc
+
+    try:
+        return ZoneInfo(zone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def parse_timestamp_uncached(text: str, date_format: str) -> datetime:
+    """
+    Parses a timestamp with an explicit format. A trailing %Z zone name is looked up
+    and applied rather than discarded; strings without a zone are taken to be UTC.
+
+    Args:
+        text (str): The timestamp string
+
+        date_format (str): The strptime format of the string
+
+    Returns:
+        datetime: The timestamp in UTC, or None if it doesn't match the format
+    """
+    if not isinstance(text, str):
+        return None
+
+    zone = timezone.utc
+
+    try:
+        if date_format.endswith(" %Z"):
+            text, zone_name = text.rsplit(" ", 1)
+            zone = get_zone(zone_name)
+            if zone is None:
+                return None
+            date_format = date_format[:-3]
+
+        parsed = datetime.strptime(text, date_format)
+    except ValueError:
+        return None
+
+    return parsed.replace(tzinfo=zone).astimezone(timezone.utc)
+
+
+def parse_timestamp(text: str, date_format: str,
+                    cache: TimestampCache = TIMESTAMP_CACHE) -> datetime:
+    """
+    Parses a timestamp, reusing the result for strings which have been seen before
+
+    Args:
+        text (str): The timestamp string
+
+        date_format (str): The strptime format of the string
+
+        cache (TimestampCache): The parsed strings to reuse
+
+    Returns:
+        datetime: The timestamp in UTC, or None if it doesn't match the format
+    """
+    if not isinstance(text, str):
+        return None
+
+    value = cache.get(date_format, text)
+    if value is MISSING:
+        value = parse_timestamp_uncached(text, date_format)
+        cache.put(date_format, text, value)
+
+    return value
+
+
+def parse_timestamps(texts: Iterable[str], date_format: str,
+                     cache: TimestampCache = TIMESTAMP_CACHE) -> list[datetime]:
+    """
+    Parses many timestamps with one format, reusing the result for repeated strings
+
+    Args:
+        texts (Iterable[str]): The timestamp strings
+
+        date_format (str): The strptime format of the strings
+
+        cache (TimestampCache): The parsed strings to reuse
+
+    Returns:
+        list[datetime]: The timestamps in UTC, with None for strings which don't parse
+    """
+    return [parse_timestamp(text, date_format, cache) for text in texts]
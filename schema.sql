@@ -68,6 +68,17 @@ CREATE TABLE IF NOT EXISTS reading_information (
     CONSTRAINT unique_plant_reading_time UNIQUE (plant_id, plant_reading_time)
 );
 
+-- Readings which failed a data-quality rule, kept with the codes of the rules they failed
+CREATE TABLE IF NOT EXISTS quarantined_reading (
+    quarantined_reading_id INT GENERATED ALWAYS AS IDENTITY,
+    quarantined_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    plant_id SMALLINT,
+    plant_reading_time TIMESTAMP,
+    reasons TEXT[] NOT NULL,
+    reading JSONB NOT NULL,
+    PRIMARY KEY (quarantined_reading_id)
+);
+
 INSERT INTO sun_condition(sun_condition_type) VALUES ('no information'), ('part sun'), ('full sun');
 INSERT INTO shade_condition(shade_condition_type) VALUES ('no information'), ('part shade'), ('full shade');
 